@@ -7,6 +7,7 @@
 #  (at your option) any later version.
 
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Union
 
@@ -16,6 +17,11 @@ from pyrogram.enums import ChatMemberStatus, ChatType
 
 from utils.misc import modules_help, prefix
 from utils.scripts import edit_or_reply, with_reply
+from utils.antispam import spam_filter
+from utils.restrictions import format_duration, ledger, parse_duration, telegram_expires
+
+# until_date pyrogram uses for restrictions that never expire
+FOREVER = datetime.fromtimestamp(0)
 
 
 async def get_user(client: Client, message: Message) -> Optional[dict]:
@@ -127,20 +133,10 @@ async def ban_cmd(client: Client, message: Message):
     reason = ""
     
     if len(message.command) > 1:
-        if len(message.command) > 2 and message.command[1][0].isdigit():
-            time_str = message.command[1].lower()
-            
-            if time_str[-1] == 'm':
-                ban_time = int(time_str[:-1]) * 60
-            elif time_str[-1] == 'h':
-                ban_time = int(time_str[:-1]) * 3600
-            elif time_str[-1] == 'd':
-                ban_time = int(time_str[:-1]) * 86400
-            else:
-                ban_time = int(time_str)
-                
-            if len(message.command) > 2:
-                reason = " ".join(message.command[2:])
+        if len(message.command) > 2:
+            ban_time = parse_duration(message.command[1]) or 0
+        if ban_time:
+            reason = " ".join(message.command[2:])
         else:
             reason = " ".join(message.command[1:])
     
@@ -150,21 +146,15 @@ async def ban_cmd(client: Client, message: Message):
         msg = await edit_or_reply(message, "<b>🔨 Banning user...</b>")
         
         if ban_time > 0:
-            ban_until_date = datetime.now() + timedelta(seconds=ban_time)
+            # Out-of-range durations are applied permanently (until the epoch) and lifted by the ledger
+            ban_until_date = datetime.now() + timedelta(seconds=ban_time) if telegram_expires(ban_time) else FOREVER
             await client.ban_chat_member(
                 chat_id=message.chat.id, 
                 user_id=user_id,
                 until_date=ban_until_date
             )
             
-            # Format time
-            time_text = ""
-            if ban_time >= 86400:
-                time_text = f"{ban_time // 86400} days"
-            elif ban_time >= 3600:
-                time_text = f"{ban_time // 3600} hours"
-            else:
-                time_text = f"{ban_time // 60} minutes"
+            time_text = format_duration(ban_time)
                 
             ban_text = f"<b>🔨 User banned for {time_text}!</b>"
         else:
@@ -174,6 +164,18 @@ async def ban_cmd(client: Client, message: Message):
             )
             ban_text = "<b>🔨 User banned permanently!</b>"
         
+        ledger.add(client.me.id, message.chat.id, user_id, "ban", ban_time,
+                   name=user_first_name, chat_title=message.chat.title, reason=reason)
+        ledger.ensure_running(client)
+        
+        # The replied message is a spam sample for .antispam train
+        replied = message.reply_to_message
+        if replied and replied.from_user and replied.from_user.id == user_id and (replied.text or replied.caption):
+            await spam_filter.add_samples("spam", [{
+                "text": str(replied.text or replied.caption),
+                "user_id": user_id,
+            }])
+        
         # Success message
         text = f"{ban_text}\n\n"
         text += f"<b>Chat:</b> {message.chat.title}\n"
@@ -214,6 +216,7 @@ async def unban_cmd(client: Client, message: Message):
             chat_id=message.chat.id,
             user_id=user_id
         )
+        ledger.remove(client.me.id, message.chat.id, user_id, "ban")
         
         # Success message
         text = f"<b>🔓 User unbanned!</b>\n\n"
@@ -302,20 +305,10 @@ async def mute_cmd(client: Client, message: Message):
     reason = ""
     
     if len(message.command) > 1:
-        if len(message.command) > 2 and message.command[1][0].isdigit():
-            time_str = message.command[1].lower()
-            
-            if time_str[-1] == 'm':
-                mute_time = int(time_str[:-1]) * 60
-            elif time_str[-1] == 'h':
-                mute_time = int(time_str[:-1]) * 3600
-            elif time_str[-1] == 'd':
-                mute_time = int(time_str[:-1]) * 86400
-            else:
-                mute_time = int(time_str)
-                
-            if len(message.command) > 2:
-                reason = " ".join(message.command[2:])
+        if len(message.command) > 2:
+            mute_time = parse_duration(message.command[1]) or 0
+        if mute_time:
+            reason = " ".join(message.command[2:])
         else:
             reason = " ".join(message.command[1:])
     
@@ -335,7 +328,7 @@ async def mute_cmd(client: Client, message: Message):
         )
         
         if mute_time > 0:
-            mute_until_date = datetime.now() + timedelta(seconds=mute_time)
+            mute_until_date = datetime.now() + timedelta(seconds=mute_time) if telegram_expires(mute_time) else FOREVER
             await client.restrict_chat_member(
                 chat_id=message.chat.id,
                 user_id=user_id,
@@ -343,14 +336,7 @@ async def mute_cmd(client: Client, message: Message):
                 until_date=mute_until_date
             )
             
-            # Format time
-            time_text = ""
-            if mute_time >= 86400:
-                time_text = f"{mute_time // 86400} days"
-            elif mute_time >= 3600:
-                time_text = f"{mute_time // 3600} hours"
-            else:
-                time_text = f"{mute_time // 60} minutes"
+            time_text = format_duration(mute_time)
                 
             mute_text = f"<b>🔇 User muted for {time_text}!</b>"
         else:
@@ -361,6 +347,10 @@ async def mute_cmd(client: Client, message: Message):
             )
             mute_text = "<b>🔇 User muted permanently!</b>"
         
+        ledger.add(client.me.id, message.chat.id, user_id, "mute", mute_time,
+                   name=user_first_name, chat_title=message.chat.title, reason=reason)
+        ledger.ensure_running(client)
+        
         # Success message
         text = f"{mute_text}\n\n"
         text += f"<b>Chat:</b> {message.chat.title}\n"
@@ -403,6 +393,7 @@ async def unmute_cmd(client: Client, message: Message):
             user_id=user_id,
             permissions=message.chat.permissions
         )
+        ledger.remove(client.me.id, message.chat.id, user_id, "mute")
         
         # Success message
         text = f"<b>🔊 User unmuted!</b>\n\n"
@@ -603,12 +594,36 @@ async def demote_cmd(client: Client, message: Message):
         await msg.edit(f"❌ <b>Error:</b> {e}")
 
 
+@Client.on_message(filters.command("restrictions", prefix) & filters.me)
+async def restrictions_cmd(client: Client, message: Message):
+    """List active bans and mutes from the local ledger"""
+    show_all = len(message.command) > 1 and message.command[1].lower() == "all"
+    entries = ledger.active(client.me.id, None if show_all else message.chat.id)
+    
+    if not entries:
+        await edit_or_reply(message, "<b>No active restrictions.</b>")
+        return
+    
+    now = time.time()
+    text = f"<b>Active restrictions ({len(entries)}):</b>\n"
+    for entry in entries:
+        expires = "permanent" if entry["until"] is None else f"{format_duration(entry['until'] - now)} left"
+        text += f"\n<b>{entry['kind']}</b> {entry.get('name') or ''} <code>{entry['user_id']}</code> — {expires}"
+        if show_all:
+            text += f" ({entry.get('chat_title') or entry['chat_id']})"
+        if entry.get("reason"):
+            text += f"\n  <i>{entry['reason']}</i>"
+    
+    await edit_or_reply(message, text)
+
+
 modules_help["admin"] = {
-    "ban [user] [time] [reason]": "Ban user from chat (time format: 10m, 10h, 10d)",
+    "ban [user] [time] [reason]": "Ban user from chat (time format: 45s, 10m, 10h, 10d)",
     "unban [user]": "Unban user from chat",
     "kick [user] [reason]": "Kick user from chat",
-    "mute [user] [time] [reason]": "Mute user in chat (time format: 10m, 10h, 10d)",
+    "mute [user] [time] [reason]": "Mute user in chat (time format: 45s, 10m, 10h, 10d)",
     "unmute [user]": "Unmute user in chat",
+    "restrictions [all]": "List active bans and mutes in this chat (or all chats)",
     "pin [silent]": "Pin replied message (add 'silent' to pin without notification)",
     "unpin": "Unpin replied message or last pinned",
     "unpin all": "Unpin all messages in chat",
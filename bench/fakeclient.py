@@ -0,0 +1,199 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Local stand-in for pyrogram's Client used to benchmark handlers offline.
+
+Every API method is recorded, can be delayed by a configurable latency and
+can be made to raise (e.g. FloodWait or ChatAdminRequired) a given number of
+times. asyncio.sleep calls made by handlers are fast-forwarded and counted.
+"""
+
+import asyncio
+import contextlib
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from pyrogram.enums import ChatMemberStatus, ChatType
+
+_real_sleep = asyncio.sleep
+
+
+class AllowAll:
+    """Privileges/permissions object where every flag is granted"""
+
+    def __getattr__(self, name):
+        return True
+
+
+class FakeUser(SimpleNamespace):
+    def __init__(self, user_id: int, first_name: str = "User", **kwargs):
+        super().__init__(id=user_id, first_name=first_name, username=None, is_self=False, **kwargs)
+
+
+class FakeChat(SimpleNamespace):
+    def __init__(self, client: "FakeClient", chat_id: int, chat_type=ChatType.SUPERGROUP, **kwargs):
+        super().__init__(
+            id=chat_id, type=chat_type, title="Bench chat", username=None,
+            permissions=AllowAll(), **kwargs
+        )
+        self._client = client
+
+    async def get_member(self, user_id: int):
+        return await self._client.get_chat_member(self.id, user_id)
+
+
+class FakeMessage:
+    _ids = itertools.count(1000)
+
+    def __init__(self, client: "FakeClient", chat: FakeChat, text: str = "", from_user: FakeUser = None,
+                 reply_to_message: "FakeMessage" = None, message_id: int = None, outgoing: bool = True,
+                 prefix: str = "."):
+        self._client = client
+        self.id = message_id if message_id is not None else next(self._ids)
+        self.chat = chat
+        self.text = text
+        self.caption = None
+        self.media = None
+        self.entities = []
+        self.from_user = from_user or client.me
+        self.sender_chat = None
+        self.reply_to_message = reply_to_message
+        self.forward_from = None
+        self.outgoing = outgoing
+        self.empty = False
+        self.service = None
+        self.date = datetime.now()
+        self.command = text[len(prefix):].split() if text.startswith(prefix) else None
+
+    async def edit(self, text: str, **kwargs):
+        return await self._client.edit_message_text(self.chat.id, self.id, text, **kwargs)
+
+    edit_text = edit
+
+    async def reply(self, text: str, **kwargs):
+        return await self._client.send_message(self.chat.id, text, reply_to_message_id=self.id, **kwargs)
+
+    reply_text = reply
+
+    async def delete(self, revoke: bool = True):
+        return await self._client.delete_messages(self.chat.id, self.id)
+
+
+class FakeClient:
+    """Records calls instead of talking to Telegram"""
+
+    def __init__(self, latency: float = 0.0, history_size: int = 200):
+        self.latency = latency
+        self.history_size = history_size
+        self.calls: List[tuple] = []
+        self.counts = Counter()
+        self.slept = 0.0
+        self._failures: Dict[str, List[Exception]] = {}
+        self.me = FakeUser(1, "Me", is_bot=False)
+        self.me.is_self = True
+        self.device_model = "bench"
+        self.system_version = "bench"
+        self.app_version = "bench"
+        self.pyrogram_version = (2, 0, 0)
+        # pyrogram runs synchronous custom filters on client.executor
+        self.executor = ThreadPoolExecutor(4, thread_name_prefix="bench-handler")
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return asyncio.get_running_loop()
+
+    def fail(self, method: str, error: Exception, times: int = 1):
+        """Make the next `times` calls of method raise error"""
+        self._failures.setdefault(method, []).extend([error] * times)
+
+    def reset(self):
+        self.calls.clear()
+        self.counts.clear()
+        self.slept = 0.0
+        # Same ids every iteration, so ranges like .purge cover the same messages
+        FakeMessage._ids = itertools.count(1000)
+
+    def chat(self, chat_id: int = -1001234567890, chat_type=ChatType.SUPERGROUP) -> FakeChat:
+        return FakeChat(self, chat_id, chat_type)
+
+    def message(self, text: str, chat: FakeChat = None, **kwargs) -> FakeMessage:
+        return FakeMessage(self, chat or self.chat(), text, **kwargs)
+
+    async def _call(self, method: str, *args, **kwargs):
+        self.calls.append((method, args, kwargs))
+        self.counts[method] += 1
+        if self.latency:
+            await _real_sleep(self.latency)
+        failures = self._failures.get(method)
+        if failures:
+            raise failures.pop(0)
+
+    @contextlib.contextmanager
+    def fast_sleep(self):
+        """Fast-forward asyncio.sleep inside handlers, accounting the requested time"""
+        async def sleep(delay, result=None):
+            self.slept += delay
+            await _real_sleep(0)
+            return result
+
+        asyncio.sleep = sleep
+        try:
+            yield
+        finally:
+            asyncio.sleep = _real_sleep
+
+    # API methods used by the modules
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await self._call("send_message", chat_id, text, **kwargs)
+        return self.message(text, chat=self.chat(chat_id))
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        await self._call("edit_message_text", chat_id, message_id, text, **kwargs)
+        return self.message(text, chat=self.chat(chat_id), message_id=message_id)
+
+    async def delete_messages(self, chat_id, message_ids, **kwargs):
+        await self._call("delete_messages", chat_id, message_ids, **kwargs)
+        return len(message_ids) if isinstance(message_ids, list) else 1
+
+    async def get_users(self, user_ids):
+        await self._call("get_users", user_ids)
+        return FakeUser(user_ids if isinstance(user_ids, int) else 4242, "Target")
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self._call("get_chat_member", chat_id, user_id)
+        return SimpleNamespace(status=ChatMemberStatus.ADMINISTRATOR, privileges=AllowAll())
+
+    async def get_chat_history(self, chat_id, limit: int = 0, **kwargs):
+        await self._call("get_chat_history", chat_id, limit=limit, **kwargs)
+        chat = self.chat(chat_id)
+        count = min(limit, self.history_size) if limit else self.history_size
+        for i in range(count):
+            from_user = self.me if i % 2 == 0 else FakeUser(2000 + i % 17)
+            yield FakeMessage(self, chat, f"history message {i}", from_user=from_user, message_id=100000 - i)
+
+    def __getattr__(self, method: str):
+        # Any other API method is recorded and returns a bare object
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        async def call(*args, **kwargs):
+            await self._call(method, *args, **kwargs)
+            return SimpleNamespace(id=next(FakeMessage._ids))
+
+        return call
+
+
+def user_message(client: FakeClient, text: str, reply_to: Optional[FakeMessage] = None,
+                 chat: Optional[FakeChat] = None) -> FakeMessage:
+    """A command message sent by the account itself"""
+    return client.message(text, chat=chat, reply_to_message=reply_to)
@@ -0,0 +1,162 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Replay a recorded update log through all registered handlers.
+
+    python -m bench.replay recordings/20250101-120000.updates.gz [--speed 10] [--latency 0.05]
+
+--speed 1 keeps the recorded timing, higher values compress it and 0 sends
+everything as fast as possible. Handlers run against the fake client, so no
+Telegram calls are made; RPCs are counted instead.
+"""
+
+import argparse
+import asyncio
+import importlib
+import statistics
+import time
+import traceback
+from collections import Counter, defaultdict
+
+from pyrogram import ContinuePropagation, StopPropagation, raw, types
+from pyrogram.handlers import EditedMessageHandler, MessageHandler, RawUpdateHandler
+
+from bench.fakeclient import FakeClient
+from utils.loader import import_path, module_handlers, read_entries
+from utils.updatelog import read_log
+
+NEW_MESSAGE = (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)
+EDITED_MESSAGE = (raw.types.UpdateEditMessage, raw.types.UpdateEditChannelMessage)
+
+
+class MessageCache(dict):
+    def __getitem__(self, key):
+        return self.get(key)
+
+
+class ReplayClient(FakeClient):
+    def __init__(self, latency: float):
+        super().__init__(latency=latency)
+        self.message_cache = MessageCache()
+        # "callback: ExceptionType" -> count
+        self.failures = Counter()
+
+    def record_failure(self, handler, error: Exception):
+        key = f"{handler.callback.__name__}: {type(error).__name__}"
+        if key not in self.failures:
+            # Full traceback once per kind of failure, counts in the summary
+            print(f"handler {key}")
+            traceback.print_exception(error)
+        self.failures[key] += 1
+
+
+def load_handlers() -> dict:
+    groups = defaultdict(list)
+    for name, path in read_entries():
+        try:
+            module = importlib.import_module(import_path(path))
+        except Exception as e:
+            print(f"skipping {name}: {e}")
+            continue
+        for handler, group in module_handlers(module):
+            groups[group].append(handler)
+    return dict(sorted(groups.items()))
+
+
+async def dispatch(client: ReplayClient, groups: dict, update, users: dict, chats: dict) -> int:
+    """Run the update through the handlers like pyrogram's dispatcher; returns handlers called"""
+    parsed = None
+    handler_type = None
+    if isinstance(update, NEW_MESSAGE):
+        handler_type = MessageHandler
+    elif isinstance(update, EDITED_MESSAGE):
+        handler_type = EditedMessageHandler
+    if handler_type is not None:
+        parsed = await types.Message._parse(client, update.message, users, chats, replies=0)
+
+    called = 0
+    for handlers in groups.values():
+        for handler in handlers:
+            try:
+                if isinstance(handler, RawUpdateHandler):
+                    args = (update, users, chats)
+                elif handler_type is not None and type(handler) is handler_type and await handler.check(client, parsed):
+                    args = (parsed,)
+                else:
+                    continue
+                called += 1
+                await handler.callback(client, *args)
+            except StopPropagation:
+                return called
+            except ContinuePropagation:
+                continue
+            except Exception as e:
+                client.record_failure(handler, e)
+            break
+    return called
+
+
+async def replay(path: str, speed: float, latency: float):
+    client = ReplayClient(latency)
+    groups = load_handlers()
+    frames = list(read_log(path))
+    if not frames:
+        print("log is empty")
+        return
+
+    latencies = []
+    handled = 0
+
+    async def run(update, users, chats):
+        nonlocal handled
+        start = time.perf_counter()
+        handled += await dispatch(client, groups, update, users, chats)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tasks = []
+    with client.fast_sleep():
+        for offset, update, users, chats in frames:
+            if speed > 0:
+                delay = offset / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.get_running_loop().run_in_executor(None, time.sleep, delay)
+            tasks.append(asyncio.create_task(run(update, users, chats)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(f"updates:      {len(frames)} (recorded over {frames[-1][0]:.1f}s)")
+    print(f"handler runs: {handled}")
+    print(f"elapsed:      {elapsed:.2f}s, {len(frames) / elapsed:.0f} updates/s")
+    print(f"latency ms:   p50 {percentile(0.5):.2f}  p95 {percentile(0.95):.2f}  "
+          f"p99 {percentile(0.99):.2f}  mean {statistics.mean(latencies) * 1000:.2f}")
+    print(f"rpc calls:    {sum(client.counts.values())}")
+    for method, count in client.counts.most_common():
+        print(f"  {method:<24}{count}")
+    print(f"failures:     {sum(client.failures.values())}")
+    for key, count in client.failures.most_common():
+        print(f"  {key:<40}{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded updates against the fake client")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression, 0 for as fast as possible")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake API call")
+    args = parser.parse_args()
+    asyncio.run(replay(args.path, args.speed, args.latency))
+
+
+if __name__ == "__main__":
+    main()
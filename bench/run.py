@@ -0,0 +1,192 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Benchmark command handlers against the fake client.
+
+    python -m bench.run [--iterations N] [--latency SECONDS] [--json FILE]
+                        [--baseline FILE] [--tolerance 0.25]
+
+With --baseline, exits non-zero if any scenario got slower, made more RPCs
+or allocated more than the baseline allows.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional
+
+from pyrogram import errors
+
+from bench.fakeclient import FakeClient, FakeMessage, user_message
+
+
+@dataclass
+class Scenario:
+    name: str
+    module: str
+    handler: str
+    text: str
+    reply: bool = False
+    setup: Optional[Callable[[FakeClient], None]] = None
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    rpc_calls: float
+    slept_s: float
+    alloc_kb: float
+    error: Optional[str] = None
+
+
+def flood(method: str, seconds: int = 5):
+    return lambda client: client.fail(method, errors.FloodWait(value=seconds))
+
+
+def admin_required(method: str):
+    return lambda client: client.fail(method, errors.ChatAdminRequired())
+
+
+SCENARIOS = [
+    Scenario("ban", "admin.admin", "ban_cmd", ".ban 4242 spam"),
+    Scenario("ban timed", "admin.admin", "ban_cmd", ".ban 4242 1h spam"),
+    Scenario("ban no rights", "admin.admin", "ban_cmd", ".ban 4242", setup=admin_required("ban_chat_member")),
+    Scenario("unban", "admin.admin", "unban_cmd", ".unban 4242"),
+    Scenario("kick", "admin.admin", "kick_cmd", ".kick 4242"),
+    Scenario("mute", "admin.admin", "mute_cmd", ".mute 4242 10m"),
+    Scenario("unmute", "admin.admin", "unmute_cmd", ".unmute 4242"),
+    Scenario("pin", "admin.admin", "pin_cmd", ".pin", reply=True),
+    Scenario("unpin all", "admin.admin", "unpin_cmd", ".unpin all"),
+    Scenario("promote", "admin.admin", "promote_cmd", ".promote 4242 mod"),
+    Scenario("demote", "admin.admin", "demote_cmd", ".demote 4242"),
+    Scenario("purge", "utils.purge", "purge_cmd", ".purge", reply=True),
+    Scenario("purge flood", "utils.purge", "purge_cmd", ".purge", reply=True, setup=flood("delete_messages")),
+    Scenario("purgeme", "utils.purge", "purgeme_cmd", ".purgeme 50"),
+    Scenario("del", "utils.purge", "del_cmd", ".del", reply=True),
+    Scenario("help", "core.help", "help_cmd", ".help"),
+    Scenario("help module", "core.help", "help_cmd", ".help admin"),
+    Scenario("modules", "core.help", "modules_cmd", ".modules"),
+    Scenario("sysinfo", "system.system", "sysinfo_cmd", ".sysinfo"),
+    Scenario("about", "utils.info", "about", ".about"),
+    Scenario("botinfo", "utils.info", "botinfo", ".botinfo"),
+    Scenario("id", "utils.info", "get_id", ".id", reply=True),
+]
+
+
+async def run_scenario(scenario: Scenario, iterations: int, latency: float) -> Result:
+    handler = getattr(importlib.import_module(scenario.module), scenario.handler)
+    client = FakeClient(latency=latency)
+    timings = []
+    rpc_calls = []
+    slept = []
+    allocated = []
+    error = None
+
+    for _ in range(iterations):
+        client.reset()
+        if scenario.setup:
+            scenario.setup(client)
+        chat = client.chat()
+        reply = None
+        if scenario.reply:
+            reply = FakeMessage(client, chat, "target", message_id=900, from_user=client.me)
+        message = user_message(client, scenario.text, reply_to=reply, chat=chat)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            with client.fast_sleep():
+                await handler(client, message)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        allocated.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        timings.append(elapsed)
+        rpc_calls.append(sum(client.counts.values()))
+        slept.append(client.slept)
+
+    timings.sort()
+    return Result(
+        name=scenario.name,
+        iterations=iterations,
+        p50_ms=round(statistics.median(timings) * 1000, 3),
+        p95_ms=round(timings[min(int(len(timings) * 0.95), len(timings) - 1)] * 1000, 3),
+        rpc_calls=statistics.mean(rpc_calls),
+        slept_s=round(statistics.mean(slept), 3),
+        alloc_kb=round(statistics.mean(allocated) / 1024, 1),
+        error=error,
+    )
+
+
+def compare(results: List[Result], baseline: dict, tolerance: float) -> List[str]:
+    """List regressions against a previous --json report"""
+    previous = {item["name"]: item for item in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        if result.rpc_calls > before["rpc_calls"]:
+            regressions.append(f"{result.name}: RPC calls {before['rpc_calls']} -> {result.rpc_calls}")
+        for field in ("p50_ms", "alloc_kb"):
+            limit = before[field] * (1 + tolerance)
+            if getattr(result, field) > limit and getattr(result, field) - before[field] > 0.5:
+                regressions.append(f"{result.name}: {field} {before[field]} -> {getattr(result, field)}")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark command handlers with a fake client")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API call")
+    parser.add_argument("--only", help="run scenarios whose name contains this text")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare with a previous --json report")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = []
+    for scenario in SCENARIOS:
+        if args.only and args.only not in scenario.name:
+            continue
+        results.append(await run_scenario(scenario, args.iterations, args.latency))
+
+    print(f"{'scenario':<16}{'p50 ms':>10}{'p95 ms':>10}{'rpc':>7}{'slept s':>9}{'alloc KB':>10}")
+    for result in results:
+        print(
+            f"{result.name:<16}{result.p50_ms:>10.3f}{result.p95_ms:>10.3f}{result.rpc_calls:>7.1f}"
+            f"{result.slept_s:>9.1f}{result.alloc_kb:>10.1f}"
+            + (f"  ! {result.error}" if result.error else "")
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"generated": time.time(), "results": [asdict(r) for r in results]}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
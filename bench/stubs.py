@@ -0,0 +1,110 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Stand-ins for utils.misc, utils.scripts and utils.db.
+
+Those modules ship with the userbot itself, not with this modules
+repository, so a plain checkout can't import any command module. install()
+registers a stand-in for each one that can't be found and leaves the real
+modules alone when the bench runs inside a userbot checkout.
+"""
+
+import functools
+import importlib.util
+import os
+import platform
+import sys
+import types
+from typing import Any, Dict, Optional
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MemoryDB:
+    """utils.db interface kept in a dict"""
+
+    def __init__(self):
+        self.data: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, module: str, variable: str, default: Any = None) -> Any:
+        return self.data.get(module, {}).get(variable, default)
+
+    def set(self, module: str, variable: str, value: Any):
+        self.data.setdefault(module, {})[variable] = value
+
+    def remove(self, module: str, variable: str):
+        self.data.get(module, {}).pop(variable, None)
+
+    def get_collection(self, module: str) -> Dict[str, Any]:
+        return dict(self.data.get(module, {}))
+
+
+def make_misc() -> types.ModuleType:
+    misc = types.ModuleType("utils.misc")
+    misc.modules_help = {}
+    misc.prefix = "."
+    misc.userbot_version = "bench"
+    misc.python_version = platform.python_version()
+    try:
+        import git
+        misc.gitrepo = git.Repo(ROOT_PATH)
+    except Exception:
+        misc.gitrepo = None
+    return misc
+
+
+def make_scripts() -> types.ModuleType:
+    scripts = types.ModuleType("utils.scripts")
+
+    async def edit_or_reply(message, text: str, **kwargs):
+        if message.from_user and message.from_user.is_self:
+            return await message.edit(text, **kwargs)
+        return await message.reply(text, **kwargs)
+
+    def with_reply(func):
+        @functools.wraps(func)
+        async def wrapped(client, message):
+            if not message.reply_to_message:
+                await edit_or_reply(message, "<b>Reply to a message</b>")
+                return
+            return await func(client, message, message.reply_to_message)
+
+        return wrapped
+
+    def restart():
+        raise RuntimeError("restart() is not available in the bench")
+
+    scripts.edit_or_reply = edit_or_reply
+    scripts.with_reply = with_reply
+    scripts.restart = restart
+    return scripts
+
+
+def make_db() -> types.ModuleType:
+    db = types.ModuleType("utils.db")
+    db.db = MemoryDB()
+    return db
+
+
+STUBS = {
+    "utils.misc": make_misc,
+    "utils.scripts": make_scripts,
+    "utils.db": make_db,
+}
+
+
+def install(root: Optional[str] = ROOT_PATH):
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    import utils
+
+    for name, factory in STUBS.items():
+        if name in sys.modules or importlib.util.find_spec(name) is not None:
+            continue
+        module = sys.modules[name] = factory()
+        setattr(utils, name.rsplit(".", 1)[1], module)
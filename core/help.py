@@ -7,11 +7,13 @@
 #  (at your option) any later version.
 
 import asyncio
+import sys
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
 from utils.misc import modules_help, prefix
 from utils.scripts import edit_or_reply
+from utils import instrument, profiler
 
 
 @Client.on_message(filters.command(["help", "h"], prefix) & filters.me)
@@ -52,13 +54,55 @@ async def help_cmd(client: Client, message: Message):
         await edit_or_reply(message, text)
     else:
         await edit_or_reply(message, f"<b>❌ Module {message.command[1]} not found!</b>")
-        await asyncio.sleep(3)
+        await instrument.sleep(3)
         await message.delete()
 
 
+async def show_timings(message: Message):
+    """Show import cost of every module listed in full.txt"""
+    report = profiler.last_report
+    if report is None:
+        msg = await edit_or_reply(message, "<b>⏳ Profiling module imports...</b>")
+        # Profile in a fresh interpreter so already imported modules don't hide their cost
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "utils.profiler", "-o", profiler.REPORT_PATH,
+            cwd=profiler.ROOT_PATH,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        report = profiler.load_report() if proc.returncode == 0 else None
+        if report is None:
+            await msg.edit(f"<b>❌ Profiling failed:</b>\n<code>{stderr.decode(errors='replace')[-1000:]}</code>")
+            return
+    else:
+        msg = message
+        profiler.save_report(report)
+
+    text = "<b>⏱ Module import timings:</b>\n\n"
+    for timing in sorted(report["modules"], key=lambda t: t["total_ms"], reverse=True):
+        if timing["error"]:
+            text += f"<code>{timing['name']}</code>: ❌ {timing['error']}\n"
+            continue
+        text += (
+            f"<code>{timing['name']}</code>: {timing['total_ms']:.1f} ms "
+            f"(self {timing['self_ms']:.1f}, deps {timing['deps_ms']:.1f}), "
+            f"{timing['handlers']} handlers, {timing['rss_delta'] / 1024:.0f} KB\n"
+        )
+
+    text += f"\n<b>Total:</b> {report['total_ms']:.1f} ms\n"
+    text += f"<b>Report:</b> <code>{profiler.REPORT_PATH}</code>"
+
+    await edit_or_reply(msg, text)
+
+
 @Client.on_message(filters.command("modules", prefix) & filters.me)
 async def modules_cmd(client: Client, message: Message):
     """Show list of all installed modules"""
+    if len(message.command) > 1 and message.command[1].lower() == "--timings":
+        await show_timings(message)
+        return
+
     # Group modules by category
     categories = {}
     for module_name, commands in sorted(modules_help.items()):
@@ -84,11 +128,12 @@ async def modules_cmd(client: Client, message: Message):
 @Client.on_message(filters.command("loadmodule", prefix) & filters.me)
 async def load_module_cmd(client: Client, message: Message):
     """Load a custom module from the repository"""
-    if len(message.command) != 2:
-        await edit_or_reply(message, f"<b>❌ Usage:</b> <code>{prefix}loadmodule [module_name]</code>")
+    if len(message.command) not in (2, 3) or message.command[2:] not in ([], ["--sandbox"]):
+        await edit_or_reply(message, f"<b>❌ Usage:</b> <code>{prefix}loadmodule [module_name] [--sandbox]</code>")
         return
         
     module_name = message.command[1].lower()
+    sandboxed = len(message.command) == 3
     
     # First send processing message
     msg = await edit_or_reply(message, f"<b>⏳ Loading module {module_name}...</b>")
@@ -97,32 +142,34 @@ async def load_module_cmd(client: Client, message: Message):
     import requests
     import os
     import importlib
-    import sys
-    from utils.db import db
+    from utils.storage import storage
+    from utils import sandbox
     
-    # Get current module list
-    all_modules = db.get("custom.modules", "allModules", [])
+    custom_modules = storage.namespace("custom.modules")
+    # Sandboxed modules are kept out of allModules and modules/, which the
+    # host imports in-process on every start
+    list_key = "sandboxed" if sandboxed else "allModules"
+    other_key = "allModules" if sandboxed else "sandboxed"
     
-    # Check if module already installed
-    if module_name in all_modules:
+    if module_name in await custom_modules.get(other_key, []):
+        await msg.edit(f"<b>⚠️ Module {module_name} is already installed!</b>")
+        return
+    # Add module to the list; atomic, so concurrent installs can't drop each other
+    if not await custom_modules.append(list_key, module_name, unique=True):
         await msg.edit(f"<b>⚠️ Module {module_name} is already installed!</b>")
         return
-    
-    # Add module to the list
-    all_modules.append(module_name)
-    db.set("custom.modules", "allModules", all_modules)
     
     # Create directory for custom modules if it doesn't exist
     SCRIPT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
-    custom_modules_path = f"{SCRIPT_PATH}/modules/custom_modules"
+    custom_modules_path = sandbox.SANDBOXED_MODULES_PATH if sandboxed else f"{SCRIPT_PATH}/modules/custom_modules"
     os.makedirs(custom_modules_path, exist_ok=True)
     
     # Download module from repository
     try:
         # Get module list
-        f = requests.get(
-            "https://raw.githubusercontent.com/YOUR-USERNAME/custom_modules/main/full.txt"
-        ).text
+        f = (await asyncio.to_thread(
+            requests.get, "https://raw.githubusercontent.com/YOUR-USERNAME/custom_modules/main/full.txt"
+        )).text
         
         modules_dict = {
             line.split("/")[-1].split()[0]: line.strip() for line in f.splitlines()
@@ -131,19 +178,32 @@ async def load_module_cmd(client: Client, message: Message):
         if module_name not in modules_dict:
             await msg.edit(f"<b>❌ Module {module_name} not found in repository!</b>")
             # Remove from list
-            all_modules.remove(module_name)
-            db.set("custom.modules", "allModules", all_modules)
+            await custom_modules.remove(list_key, module_name)
             return
             
         # Download module
         module_path = f"{custom_modules_path}/{module_name}.py"
         url = f"https://raw.githubusercontent.com/YOUR-USERNAME/custom_modules/main/{modules_dict[module_name]}.py"
-        resp = requests.get(url)
+        resp = await asyncio.to_thread(requests.get, url)
         
         if resp.ok:
             with open(module_path, "wb") as f:
                 f.write(resp.content)
                 
+            if sandboxed:
+                try:
+                    worker = await sandbox.load(client, module_name, module_path)
+                except Exception as e:
+                    await msg.edit(f"<b>❌ Error starting sandbox:</b>\n<code>{e}</code>")
+                    os.remove(module_path)
+                    await custom_modules.remove(list_key, module_name)
+                    return
+                await msg.edit(
+                    f"<b>✅ Module {module_name} loaded in a sandbox!</b>\n"
+                    f"<b>Commands:</b> <code>{', '.join(sorted(worker.commands)) or 'none'}</code>"
+                )
+                return
+            
             # Try to import module
             try:
                 sys.path.insert(0, custom_modules_path)
@@ -156,24 +216,39 @@ async def load_module_cmd(client: Client, message: Message):
                 await msg.edit(f"<b>❌ Error importing module:</b>\n<code>{e}</code>")
                 # Remove file and from list on error
                 os.remove(module_path)
-                all_modules.remove(module_name)
-                db.set("custom.modules", "allModules", all_modules)
+                await custom_modules.remove(list_key, module_name)
         else:
             await msg.edit(f"<b>❌ Failed to download module {module_name}!</b>")
-            all_modules.remove(module_name)
-            db.set("custom.modules", "allModules", all_modules)
+            await custom_modules.remove(list_key, module_name)
     except Exception as e:
         await msg.edit(f"<b>❌ Error:</b>\n<code>{e}</code>")
         # Remove from list on error
-        if module_name in all_modules:
-            all_modules.remove(module_name)
-            db.set("custom.modules", "allModules", all_modules)
+        await custom_modules.remove(list_key, module_name)
+
+
+@Client.on_message(filters.command("unloadmodule", prefix) & filters.me)
+async def unload_module_cmd(client: Client, message: Message):
+    """Stop a sandboxed module and remove it"""
+    if len(message.command) != 2:
+        await edit_or_reply(message, f"<b>❌ Usage:</b> <code>{prefix}unloadmodule [module_name]</code>")
+        return
+    
+    from utils import sandbox
+    
+    module_name = message.command[1].lower()
+    if not await sandbox.uninstall(client, module_name):
+        await edit_or_reply(message, f"<b>❌ No sandboxed module named {module_name}.</b>")
+        return
+    await edit_or_reply(message, f"<b>✅ Module {module_name} stopped and removed.</b>")
 
 
 modules_help["help"] = {
     "help [module]": "Get help for a specific module or list all modules",
     "h [module]": "Alias for help command",
     "modules": "Show list of all installed modules",
+    "modules --timings": "Show import time, handlers and memory cost of each module",
     "loadmodule [name]": "Load a custom module from repository",
+    "loadmodule [name] --sandbox": "Load a custom module into its own limited worker process",
+    "unloadmodule [name]": "Stop a sandboxed module and remove it",
     "__category__": "core"
 }
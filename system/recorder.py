@@ -0,0 +1,81 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from utils.misc import modules_help, prefix
+from utils.scripts import edit_or_reply
+from utils.loader import ROOT_PATH
+from utils.updatelog import Anonymizer, UpdateRecorder
+
+RECORDINGS_PATH = os.path.join(ROOT_PATH, "recordings")
+
+recorder = None
+
+
+@Client.on_raw_update(group=-200)
+async def record_update(client: Client, update, users, chats):
+    if recorder is not None:
+        recorder.write(update, users, chats)
+
+
+@Client.on_message(filters.command("record", prefix) & filters.me)
+async def record_cmd(client: Client, message: Message):
+    """Record raw updates for load testing"""
+    global recorder
+    action = message.command[1].lower() if len(message.command) > 1 else "status"
+
+    if action == "start":
+        if recorder is not None:
+            await edit_or_reply(message, "<b>⚠️ Already recording!</b>")
+            return
+        anonymize = len(message.command) > 2 and message.command[2].lower() in ("anon", "anonymize")
+        os.makedirs(RECORDINGS_PATH, exist_ok=True)
+        path = os.path.join(RECORDINGS_PATH, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.updates.gz")
+        recorder = UpdateRecorder(path, Anonymizer(prefix) if anonymize else None)
+        await edit_or_reply(
+            message,
+            f"<b>⏺ Recording updates{' (anonymized)' if anonymize else ''} to</b> <code>{path}</code>"
+        )
+
+    elif action == "stop":
+        if recorder is None:
+            await edit_or_reply(message, "<b>⚠️ Not recording!</b>")
+            return
+        finished, recorder = recorder, None
+        await asyncio.to_thread(finished.close)
+        await edit_or_reply(
+            message,
+            f"<b>⏹ Recorded {finished.count} updates in {time.monotonic() - finished.started:.0f}s</b>\n"
+            f"<code>{finished.path}</code> ({os.path.getsize(finished.path) / 1024:.0f} KB)\n"
+            f"Replay with <code>python -m bench.replay {finished.path}</code>"
+        )
+
+    else:
+        if recorder is None:
+            await edit_or_reply(message, "<b>Not recording.</b>")
+        else:
+            await edit_or_reply(
+                message,
+                f"<b>⏺ Recording:</b> {recorder.count} updates, "
+                f"{time.monotonic() - recorder.started:.0f}s\n<code>{recorder.path}</code>"
+            )
+
+
+modules_help["recorder"] = {
+    "record start [anon]": "Start recording raw updates to disk (anon replaces names, IDs and text)",
+    "record stop": "Stop recording",
+    "record": "Show recording status",
+    "__category__": "system"
+}
@@ -0,0 +1,193 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import html
+import time
+from datetime import datetime
+
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from utils.misc import modules_help, prefix
+from utils.scripts import edit_or_reply
+from utils.scheduler import scheduler
+from utils.metrics import metrics
+from utils.offload import pool
+from utils.sandbox import sandboxes
+from utils.watchdog import watchdog
+from utils.tracing import tracer
+
+# Room for the waterfall of .trace last, leaving space for the header
+WATERFALL_LIMIT = 3800
+
+
+def format_ms(value) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+@Client.on_message(filters.command("stats", prefix) & filters.me)
+async def stats_cmd(client: Client, message: Message):
+    """Show handler latency, RPC and process metrics"""
+    process = await asyncio.to_thread(metrics.process_stats)
+    uptime = int(time.time() - metrics.started)
+
+    text = "<b>📊 CybroX-UserBot Stats</b>\n\n"
+    text += f"<b>Uptime:</b> <code>{uptime // 3600}h {uptime % 3600 // 60}m</code>\n"
+    text += f"<b>RSS:</b> <code>{process['rss'] / (1024**2):.1f} MB</code>\n"
+    text += f"<b>CPU:</b> <code>{process['cpu']}%</code>, <b>Threads:</b> <code>{process['threads']}</code>\n"
+    text += (
+        f"<b>Loop lag:</b> <code>{format_ms(metrics.loop_lag.latest())} ms</code> "
+        f"(p95 <code>{format_ms(metrics.loop_lag.percentile(95))} ms</code>, "
+        f"max <code>{format_ms(metrics.loop_lag_max)} ms</code>)\n"
+    )
+    text += (
+        f"<b>FloodWait:</b> <code>{metrics.flood_waits}</code> times, "
+        f"<code>{metrics.flood_wait_seconds:.0f}s</code> total\n\n"
+    )
+
+    if metrics.commands:
+        text += "<b>Handlers</b> (count, p50/p95/p99 ms):\n"
+        for name, stats in sorted(metrics.commands.items(), key=lambda item: -item[1].count):
+            q = stats.quantiles()
+            text += (
+                f"  <code>{name}</code>: {stats.count}, "
+                f"{format_ms(q[50])}/{format_ms(q[95])}/{format_ms(q[99])}"
+            )
+            if stats.errors:
+                text += f", {stats.errors} errors"
+            text += "\n"
+        text += "\n"
+
+    text += "<b>Lanes</b> (running/queued/workers, done):\n"
+    for name, lane in scheduler.stats().items():
+        text += (
+            f"  <code>{name}</code>: {lane['running']}/{lane['queued']}/{lane['workers']}, "
+            f"{lane['completed']}\n"
+        )
+    text += "\n"
+
+    offload = pool.stats()
+    text += (
+        f"<b>Process pool:</b> {offload['pending']}/{offload['max_queue']} queued, "
+        f"{offload['workers']} workers, {offload['completed']} done"
+    )
+    if offload["timeouts"] or offload["failed"]:
+        text += f", {offload['timeouts']} timeouts, {offload['failed']} failed"
+    text += "\n\n"
+
+    if sandboxes:
+        text += "<b>Sandboxed modules:</b>\n"
+        for name, sandbox in sandboxes.items():
+            info = sandbox.stats()
+            text += (
+                f"  <code>{name}</code> pid {info['pid'] or 'down'}, {info['dispatched']} commands, "
+                f"{info['timeouts']} timeouts, {info['restarts']} restarts\n"
+            )
+        text += "\n"
+
+    if metrics.rpc_counts:
+        text += f"<b>RPC calls:</b> {sum(metrics.rpc_counts.values())}\n"
+        for method, count in metrics.rpc_counts.most_common(10):
+            text += f"  <code>{method}</code>: {count}\n"
+        text += "\n"
+
+    port = metrics.exporter_port
+    if port:
+        text += f"<b>Prometheus:</b> <code>http://127.0.0.1:{port}/metrics</code>"
+    else:
+        text += "<b>Prometheus:</b> <code>disabled</code>"
+
+    await edit_or_reply(message, text)
+
+
+@Client.on_message(filters.command("stalls", prefix) & filters.me)
+async def stalls_cmd(client: Client, message: Message):
+    """Show recent event loop stalls"""
+    if not watchdog.stalls:
+        await edit_or_reply(
+            message, f"<b>✅ No event loop stalls over {watchdog.threshold * 1000:.0f} ms recorded.</b>"
+        )
+        return
+
+    show_stack = len(message.command) > 1 and message.command[1].lower() == "last"
+    stalls = [watchdog.stalls[-1]] if show_stack else list(watchdog.stalls)
+
+    text = f"<b>🐢 Event loop stalls</b> (threshold {watchdog.threshold * 1000:.0f} ms)\n\n"
+    for stall in reversed(stalls):
+        started = datetime.fromtimestamp(stall.started).strftime("%Y-%m-%d %H:%M:%S")
+        text += (
+            f"<code>{started}</code>: {stall.duration * 1000:.0f} ms in "
+            f"<code>{stall.command or 'unknown'}</code>\n"
+        )
+        if stall.stack:
+            frames = stall.stack if show_stack else stall.stack[-1:]
+            text += f"<pre>{''.join(frames)[-3000:]}</pre>\n"
+
+    await edit_or_reply(message, text)
+
+
+def render_waterfall(trace, width: int = 24) -> str:
+    """Render a trace as a text waterfall"""
+    data = trace.to_dict()
+    total = data["duration_ms"] or 1
+    lines = []
+    for span in data["spans"]:
+        start = int(span["offset_ms"] / total * width)
+        length = max(1, round(span["duration_ms"] / total * width))
+        bar = " " * start + "█" * min(length, width - start)
+        name = ("  " * span["depth"] + span["name"])[:28]
+        error = f" ! {span['error']}" if span["error"] else ""
+        lines.append(f"{bar:<{width}} {span['duration_ms']:>8.1f}ms {name}{error}")
+    if data["dropped_spans"]:
+        lines.append(f"... {data['dropped_spans']} more spans not recorded")
+    return "\n".join(lines)
+
+
+@Client.on_message(filters.command("trace", prefix) & filters.me)
+async def trace_cmd(client: Client, message: Message):
+    """Show recent command traces"""
+    if not tracer.recent:
+        await edit_or_reply(message, "<b>No traces recorded yet.</b>")
+        return
+
+    if len(message.command) > 1 and message.command[1].lower() == "last":
+        trace = tracer.recent[-1]
+        waterfall = html.escape(render_waterfall(trace))
+        # Cut whole lines before wrapping in <pre>, so the tags stay intact
+        if len(waterfall) > WATERFALL_LIMIT:
+            waterfall = waterfall[:waterfall.rfind("\n", 0, WATERFALL_LIMIT)] + "\n..."
+        text = (
+            f"<b>🧵 Trace of</b> <code>{html.escape(trace.name)}</code> "
+            f"({trace.duration * 1000:.1f} ms, {len(trace.spans) - 1 + trace.dropped} spans)\n"
+            f"<pre>{waterfall}</pre>"
+        )
+        await edit_or_reply(message, text)
+        return
+
+    text = "<b>🧵 Recent traces:</b>\n\n"
+    for trace in reversed(tracer.recent):
+        started = datetime.fromtimestamp(trace.started).strftime("%H:%M:%S")
+        line = (
+            f"<code>{started}</code> <code>{html.escape(trace.name)}</code>: "
+            f"{trace.duration * 1000:.1f} ms, {len(trace.spans) - 1 + trace.dropped} spans\n"
+        )
+        if len(text) + len(line) > 4096:
+            break
+        text += line
+    await edit_or_reply(message, text)
+
+
+modules_help["stats"] = {
+    "stats": "Show handler latency percentiles, RPC counters, FloodWait time, loop lag and memory",
+    "stalls": "Show recent event loop stalls with the blocking line and command",
+    "stalls last": "Show the full stack of the most recent stall",
+    "trace": "List recent command traces",
+    "trace last": "Show a waterfall of the last traced command: RPCs and storage access",
+    "__category__": "system"
+}
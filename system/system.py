@@ -11,7 +11,6 @@ import sys
 import time
 import platform
 import asyncio
-import psutil
 from datetime import datetime
 
 from pyrogram import Client, filters
@@ -20,7 +19,15 @@ import git
 
 from utils.misc import modules_help, prefix, userbot_version, gitrepo
 from utils.scripts import edit_or_reply, restart
-from utils.db import db
+from utils.loader import plan_reload, reload_module
+from utils.gitinfo import refresh_snapshot
+from utils.supervisor import read_shard_status
+from utils.startup import format_stages, precompile, run_shutdown_jobs
+from utils.storage import storage
+from utils.sysmetrics import get_sampler
+
+# Sampled in a background thread so .sysinfo never calls psutil on the event loop
+sampler = get_sampler()
 
 
 @Client.on_message(filters.command("restart", prefix) & filters.me)
@@ -29,13 +36,16 @@ async def restart_cmd(client: Client, message: Message):
     msg = await edit_or_reply(message, "<b>Restarting...</b>")
     
     # Save restart info to database
-    db.set("core.updater", "restart_info", {
+    await storage.set("core.updater", "restart_info", {
         "type": "restart",
         "chat_id": message.chat.id,
         "message_id": message.id,
         "time": time.time()
     })
     
+    # Fresh bytecode means the new process only has to unmarshal modules
+    await asyncio.to_thread(precompile)
+    await run_shutdown_jobs()
     restart()
 
 
@@ -43,18 +53,39 @@ async def restart_cmd(client: Client, message: Message):
 async def update_cmd(client: Client, message: Message):
     msg = await edit_or_reply(message, "<b>Checking for updates...</b>")
     
+    full_restart = len(message.command) > 1 and message.command[1].lower() == "--full"
+    
     try:
-        # Pull changes from git
-        gitrepo.git.fetch()
-        if gitrepo.git.rev_parse("HEAD") == gitrepo.git.rev_parse("@{u}"):
+        # Git calls spawn subprocesses, keep them off the event loop
+        await asyncio.to_thread(gitrepo.git.fetch)
+        old_head = await asyncio.to_thread(gitrepo.git.rev_parse, "HEAD")
+        if old_head == await asyncio.to_thread(gitrepo.git.rev_parse, "@{u}"):
             await msg.edit("<b>CybroX-UserBot is already up to date!</b>")
             return
             
         await msg.edit("<b>Updating CybroX-UserBot...</b>")
-        gitrepo.git.pull()
+        await asyncio.to_thread(gitrepo.git.pull)
+        new_head = await asyncio.to_thread(gitrepo.git.rev_parse, "HEAD")
+        await refresh_snapshot()
+        
+        changed = await asyncio.to_thread(gitrepo.git.diff, "--name-only", old_head, new_head)
+        to_reload, needs_restart = plan_reload(changed.splitlines())
+        
+        if not (full_restart or needs_restart):
+            try:
+                for module_name in to_reload:
+                    reload_module(client, module_name)
+            except Exception as e:
+                await msg.edit(f"<b>Reload of {module_name} failed:</b> <code>{e}</code>\n<b>Restarting...</b>")
+            else:
+                await msg.edit(
+                    f"<b>Updated to</b> <code>{new_head[:7]}</code><b> without restart!</b>\n"
+                    f"<b>Reloaded modules:</b> <code>{', '.join(to_reload) or 'none'}</code>"
+                )
+                return
         
         # Save restart info to database
-        db.set("core.updater", "restart_info", {
+        await storage.set("core.updater", "restart_info", {
             "type": "update",
             "chat_id": message.chat.id,
             "message_id": message.id,
@@ -62,27 +93,37 @@ async def update_cmd(client: Client, message: Message):
         })
         
         await msg.edit("<b>Update complete! Restarting...</b>")
+        await asyncio.to_thread(precompile)
+        await run_shutdown_jobs()
         restart()
     except Exception as e:
         await msg.edit(f"<b>Update failed:</b> <code>{str(e)}</code>")
 
 
+def format_summary(summary: dict, unit: str = "%", scale: float = 1) -> str:
+    """Format 1/5/15-minute averages and p95s of a sampled metric"""
+    averages = []
+    p95s = []
+    for avg, p95 in summary.values():
+        averages.append("-" if avg is None else f"{avg / scale:.1f}")
+        p95s.append("-" if p95 is None else f"{p95 / scale:.1f}")
+    return f"{'/'.join(averages)}{unit} (p95 {'/'.join(p95s)}{unit})"
+
+
 @Client.on_message(filters.command(["sysinfo", "neofetch"], prefix) & filters.me)
 async def sysinfo_cmd(client: Client, message: Message):
-    await message.edit("<b>Collecting system information...</b>")
-    
-    # CPU info
-    cpu_freq = psutil.cpu_freq()
-    cpu_freq_text = f"{cpu_freq.current:.2f}MHz" if cpu_freq else "Unknown"
+    current = sampler.current
+    if not current:
+        if sampler.error:
+            await message.edit(f"<b>System information is unavailable:</b> <code>{sampler.error}</code>")
+        else:
+            await message.edit("<b>System information is still being collected, try again in a few seconds.</b>")
+        return
     
-    # Memory info
-    memory = psutil.virtual_memory()
-    
-    # Disk info
-    disk = psutil.disk_usage("/")
+    cpu_freq_text = f"{current['cpu_freq']:.2f}MHz" if current["cpu_freq"] else "Unknown"
     
     # Uptime
-    uptime = datetime.now() - datetime.fromtimestamp(psutil.boot_time())
+    uptime = datetime.now() - datetime.fromtimestamp(sampler.static["boot_time"])
     
     info_text = f"""<b>System Information</b>
 
@@ -91,26 +132,64 @@ async def sysinfo_cmd(client: Client, message: Message):
 <b>OS:</b> <code>{platform.system()} {platform.release()}</code>
 
 <b>CPU:</b>
-  <b>Cores:</b> <code>{psutil.cpu_count(logical=False)}</code> Physical, <code>{psutil.cpu_count()}</code> Logical
-  <b>Usage:</b> <code>{psutil.cpu_percent()}%</code>
+  <b>Cores:</b> <code>{sampler.static['cpu_physical']}</code> Physical, <code>{sampler.static['cpu_logical']}</code> Logical
+  <b>Usage:</b> <code>{current['cpu']}%</code>
+  <b>Avg 1/5/15m:</b> <code>{format_summary(sampler.summary('cpu'))}</code>
   <b>Frequency:</b> <code>{cpu_freq_text}</code>
 
 <b>Memory:</b>
-  <b>Total:</b> <code>{memory.total / (1024**3):.2f} GB</code>
-  <b>Used:</b> <code>{memory.used / (1024**3):.2f} GB ({memory.percent}%)</code>
+  <b>Total:</b> <code>{current['memory_total'] / (1024**3):.2f} GB</code>
+  <b>Used:</b> <code>{current['memory_used'] / (1024**3):.2f} GB ({current['memory']}%)</code>
+  <b>Avg 1/5/15m:</b> <code>{format_summary(sampler.summary('memory'))}</code>
 
 <b>Disk:</b>
-  <b>Total:</b> <code>{disk.total / (1024**3):.2f} GB</code>
-  <b>Used:</b> <code>{disk.used / (1024**3):.2f} GB ({disk.percent}%)</code>
+  <b>Total:</b> <code>{current['disk_total'] / (1024**3):.2f} GB</code>
+  <b>Used:</b> <code>{current['disk_used'] / (1024**3):.2f} GB ({current['disk']}%)</code>
+
+<b>Network:</b>
+  <b>Sent:</b> <code>{current['net_sent'] / 1024:.1f} KB/s</code>, avg <code>{format_summary(sampler.summary('net_sent'), ' KB/s', 1024)}</code>
+  <b>Received:</b> <code>{current['net_recv'] / 1024:.1f} KB/s</code>, avg <code>{format_summary(sampler.summary('net_recv'), ' KB/s', 1024)}</code>
 
 <b>System Uptime:</b> <code>{str(uptime).split('.')[0]}</code>
 """
+    
+    if sampler.error:
+        age = time.time() - current["time"]
+        info_text += f"\n<b>⚠️ Sampling failing, data is {age:.0f}s old:</b> <code>{sampler.error}</code>\n"
+    
+    shards = read_shard_status()
+    if shards:
+        info_text += "\n<b>Shards:</b>\n"
+        for shard in shards["shards"]:
+            info_text += (
+                f"  <b>#{shard['shard']}</b> <code>{shard['health']}</code> "
+                f"pid <code>{shard.get('pid', '-')}</code>, "
+                f"<code>{', '.join(shard.get('accounts', []))}</code>, "
+                f"<code>{shard.get('rss', 0) / (1024**2):.0f} MB</code>, "
+                f"restarts <code>{shard['restarts']}</code>\n"
+            )
+    
+    downtimes = [entry["downtime"] for entry in await storage.get("core.startup", "downtime", [])]
+    if downtimes:
+        info_text += (
+            f"\n<b>Restart downtime:</b> last <code>{downtimes[-1]:.2f}s</code>, "
+            f"avg <code>{sum(downtimes) / len(downtimes):.2f}s</code> over {len(downtimes)}\n"
+        )
+    
+    last_start = await storage.get("core.startup", "last")
+    if last_start:
+        info_text += (
+            f"<b>Last startup:</b> <code>{last_start['total']:.2f}s</code> "
+            f"(<code>{format_stages(last_start['stages'])}</code>)\n"
+        )
+    
     await message.edit(info_text)
 
 
 modules_help["system"] = {
     "restart": "Restart the userbot",
-    "update": "Update the userbot from git repository",
+    "update": "Update the userbot from git repository, reloading only changed modules when possible",
+    "update --full": "Update and always do a full restart",
     "sysinfo": "Show system information",
     "neofetch": "Alias for sysinfo command",
     "__category__": "system"
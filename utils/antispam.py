@@ -0,0 +1,286 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from pyrogram import Client, filters
+from pyrogram.enums import ChatMembersFilter
+from pyrogram.errors import RPCError
+from pyrogram.types import ChatPermissions, Message
+
+from utils.misc import modules_help, prefix
+from utils.scripts import edit_or_reply
+from utils.offload import OffloadQueueFull, pool
+from utils.restrictions import ledger, telegram_expires
+from utils.storage import storage
+
+try:
+    from utils import spam_model
+except ImportError:
+    # numpy is optional: without it the module loads but never scores
+    spam_model = None
+
+log = logging.getLogger(__name__)
+
+ACTIONS = ("delete", "mute")
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_MUTE_SECONDS = 3600
+# Messages are scored together once this many arrive or the window passes
+BATCH_SIZE = 256
+BATCH_WINDOW = 0.05
+SCORE_TIMEOUT = 10
+TRAIN_TIMEOUT = 300
+# Fraction of low-scoring messages kept as ham samples for training
+HAM_SAMPLE_RATE = 0.05
+MAX_SAMPLES = 5000
+MIN_SPAM_SAMPLES = 10
+# How long a chat's admin list is trusted before it is fetched again
+ADMINS_TTL = 600
+
+settings = storage.namespace("core.antispam")
+
+
+class SpamFilter:
+    def __init__(self):
+        self.model = spam_model.SpamModel.load() if spam_model is not None else None
+        self.chats = set(settings.get_now("chats", []))
+        self.threshold = settings.get_now("threshold", DEFAULT_THRESHOLD)
+        self.action = settings.get_now("action", "delete")
+        self.scored = 0
+        self.flagged = 0
+        self._queue: List[Tuple[Client, Message]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._admins: Dict[int, Tuple[float, Set[int]]] = {}
+        self._samples_lock = asyncio.Lock()
+
+    def submit(self, client: Client, message: Message):
+        self._queue.append((client, message))
+        if len(self._queue) >= BATCH_SIZE:
+            self._schedule(0)
+        elif self._flush_handle is None:
+            self._schedule(BATCH_WINDOW)
+
+    def _schedule(self, delay: float):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, lambda: loop.create_task(self.flush()))
+
+    async def score(self, samples: list) -> List[float]:
+        """Featurize and score in the offload pool, which loads the saved model itself"""
+        try:
+            return await pool.run(spam_model.score_saved, samples, timeout=SCORE_TIMEOUT)
+        except Exception as e:
+            # flush() runs unobserved, so a failing pool would drop the batch;
+            # blocking the loop for one batch beats letting spam through
+            log.warning("Offloaded spam scoring failed (%s: %s), scoring inline", type(e).__name__, e)
+            return self.model.score(spam_model.featurize(samples)).tolist()
+
+    async def flush(self):
+        self._flush_handle = None
+        queue, self._queue = self._queue, []
+        if not queue:
+            return
+
+        samples = [message_sample(message) for _, message in queue]
+        if self.model is None:
+            # Nothing to score yet, only collect ham to train on
+            scores = [0.0] * len(samples)
+        else:
+            scores = await self.score(samples)
+            self.scored += len(queue)
+
+        ham = []
+        for (client, message), sample, score in zip(queue, samples, scores):
+            if score >= self.threshold:
+                self.flagged += 1
+                asyncio.get_running_loop().create_task(self.act(client, message, score))
+            # Only trusted senders count as ham: before a model exists nothing
+            # keeps spam out, and after it the model would learn its own misses
+            elif score < 0.5 and random.random() < HAM_SAMPLE_RATE and await self.trusted(client, message):
+                ham.append(sample._asdict())
+        if ham:
+            await self.add_samples("ham", ham)
+
+    async def add_samples(self, kind: str, samples: List[dict]):
+        """Append labelled samples, keeping only the newest MAX_SAMPLES"""
+        async with self._samples_lock:
+            current = await settings.get(kind, [])
+            await settings.set(kind, (current + samples)[-MAX_SAMPLES:])
+
+    async def admins(self, client: Client, chat_id: int) -> Set[int]:
+        cached = self._admins.get(chat_id)
+        if cached is None or time.monotonic() - cached[0] > ADMINS_TTL:
+            ids = set()
+            try:
+                async for member in client.get_chat_members(chat_id, filter=ChatMembersFilter.ADMINISTRATORS):
+                    ids.add(member.user.id)
+            except RPCError as e:
+                log.warning("Couldn't fetch admins of %s: %s", chat_id, e)
+            cached = self._admins[chat_id] = (time.monotonic(), ids)
+        return cached[1]
+
+    async def trusted(self, client: Client, message: Message) -> bool:
+        """Chat admins and contacts; anonymous admins post as the chat itself"""
+        if message.sender_chat is not None:
+            return message.sender_chat.id == message.chat.id
+        user = message.from_user
+        return user is not None and (bool(user.is_contact) or user.id in await self.admins(client, message.chat.id))
+
+    async def act(self, client: Client, message: Message, score: float):
+        try:
+            if await self.trusted(client, message):
+                return
+            await message.delete()
+            user = message.from_user
+            # Channels posting in the chat can only be deleted, not muted
+            if self.action == "mute" and user is not None:
+                duration = await settings.get("mute_seconds", DEFAULT_MUTE_SECONDS)
+                until_date = datetime.now() + timedelta(seconds=duration) if telegram_expires(duration) else datetime.fromtimestamp(0)
+                await client.restrict_chat_member(
+                    message.chat.id, user.id, ChatPermissions(can_send_messages=False), until_date
+                )
+                ledger.add(client.me.id, message.chat.id, user.id, "mute", duration,
+                           name=user.first_name, chat_title=message.chat.title,
+                           reason=f"antispam {score:.2f}")
+                ledger.ensure_running(client)
+        except RPCError as e:
+            log.warning("Antispam %s failed in %s: %s", self.action, message.chat.id, e)
+        except Exception:
+            log.exception("Antispam %s failed in %s", self.action, message.chat.id)
+
+
+spam_filter = SpamFilter()
+
+
+def message_sample(message: Message):
+    text = str(message.text or message.caption or "")
+    # Only the first MAX_TEXT characters are featurized, and samples are pickled to the pool
+    return spam_model.Sample(text[:spam_model.MAX_TEXT], message.from_user.id if message.from_user else 0)
+
+
+async def load_samples(kind: str) -> list:
+    return [spam_model.Sample(sample["text"], sample["user_id"]) for sample in await settings.get(kind, [])]
+
+
+async def antispam_filter(_, __, message: Message) -> bool:
+    return spam_model is not None and message.chat.id in spam_filter.chats and bool(message.text or message.caption)
+
+
+@Client.on_message(filters.group & filters.incoming & ~filters.me & filters.create(antispam_filter), group=20)
+async def antispam_watcher(client: Client, message: Message):
+    spam_filter.submit(client, message)
+
+
+@Client.on_message(filters.command("antispam", prefix) & filters.me)
+async def antispam_cmd(client: Client, message: Message):
+    """Configure, train and inspect the spam classifier"""
+    if spam_model is None:
+        await edit_or_reply(message, "<b>❌ Antispam needs numpy:</b> <code>pip install numpy</code>")
+        return
+
+    args = message.command[1:]
+    action = args[0].lower() if args else "status"
+
+    if action in ("on", "off"):
+        if action == "on":
+            spam_filter.chats.add(message.chat.id)
+        else:
+            spam_filter.chats.discard(message.chat.id)
+        await settings.set("chats", sorted(spam_filter.chats))
+        await edit_or_reply(message, f"<b>Antispam {'enabled' if action == 'on' else 'disabled'} in this chat.</b>")
+
+    elif action == "threshold" and len(args) > 1:
+        try:
+            threshold = float(args[1])
+        except ValueError:
+            threshold = -1
+        if not 0 < threshold < 1:
+            await edit_or_reply(message, "<b>❌ Threshold must be between 0 and 1.</b>")
+            return
+        spam_filter.threshold = threshold
+        await settings.set("threshold", threshold)
+        await edit_or_reply(message, f"<b>Spam threshold set to {threshold}.</b>")
+
+    elif action == "action" and len(args) > 1 and args[1].lower() in ACTIONS:
+        spam_filter.action = args[1].lower()
+        await settings.set("action", spam_filter.action)
+        await edit_or_reply(message, f"<b>Spam messages will now be handled with:</b> <code>{spam_filter.action}</code>")
+
+    elif action == "train":
+        spam, ham = await load_samples("spam"), await load_samples("ham")
+        # Drop ham from senders later banned for spam
+        spam_users = {sample.user_id for sample in spam}
+        ham = [sample for sample in ham if sample.user_id not in spam_users]
+        if len(spam) < MIN_SPAM_SAMPLES or not ham:
+            await edit_or_reply(
+                message,
+                f"<b>❌ Not enough samples:</b> {len(spam)} spam, {len(ham)} ham.\n"
+                f"Spam samples come from <code>{prefix}ban</code> used as a reply; at least {MIN_SPAM_SAMPLES} are needed.",
+            )
+            return
+        msg = await edit_or_reply(message, f"<b>Training on {len(spam)} spam and {len(ham)} ham messages...</b>")
+        started = time.perf_counter()
+        try:
+            model, accuracy = await pool.run(spam_model.train_model, spam, ham, timeout=TRAIN_TIMEOUT)
+            await asyncio.to_thread(model.save)
+        except OffloadQueueFull:
+            await msg.edit("<b>❌ The worker pool is busy, try again later.</b>")
+            return
+        except asyncio.TimeoutError:
+            await msg.edit(f"<b>❌ Training took longer than {TRAIN_TIMEOUT}s and was stopped.</b>")
+            return
+        except Exception as e:
+            log.exception("Antispam training failed")
+            await msg.edit(f"<b>❌ Training failed:</b> <code>{type(e).__name__}: {e}</code>")
+            return
+        spam_filter.model = model
+        await msg.edit(
+            f"<b>✅ Model trained in {time.perf_counter() - started:.1f}s</b>\n"
+            f"<b>Training accuracy:</b> {accuracy:.1%}"
+        )
+
+    elif action == "score":
+        replied = message.reply_to_message
+        if not replied or spam_filter.model is None:
+            await edit_or_reply(message, "<b>❌ Reply to a message, and train the model first.</b>")
+            return
+        score = float(spam_filter.model.score(spam_model.featurize([message_sample(replied)]))[0])
+        await edit_or_reply(message, f"<b>Spam score:</b> <code>{score:.3f}</code>")
+
+    elif action == "status":
+        spam, ham = await settings.get("spam", []), await settings.get("ham", [])
+        await edit_or_reply(
+            message,
+            f"<b>Antispam</b>\n\n"
+            f"<b>Model:</b> {'trained' if spam_filter.model is not None else 'not trained'}\n"
+            f"<b>This chat:</b> {'on' if message.chat.id in spam_filter.chats else 'off'} "
+            f"({len(spam_filter.chats)} chats total)\n"
+            f"<b>Threshold:</b> {spam_filter.threshold}, <b>action:</b> {spam_filter.action}\n"
+            f"<b>Samples:</b> {len(spam)} spam, {len(ham)} ham\n"
+            f"<b>Scored:</b> {spam_filter.scored}, <b>flagged:</b> {spam_filter.flagged}",
+        )
+
+    else:
+        await edit_or_reply(message, f"<b>Usage:</b> <code>{prefix}antispam on|off|train|score|status</code>")
+
+
+modules_help["antispam"] = {
+    "antispam on|off": "Score incoming messages in this chat (needs numpy)",
+    "antispam train": "Train the classifier on messages you banned for and sampled normal ones",
+    "antispam threshold [0-1]": "Spam probability above which messages are handled",
+    "antispam action [delete|mute]": "Delete spam, or delete it and mute the sender",
+    "antispam score": "Show the spam score of the replied message",
+    "antispam status": "Show settings, samples and counters",
+    "__category__": "admin"
+}
@@ -0,0 +1,334 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Union
+
+from pyrogram import Client, filters
+from pyrogram.errors import FloodWait, RPCError
+from pyrogram.types import Message
+
+from utils.misc import modules_help, prefix
+from utils.scripts import edit_or_reply
+from utils.startup import register_resume_job, register_shutdown_job
+from utils.storage import storage
+
+MODES = ("copy", "forward", "send")
+# Sends in flight at once
+CONCURRENCY = 4
+# Account-wide send rate; bursts up to BURST sends
+DEFAULT_RATE = 1.0
+BURST = 3
+# Minimum gap between two sends to the same chat
+PER_CHAT_INTERVAL = 3.0
+MAX_FLOOD_RETRIES = 3
+PROGRESS_INTERVAL = 3.0
+# How long a restart waits for sends already in flight
+SHUTDOWN_WAIT = 10.0
+
+broadcasts = storage.namespace("core.broadcast")
+
+ChatRef = Union[int, str]
+
+
+class TokenBucket:
+    """Async token bucket; a FloodWait pauses it for everyone"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+bucket = TokenBucket(broadcasts.get_now("rate", DEFAULT_RATE), BURST)
+_last_sent: Dict[ChatRef, float] = {}
+_running: Optional[asyncio.Task] = None
+# Set by a restart: workers finish their current send and take no new chats
+_stopping = asyncio.Event()
+
+
+def prune_last_sent():
+    """Forget chats whose per-chat gap has already passed"""
+    now = time.monotonic()
+    for chat in [chat for chat, sent in _last_sent.items() if now - sent >= PER_CHAT_INTERVAL]:
+        del _last_sent[chat]
+
+
+def parse_chat(value: str) -> ChatRef:
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+async def send_one(client: Client, job: dict, chat: ChatRef) -> int:
+    """Deliver the job's message to one chat and return the new message id"""
+    wait = _last_sent.get(chat, 0) + PER_CHAT_INTERVAL - time.monotonic()
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+    for attempt in range(MAX_FLOOD_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            if job["mode"] == "forward":
+                sent = await client.forward_messages(chat, job["source_chat"], job["source_id"])
+            elif job["mode"] == "copy":
+                sent = await client.copy_message(chat, job["source_chat"], job["source_id"])
+            else:
+                sent = await client.send_message(chat, job["text"])
+            _last_sent[chat] = time.monotonic()
+            return sent.id
+        except FloodWait as e:
+            job["flood_waits"] += 1
+            if attempt == MAX_FLOOD_RETRIES:
+                raise
+            bucket.pause(e.value + 1)
+
+
+def format_progress(job: dict) -> str:
+    results = job["results"]
+    sent = sum(1 for result in results.values() if result["ok"])
+    failed = len(results) - sent
+    elapsed = (job.get("finished") or time.time()) - job["started"]
+    rate = len(results) / elapsed if elapsed > 0 else 0
+
+    title = "✅ Broadcast finished" if job["status"] == "done" else f"📣 Broadcasting ({job['status']})"
+    text = (
+        f"<b>{title}</b>\n\n"
+        f"<b>List:</b> <code>{job['list']}</code> ({job['mode']})\n"
+        f"<b>Sent:</b> {sent}/{len(job['chats'])}\n"
+        f"<b>Failed:</b> {failed}\n"
+        f"<b>Flood waits:</b> {job['flood_waits']}\n"
+        f"<b>Elapsed:</b> {elapsed:.0f}s ({rate:.2f} chats/s)"
+    )
+    errors = Counter(result["error"] for result in results.values() if not result["ok"])
+    if errors:
+        text += "\n\n<b>Errors:</b>\n" + "\n".join(f"  <code>{error}</code>: {count}" for error, count in errors.most_common(5))
+    return text
+
+
+async def run_job(client: Client, job: dict):
+    """Send to every chat without a result yet, checkpointing after each one.
+
+    Checkpoints are flushed to the db right away, not left to the storage
+    write-behind, so a restart or crash can't resend to chats that already
+    got the message. Sends run at about one per second, so a flush per send
+    is cheap.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for chat in job["chats"]:
+        if str(chat) not in job["results"]:
+            queue.put_nowait(chat)
+
+    async def worker():
+        while not queue.empty() and not _stopping.is_set():
+            chat = queue.get_nowait()
+            try:
+                result = {"ok": True, "message_id": await send_one(client, job, chat)}
+            except Exception as e:
+                # Unknown peers raise ValueError or KeyError rather than an RPCError
+                result = {"ok": False, "error": type(e).__name__}
+            job["results"][str(chat)] = result
+            await broadcasts.set("job", dict(job, results=dict(job["results"])))
+            await storage.flush()
+
+    async def report():
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            prune_last_sent()
+            try:
+                await client.edit_message_text(job["status_chat"], job["status_id"], format_progress(job))
+            except RPCError:
+                pass
+
+    reporter = asyncio.get_running_loop().create_task(report())
+    try:
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        # A restart stopped the workers early; the job stays "running" to be resumed
+        if queue.empty():
+            job["status"] = "done"
+            job["finished"] = time.time()
+    except asyncio.CancelledError:
+        # A restart that couldn't wait leaves the job "running" to be resumed
+        if not _stopping.is_set():
+            job["status"] = "cancelled"
+        raise
+    finally:
+        reporter.cancel()
+        prune_last_sent()
+        await broadcasts.set("job", dict(job, results=dict(job["results"])))
+        await storage.flush()
+        try:
+            await client.edit_message_text(job["status_chat"], job["status_id"], format_progress(job))
+        except RPCError:
+            pass
+
+
+def start_job(client: Client, job: dict):
+    global _running
+    _stopping.clear()
+    _running = asyncio.get_running_loop().create_task(run_job(client, job))
+
+
+@register_shutdown_job
+async def stop_broadcast():
+    """Let sends in flight finish and checkpoint before a restart"""
+    if _running is None or _running.done():
+        return
+    _stopping.set()
+    try:
+        await asyncio.wait_for(asyncio.shield(_running), SHUTDOWN_WAIT)
+    except asyncio.TimeoutError:
+        _running.cancel()
+
+
+@register_resume_job
+async def resume_broadcast(client: Client):
+    """Carry on with a broadcast interrupted by a restart"""
+    job = await broadcasts.get("job")
+    if job and job["status"] == "running":
+        start_job(client, job)
+
+
+@Client.on_message(filters.command("bclist", prefix) & filters.me)
+async def bclist_cmd(client: Client, message: Message):
+    """Manage named chat lists for .broadcast"""
+    lists: Dict[str, List[ChatRef]] = await broadcasts.get("lists", {})
+    args = message.command[1:]
+
+    if not args:
+        if not lists:
+            await edit_or_reply(message, "<b>No broadcast lists yet.</b>")
+            return
+        text = "<b>Broadcast lists:</b>\n"
+        text += "\n".join(f"  <code>{name}</code>: {len(chats)} chats" for name, chats in sorted(lists.items()))
+        await edit_or_reply(message, text)
+        return
+
+    action, name = args[0].lower(), args[1] if len(args) > 1 else None
+    if action not in ("add", "remove", "show", "delete") or not name:
+        await edit_or_reply(message, f"<b>Usage:</b> <code>{prefix}bclist add|remove|show|delete [name] [chats...]</code>")
+        return
+
+    # Without explicit chats, add or remove the current one
+    chats = [parse_chat(value) for value in args[2:]] or [message.chat.id]
+    current = list(lists.get(name, []))
+
+    if action == "show":
+        if name not in lists:
+            await edit_or_reply(message, f"<b>❌ No list named</b> <code>{name}</code>")
+            return
+        await edit_or_reply(message, f"<b>{name}:</b>\n" + "\n".join(f"  <code>{chat}</code>" for chat in current))
+        return
+
+    if action == "delete":
+        lists = {key: value for key, value in lists.items() if key != name}
+    elif action == "add":
+        lists = {**lists, name: current + [chat for chat in chats if chat not in current]}
+    else:
+        lists = {**lists, name: [chat for chat in current if chat not in chats]}
+    await broadcasts.set("lists", lists)
+    await edit_or_reply(message, f"<b>✅ List</b> <code>{name}</code> <b>has {len(lists.get(name, []))} chats.</b>")
+
+
+@Client.on_message(filters.command("broadcast", prefix) & filters.me)
+async def broadcast_cmd(client: Client, message: Message):
+    """Send the replied message to every chat in a list"""
+    args = message.command[1:]
+    action = args[0].lower() if args else ""
+
+    if action == "status":
+        job = await broadcasts.get("job")
+        await edit_or_reply(message, format_progress(job) if job else "<b>No broadcasts yet.</b>")
+        return
+
+    if action == "cancel":
+        if _running is None or _running.done():
+            await edit_or_reply(message, "<b>No broadcast is running.</b>")
+            return
+        _running.cancel()
+        await edit_or_reply(message, "<b>Broadcast cancelled.</b>")
+        return
+
+    if _running is not None and not _running.done():
+        await edit_or_reply(message, f"<b>❌ A broadcast is already running, see</b> <code>{prefix}broadcast status</code>")
+        return
+
+    if action == "resume":
+        job = await broadcasts.get("job")
+        if not job or job["status"] == "done":
+            await edit_or_reply(message, "<b>Nothing to resume.</b>")
+            return
+        job = dict(job, status="running", results=dict(job["results"]))
+        start_job(client, job)
+        await edit_or_reply(message, "<b>Broadcast resumed.</b>")
+        return
+
+    replied = message.reply_to_message
+    if not replied:
+        await edit_or_reply(message, "<b>❌ Reply to the message to broadcast.</b>")
+        return
+
+    mode = args[1].lower() if len(args) > 1 else "copy"
+    lists = await broadcasts.get("lists", {})
+    if not args or args[0] not in lists or mode not in MODES:
+        await edit_or_reply(message, f"<b>Usage:</b> <code>{prefix}broadcast [list] [{'|'.join(MODES)}]</code> (reply to a message)")
+        return
+    if mode == "send" and not replied.text:
+        await edit_or_reply(message, "<b>❌ Only text messages can be sent, use copy for media.</b>")
+        return
+
+    msg = await edit_or_reply(message, "<b>📣 Starting broadcast...</b>")
+    job = {
+        "list": args[0],
+        "mode": mode,
+        "chats": lists[args[0]],
+        "source_chat": replied.chat.id,
+        "source_id": replied.id,
+        "text": replied.text.html if replied.text else None,
+        "status_chat": msg.chat.id,
+        "status_id": msg.id,
+        "status": "running",
+        "started": time.time(),
+        "finished": None,
+        "flood_waits": 0,
+        "results": {},
+    }
+    await broadcasts.set("job", job)
+    start_job(client, job)
+
+
+modules_help["broadcast"] = {
+    "bclist": "Show broadcast lists",
+    "bclist add|remove [name] [chats...]": "Add or remove chats (default: this chat) in a list",
+    "bclist show|delete [name]": "Show or delete a list",
+    "broadcast [list] [copy|forward|send]": "Send the replied message to every chat in the list",
+    "broadcast status": "Show progress and delivery stats of the last broadcast",
+    "broadcast resume": "Continue an interrupted broadcast",
+    "broadcast cancel": "Stop the running broadcast",
+    "__category__": "utils"
+}
@@ -0,0 +1,140 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import time
+
+from pyrogram import Client, filters
+from pyrogram.errors import FloodWait
+from pyrogram.types import Message
+
+from utils.misc import modules_help, prefix
+from utils.scripts import edit_or_reply
+from utils.history_stats import MEDIA_TYPES, ChatStats, Row
+from utils.storage import storage
+
+PROGRESS_EVERY = 5000
+# Partial results are saved this often so an interrupted scan can continue
+CHECKPOINT_EVERY = 5000
+
+
+def message_row(message: Message) -> Row:
+    sender = message.from_user or message.sender_chat
+    text = message.text or message.caption
+    return Row(
+        message.date.hour,
+        MEDIA_TYPES.index(message.media.value) if message.media else 0,
+        str(sender.id) if sender else None,
+        (getattr(sender, "first_name", None) or getattr(sender, "title", None) or str(sender.id)) if sender else None,
+        # Commands don't count towards the top words
+        str(text) if text and not text.startswith(prefix) else None,
+    )
+
+
+async def scan(client: Client, chat_id: int, stats: ChatStats, on_progress=None, on_checkpoint=None) -> int:
+    """Process messages newer than the checkpoint, newest first.
+
+    History is read newest first, so progress is kept as a pending range
+    that the next run continues from if this one is interrupted. Counting
+    a message takes a few microseconds, so it stays on the loop.
+    """
+    processed = 0
+
+    async def scan_range(pending: dict):
+        nonlocal processed
+        stats.pending = pending
+        async for message in client.get_chat_history(chat_id, offset_id=pending["resume_from"]):
+            if message.id <= pending["floor"]:
+                break
+            if pending["top"] is None:
+                pending["top"] = message.id
+            pending["resume_from"] = message.id
+            if message.empty or message.service:
+                continue
+            stats.add(message_row(message))
+            processed += 1
+            if on_progress and processed % PROGRESS_EVERY == 0:
+                await on_progress(processed)
+            if on_checkpoint and processed % CHECKPOINT_EVERY == 0:
+                on_checkpoint()
+        stats.last_id = max(stats.last_id, pending["top"] or 0)
+        stats.pending = None
+
+    # Finish an interrupted scan before looking at newer messages
+    if stats.pending:
+        await scan_range(stats.pending)
+    await scan_range({"top": None, "floor": stats.last_id, "resume_from": 0})
+    return processed
+
+
+@Client.on_message(filters.command("chatstats", prefix) & filters.me)
+async def chatstats_cmd(client: Client, message: Message):
+    """Show message statistics for the current chat"""
+    chat_id = message.chat.id
+    key = str(chat_id)
+
+    if len(message.command) > 1 and message.command[1].lower() == "reset":
+        await storage.delete("core.chatstats", key)
+        await edit_or_reply(message, "<b>✅ Chat statistics reset.</b>")
+        return
+
+    stats = ChatStats(await storage.get("core.chatstats", key))
+    first_run = stats.last_id == 0 and not stats.pending
+    msg = await edit_or_reply(
+        message,
+        "<b>⏳ Scanning full chat history, this may take a while...</b>" if first_run
+        else "<b>⏳ Scanning new messages...</b>",
+    )
+
+    async def on_progress(processed: int):
+        await msg.edit(f"<b>⏳ Scanned {processed} messages...</b>")
+
+    def save():
+        storage.set_nowait("core.chatstats", key, stats.to_state())
+
+    start = time.perf_counter()
+    try:
+        processed = await scan(client, chat_id, stats, on_progress, save)
+    except FloodWait as e:
+        await msg.edit(
+            f"<b>⏸ Scan paused by a {e.value}s flood wait, progress saved.</b>\n"
+            f"Run <code>{prefix}chatstats</code> again later to continue."
+        )
+        return
+    finally:
+        save()
+    elapsed = time.perf_counter() - start
+
+    text = f"<b>📈 Chat statistics</b> ({stats.total} messages)\n"
+    text += f"<i>Scanned {processed} new messages in {elapsed:.1f}s</i>\n\n"
+
+    text += "<b>Top users:</b>\n"
+    for user_id, count in stats.users.top(10):
+        text += f"  {stats.names.get(user_id, user_id)}: <code>{count}</code>\n"
+
+    peak = max(stats.hours) or 1
+    text += "\n<b>By hour:</b>\n<code>"
+    for hour, count in enumerate(stats.hours):
+        text += f"{hour:02d} {'█' * round(count / peak * 12):<12} {count}\n"
+    text += "</code>\n"
+
+    text += "<b>Media mix:</b>\n"
+    for media_type, count in sorted(zip(MEDIA_TYPES, stats.media), key=lambda item: -item[1]):
+        if count:
+            text += f"  {media_type}: <code>{count}</code> ({count / stats.total:.1%})\n"
+
+    text += "\n<b>Top words:</b> "
+    text += ", ".join(f"{word} ({count})" for word, count in stats.words.top(15))
+
+    await msg.edit(text)
+
+
+modules_help["chatstats"] = {
+    "chatstats": "Show messages per user, per hour, media mix and top words (only new messages are scanned after the first run; user and word counts are approximate in very large chats)",
+    "chatstats reset": "Drop the saved statistics for this chat",
+    "__category__": "utils"
+}
@@ -0,0 +1,83 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from utils.loader import ROOT_PATH, read_entries
+from utils.misc import gitrepo
+
+
+@dataclass(frozen=True)
+class GitSnapshot:
+    """Git and module file state captured once, rendered without touching git"""
+    branch: Optional[str]
+    commit: Optional[str]
+    commit_date: Optional[datetime]
+    message: Optional[str]
+    module_hashes: Tuple[Tuple[str, str], ...]
+    taken: float
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def take_snapshot() -> GitSnapshot:
+    """Read git metadata and hash module files; blocking, run it off the loop"""
+    try:
+        commit = gitrepo.head.commit
+        commit_sha = commit.hexsha
+        commit_date = datetime.fromtimestamp(commit.committed_date)
+        message = commit.message.strip()
+    except Exception:
+        commit_sha = commit_date = message = None
+
+    try:
+        branch = gitrepo.active_branch.name
+    except Exception:
+        branch = None
+
+    hashes = []
+    for name, path in read_entries():
+        try:
+            hashes.append((name, file_hash(os.path.join(ROOT_PATH, f"{path}.py"))))
+        except OSError:
+            hashes.append((name, "missing"))
+
+    return GitSnapshot(
+        branch=branch,
+        commit=commit_sha,
+        commit_date=commit_date,
+        message=message,
+        module_hashes=tuple(hashes),
+        taken=time.time(),
+    )
+
+
+_snapshot = take_snapshot()
+
+
+def get_snapshot() -> GitSnapshot:
+    return _snapshot
+
+
+async def refresh_snapshot() -> GitSnapshot:
+    """Re-read git metadata after the working tree changed"""
+    global _snapshot
+    _snapshot = await asyncio.to_thread(take_snapshot)
+    return _snapshot
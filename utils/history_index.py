@@ -0,0 +1,206 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import html
+import logging
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from utils.loader import ROOT_PATH
+
+log = logging.getLogger(__name__)
+
+INDEX_PATH = os.path.join(ROOT_PATH, "history_index.db")
+BATCH_SIZE = 500
+FLUSH_DELAY = 2.0
+# A batch that fails this many writes in a row is dropped
+MAX_WRITE_ATTEMPTS = 3
+
+TOKEN_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+
+class SearchResult(NamedTuple):
+    message_id: int
+    sender_id: int
+    date: int
+    snippet: str
+
+
+def table_name(chat_id: int) -> str:
+    """Each chat gets its own FTS5 table so searches never touch other chats"""
+    return f"chat_{str(chat_id).replace('-', 'n')}"
+
+
+def build_query(text: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match, trailing * means prefix"""
+    terms = []
+    for token in TOKEN_RE.findall(text):
+        word = token.rstrip("*")
+        terms.append(f'"{word}"*' if token.endswith("*") else f'"{word}"')
+    return " ".join(terms) or None
+
+
+class HistoryIndex:
+    """SQLite FTS5 index of chat messages with batched background writes.
+
+    All SQLite access happens on a single dedicated thread, so the event loop
+    never blocks on disk I/O and one connection can be reused safely.
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-index")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._tables = set()
+        self._pending: Dict[int, List[Tuple]] = {}
+        # Deleted message ids per chat; None collects ids without a known chat
+        self._deleted: Dict[Optional[int], List[int]] = {}
+        self._pending_count = 0
+        self._failures = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def _ensure_table(self, conn: sqlite3.Connection, chat_id: int) -> str:
+        name = table_name(chat_id)
+        if name not in self._tables:
+            conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} "
+                f"USING fts5(text, sender_id UNINDEXED, date UNINDEXED, tokenize='unicode61')"
+            )
+            self._tables.add(name)
+        return name
+
+    def _write(self, batches: Dict[int, List[Tuple]], deleted: Dict[Optional[int], List[int]]):
+        conn = self._connect()
+        with conn:
+            for chat_id, rows in batches.items():
+                name = self._ensure_table(conn, chat_id)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {name}(rowid, text, sender_id, date) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            if deleted:
+                existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            for chat_id, message_ids in deleted.items():
+                if chat_id is None:
+                    # Private chats and basic groups share one message id sequence,
+                    # so their deletions arrive without a chat
+                    names = [
+                        name for name in existing
+                        if re.fullmatch(r"chat_n?\d+", name) and not name.startswith("chat_n100")
+                    ]
+                else:
+                    names = [table_name(chat_id)] if table_name(chat_id) in existing else []
+                for name in names:
+                    conn.executemany(f"DELETE FROM {name} WHERE rowid = ?", [(message_id,) for message_id in message_ids])
+
+    def _search(self, chat_id: int, query: str, limit: int) -> List[SearchResult]:
+        conn = self._connect()
+        name = self._ensure_table(conn, chat_id)
+        rows = conn.execute(
+            f"SELECT rowid, sender_id, date, snippet({name}, 0, char(2), char(3), '…', 16) "
+            f"FROM {name} WHERE {name} MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit),
+        ).fetchall()
+        return [
+            SearchResult(
+                message_id, sender_id, date,
+                html.escape(snippet).replace("\x02", "<b>").replace("\x03", "</b>"),
+            )
+            for message_id, sender_id, date, snippet in rows
+        ]
+
+    def _count(self, chat_id: int) -> int:
+        conn = self._connect()
+        name = self._ensure_table(conn, chat_id)
+        return conn.execute(f"SELECT count(*) FROM {name}").fetchone()[0]
+
+    def _drop(self, chat_id: int):
+        conn = self._connect()
+        name = table_name(chat_id)
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {name}")
+        self._tables.discard(name)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def add(self, chat_id: int, message_id: int, text: str, sender_id: int, date: int):
+        """Queue a message for indexing; writes are flushed in batches"""
+        self._pending.setdefault(chat_id, []).append((message_id, text, sender_id, date))
+        self._pending_count += 1
+        if self._pending_count >= BATCH_SIZE:
+            asyncio.get_running_loop().create_task(self.flush())
+        else:
+            self._schedule_flush()
+
+    def remove(self, chat_id: Optional[int], message_ids: List[int]):
+        """Queue deleted messages for removal; chat_id None searches private chats and basic groups"""
+        self._deleted.setdefault(chat_id, []).extend(message_ids)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(FLUSH_DELAY, lambda: loop.create_task(self.flush()))
+
+    async def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending and not self._deleted:
+            return
+        batches, self._pending, self._pending_count = self._pending, {}, 0
+        deleted, self._deleted = self._deleted, {}
+        try:
+            await self._run(self._write, batches, deleted)
+        except Exception:
+            self._failures += 1
+            if self._failures >= MAX_WRITE_ATTEMPTS:
+                log.exception("Dropping %d index rows after %d failed writes",
+                              sum(map(len, batches.values())), self._failures)
+                self._failures = 0
+                return
+            log.exception("Index write failed, retrying")
+            # Put the batch back in front of anything queued meanwhile
+            for chat_id, rows in batches.items():
+                self._pending[chat_id] = rows + self._pending.get(chat_id, [])
+                self._pending_count += len(rows)
+            for chat_id, message_ids in deleted.items():
+                self._deleted.setdefault(chat_id, []).extend(message_ids)
+            self._schedule_flush()
+        else:
+            self._failures = 0
+
+    async def search(self, chat_id: int, text: str, limit: int = 20) -> List[SearchResult]:
+        query = build_query(text)
+        if query is None:
+            return []
+        await self.flush()
+        return await self._run(self._search, chat_id, query, limit)
+
+    async def count(self, chat_id: int) -> int:
+        await self.flush()
+        return await self._run(self._count, chat_id)
+
+    async def drop(self, chat_id: int):
+        self._pending_count -= len(self._pending.pop(chat_id, []))
+        await self._run(self._drop, chat_id)
+
+
+history_index = HistoryIndex()
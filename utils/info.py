@@ -7,13 +7,16 @@
 #  (at your option) any later version.
 
 import datetime
+import os
 import platform
 import sys
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
-from utils.misc import modules_help, prefix, python_version, userbot_version, gitrepo
+from utils.misc import modules_help, prefix, python_version, userbot_version
 from utils.scripts import edit_or_reply
+from utils.gitinfo import get_snapshot
+from utils.supervisor import current_shard, read_shard_status
 
 
 @Client.on_message(filters.command(["about", "info"], prefix) & filters.me)
@@ -36,28 +39,39 @@ async def about(client: Client, message: Message):
 @Client.on_message(filters.command("botinfo", prefix) & filters.me)
 async def botinfo(client: Client, message: Message):
     """Show technical information about the userbot"""
-    # Get git info
-    try:
-        last_commit = gitrepo.head.commit
-        commit_time = datetime.datetime.fromtimestamp(last_commit.committed_date)
-        commit_time_str = commit_time.strftime("%Y-%m-%d %H:%M:%S")
-        branch_name = gitrepo.active_branch.name
-        
+    # Git info is snapshotted at startup and refreshed by .update
+    snapshot = get_snapshot()
+    if snapshot.commit:
         git_info = (
-            f"<b>• Branch:</b> <code>{branch_name}</code>\n"
-            f"<b>• Last commit:</b> <code>{last_commit.hexsha[:7]}</code>\n"
-            f"<b>• Commit date:</b> <code>{commit_time_str}</code>\n"
-            f"<b>• Commit msg:</b> <code>{last_commit.message.strip()}</code>\n"
+            f"<b>• Branch:</b> <code>{snapshot.branch or 'detached'}</code>\n"
+            f"<b>• Last commit:</b> <code>{snapshot.commit[:7]}</code>\n"
+            f"<b>• Commit date:</b> <code>{snapshot.commit_date.strftime('%Y-%m-%d %H:%M:%S')}</code>\n"
+            f"<b>• Commit msg:</b> <code>{snapshot.message}</code>\n"
         )
-    except Exception:
+    else:
         git_info = "<b>• Git info:</b> <code>Not available</code>\n"
     
+    module_info = "".join(
+        f"  <code>{name}</code>: <code>{digest}</code>\n" for name, digest in snapshot.module_hashes
+    )
+    
+    shard_info = ""
+    shards = read_shard_status()
+    if shards:
+        healthy = sum(1 for shard in shards["shards"] if shard["health"] == "ok")
+        shard_info = (
+            f"<b>• Shard:</b> <code>{current_shard()}</code> "
+            f"(<code>{healthy}/{len(shards['shards'])}</code> healthy)\n"
+        )
+    
     await message.edit(
         f"<b>🔧 CybroX-UserBot Technical Info</b>\n\n"
         f"<b>• Python version:</b> <code>{sys.version}</code>\n"
         f"<b>• Executable:</b> <code>{sys.executable}</code>\n"
-        f"<b>• Process ID:</b> <code>{os.getpid()}</code>\n\n"
+        f"<b>• Process ID:</b> <code>{os.getpid()}</code>\n"
+        f"{shard_info}\n"
         f"{git_info}\n"
+        f"<b>• Module hashes:</b>\n{module_info}\n"
         f"<b>• Device model:</b> <code>{client.device_model}</code>\n"
         f"<b>• System version:</b> <code>{client.system_version}</code>\n"
         f"<b>• App version:</b> <code>{client.app_version}</code>"
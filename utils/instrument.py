@@ -0,0 +1,225 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Middleware hooks around handler callbacks and outbound Telegram calls.
+
+Handler middlewares are called as
+``await mw(call_next, client, update, name, is_command)`` and invoke
+middlewares as ``await mw(call_next, client, query)``; both must return
+``await call_next()``. is_command comes from the handler's filters, since
+``update.command`` is left behind by whichever command filter ran last and
+is also set when a passive handler sees a command message.
+
+span(name) times a block of code, e.g. a storage access, as a child of the
+current trace when a tracer is registered with set_span_factory; handlers
+wait with sleep() so their pauses show up in traces as well.
+
+FloodWaits under the client's sleep_threshold, which pyrogram would sleep
+through inside Session.invoke, are waited out here instead, so each one
+passes through the invoke middlewares as an exception before the retry.
+"""
+
+import asyncio
+import contextlib
+import functools
+import inspect
+import logging
+import threading
+from typing import Callable, ContextManager, FrozenSet, List, Optional
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from pyrogram.session import Session
+
+log = logging.getLogger(__name__)
+
+_handler_middlewares: List[Callable] = []
+_invoke_middlewares: List[Callable] = []
+_client_hooks: List[Callable] = []
+_seen_clients = {}
+_installed = False
+# Modules calling install() are imported from several threads at startup
+_install_lock = threading.Lock()
+_span_factory: Optional[Callable[[str], ContextManager]] = None
+
+
+def _hook_key(func: Callable) -> Optional[tuple]:
+    qualname = getattr(func, "__qualname__", None)
+    if qualname is None or "<lambda>" in qualname:
+        return None
+    return func.__module__, qualname
+
+
+def register(registry: list, func: Callable, first: bool = False):
+    """Add func to a hook registry, replacing the entry a previous import of its module added.
+
+    Entries are keyed by module and qualified name, so reloading a module
+    swaps its hooks in place instead of registering them twice.
+    """
+    key = _hook_key(func)
+    # Lambdas all share one name, they are always added
+    if key is not None:
+        for index, existing in enumerate(registry):
+            if _hook_key(existing) == key:
+                registry[index] = func
+                return
+    if first:
+        registry.insert(0, func)
+    else:
+        registry.append(func)
+
+
+def add_handler_middleware(middleware: Callable, outermost: bool = False):
+    """Register a handler middleware; outermost ones run before all others"""
+    register(_handler_middlewares, middleware, first=outermost)
+
+
+def add_invoke_middleware(middleware: Callable):
+    register(_invoke_middlewares, middleware)
+
+
+def set_span_factory(factory: Callable[[str], ContextManager]):
+    global _span_factory
+    _span_factory = factory
+
+
+def span(name: str) -> ContextManager:
+    """Time the block as a span of the current trace, if one is active"""
+    if _span_factory is None:
+        return contextlib.nullcontext()
+    return _span_factory(name)
+
+
+async def sleep(seconds: float, reason: str = "sleep"):
+    """asyncio.sleep recorded as a span, e.g. reason="floodwait" for a FloodWait pause"""
+    with span(f"{reason} {seconds:g}s"):
+        await asyncio.sleep(seconds)
+
+
+def on_client(hook: Callable):
+    """Run hook(client) once for every client, from inside its event loop"""
+    register(_client_hooks, hook)
+    for client in list(_seen_clients.values()):
+        hook(client)
+
+
+def handler_commands(flt) -> FrozenSet[str]:
+    """Commands a handler's filter can match, empty for non-command handlers"""
+    commands = set()
+    stack = [flt]
+    while stack:
+        flt = stack.pop()
+        if flt is None:
+            continue
+        if type(flt).__name__ == "CommandFilter":
+            commands.update(flt.commands)
+        # AndFilter/OrFilter keep base and other, InvertFilter only base
+        stack.extend(getattr(flt, attr, None) for attr in ("base", "other"))
+    return frozenset(commands)
+
+
+def command_name(update, callback: Callable, commands: FrozenSet[str]) -> str:
+    """Name a handler invocation by its command, falling back to the callback name"""
+    if not commands:
+        return callback.__name__
+    command = getattr(update, "command", None)
+    if command and command[0].lower() in commands:
+        return command[0].lower()
+    return min(commands)
+
+
+async def _run_chain(middlewares: list, final: Callable, *args):
+    async def call(index: int):
+        if index == len(middlewares):
+            return await final()
+        return await middlewares[index](lambda: call(index + 1), *args)
+
+    return await call(0)
+
+
+def wrap_handler(handler):
+    """Wrap a handler's coroutine callback with the handler middlewares"""
+    callback = handler.callback
+    if getattr(callback, "__instrumented__", False) or not inspect.iscoroutinefunction(callback):
+        return
+    commands = handler_commands(getattr(handler, "filters", None))
+
+    @functools.wraps(callback)
+    async def wrapper(client, update, *args):
+        if not _handler_middlewares:
+            return await callback(client, update, *args)
+        return await _run_chain(
+            _handler_middlewares,
+            lambda: callback(client, update, *args),
+            client, update, command_name(update, callback, commands), bool(commands),
+        )
+
+    wrapper.__instrumented__ = True
+    handler.callback = wrapper
+
+
+def _instrument_client(client: Client):
+    if id(client) in _seen_clients:
+        return
+    _seen_clients[id(client)] = client
+
+    # Handlers registered before install() went straight into the dispatcher
+    for handlers in client.dispatcher.groups.values():
+        for handler in handlers:
+            wrap_handler(handler)
+
+    for hook in _client_hooks:
+        hook(client)
+
+
+def install():
+    """Patch Client so every handler and outbound call goes through the middlewares"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        _installed = True
+        _patch_client()
+
+
+def _patch_client():
+    original_add_handler = Client.add_handler
+    original_invoke = Client.invoke
+
+    @functools.wraps(original_add_handler)
+    def add_handler(self, handler, group: int = 0):
+        wrap_handler(handler)
+        return original_add_handler(self, handler, group)
+
+    @functools.wraps(original_invoke)
+    async def invoke(
+        self, query, retries: int = Session.MAX_RETRIES, timeout: float = Session.WAIT_TIMEOUT,
+        sleep_threshold: float = None,
+    ):
+        if id(self) not in _seen_clients:
+            _instrument_client(self)
+        if not _invoke_middlewares:
+            return await original_invoke(self, query, retries, timeout, sleep_threshold)
+
+        threshold = self.sleep_threshold if sleep_threshold is None else sleep_threshold
+        while True:
+            try:
+                return await _run_chain(
+                    _invoke_middlewares,
+                    lambda: original_invoke(self, query, retries, timeout, 0),
+                    self, query,
+                )
+            except FloodWait as e:
+                # Same rule as Session.invoke: a negative threshold always waits
+                if e.value > threshold >= 0:
+                    raise
+                log.warning("[%s] Waiting for %s seconds before retrying %s", self.name, e.value, type(query).__name__)
+                await sleep(e.value, "floodwait")
+
+    Client.add_handler = add_handler
+    Client.invoke = invoke
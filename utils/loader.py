@@ -0,0 +1,96 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import importlib
+import os
+import sys
+from typing import Iterable, List, Tuple
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+MODULES_LIST = os.path.join(ROOT_PATH, "full.txt")
+
+# Changed files with these suffixes never require a reload
+IGNORED_SUFFIXES = (".md", ".txt", ".jsonl")
+# Process-wide hooks can't be unregistered, so modules adding them are never reloaded in place
+PROCESS_HOOKS = ("atexit.register", "register_at_fork")
+
+
+def read_entries(path: str = MODULES_LIST) -> List[Tuple[str, str]]:
+    """Return (name, path) pairs listed in full.txt"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2:
+                entries.append((parts[0], parts[1]))
+    return entries
+
+
+def import_path(entry_path: str) -> str:
+    """Convert a full.txt path (e.g. admin/admin) to a dotted module path"""
+    return entry_path.strip("/").replace("/", ".")
+
+
+def module_handlers(module) -> list:
+    """Collect (handler, group) pairs registered by module-level decorators"""
+    handlers = []
+    seen = set()
+    for value in vars(module).values():
+        for handler in getattr(value, "handlers", None) or []:
+            if isinstance(handler, tuple) and id(handler[0]) not in seen:
+                seen.add(id(handler[0]))
+                handlers.append(handler)
+    return handlers
+
+
+def registers_process_hooks(path: str) -> bool:
+    try:
+        with open(os.path.join(ROOT_PATH, path), encoding="utf-8") as f:
+            source = f.read()
+    except OSError:
+        return True
+    return any(hook in source for hook in PROCESS_HOOKS)
+
+
+def plan_reload(changed_files: Iterable[str], entries: List[Tuple[str, str]] = None) -> Tuple[List[str], bool]:
+    """Map files changed by an update to modules to reload.
+
+    Returns the dotted paths of modules to reload and whether a full restart
+    is needed because something other than a listed module changed, or a
+    changed module registers atexit or fork hooks.
+    """
+    if entries is None:
+        entries = read_entries()
+    module_files = {f"{path.strip('/')}.py": import_path(path) for _, path in entries}
+
+    to_reload = []
+    needs_restart = False
+    for changed in changed_files:
+        changed = changed.strip()
+        if not changed:
+            continue
+        if changed in module_files and not registers_process_hooks(changed):
+            to_reload.append(module_files[changed])
+        elif changed == "full.txt" or not changed.endswith(IGNORED_SUFFIXES):
+            needs_restart = True
+    return to_reload, needs_restart
+
+
+def reload_module(client, name: str):
+    """Re-import a module and swap its handlers on a running client"""
+    module = sys.modules.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+    else:
+        for handler, group in module_handlers(module):
+            client.remove_handler(handler, group)
+        module = importlib.reload(module)
+
+    for handler, group in module_handlers(module):
+        client.add_handler(handler, group)
+    return module
@@ -0,0 +1,207 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import psutil
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+
+from utils import instrument
+from utils.storage import storage
+from utils.sysmetrics import RingBuffer
+
+# Latency samples kept per command for percentile estimates
+HISTORY_SIZE = 1024
+LAG_INTERVAL = 0.5
+DEFAULT_PORT = 9464
+
+
+class CommandStats:
+    def __init__(self):
+        self.latency = RingBuffer(HISTORY_SIZE)
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    def record(self, elapsed: float, failed: bool):
+        self.latency.append(elapsed)
+        self.count += 1
+        self.total_time += elapsed
+        if failed:
+            self.errors += 1
+
+    def quantiles(self) -> dict:
+        return {q: self.latency.percentile(q) for q in (50, 95, 99)}
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.commands: Dict[str, CommandStats] = {}
+        self.rpc_counts = Counter()
+        self.rpc_errors = Counter()
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+        self.loop_lag = RingBuffer(int(300 / LAG_INTERVAL))
+        self.loop_lag_max = 0.0
+        self.process = psutil.Process()
+        self.process.cpu_percent(interval=None)
+        self._lag_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def command(self, name: str) -> CommandStats:
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        return stats
+
+    async def handler_middleware(self, call_next, client, update, name, is_command):
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await call_next()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.command(name).record(time.perf_counter() - start, failed)
+
+    async def invoke_middleware(self, call_next, client, query):
+        # Includes FloodWaits instrument waits out and retries on pyrogram's behalf
+        method = type(query).__name__
+        self.rpc_counts[method] += 1
+        try:
+            return await call_next()
+        except FloodWait as e:
+            self.flood_waits += 1
+            self.flood_wait_seconds += e.value
+            self.rpc_errors[method] += 1
+            raise
+        except Exception:
+            self.rpc_errors[method] += 1
+            raise
+
+    async def _measure_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = max(loop.time() - start - LAG_INTERVAL, 0.0)
+            self.loop_lag.append(lag)
+            self.loop_lag_max = max(self.loop_lag_max, lag)
+
+    def on_client(self, client: Client):
+        # Hooks can run from a startup import thread, outside the client's loop
+        client.loop.call_soon_threadsafe(self.start, client)
+
+    def start(self, client: Client):
+        """Start the loop lag probe and the Prometheus exporter"""
+        if self._lag_task is None:
+            self._lag_task = asyncio.get_running_loop().create_task(self._measure_lag())
+            port = storage.get_now("core.metrics", "port", DEFAULT_PORT)
+            if port:
+                asyncio.get_running_loop().create_task(self.serve(port))
+
+    def process_stats(self) -> dict:
+        with self.process.oneshot():
+            return {
+                "rss": self.process.memory_info().rss,
+                "cpu": self.process.cpu_percent(interval=None),
+                "threads": self.process.num_threads(),
+            }
+
+    def render_prometheus(self, process: dict) -> str:
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP cybrox_{name} {help_text}")
+            lines.append(f"# TYPE cybrox_{name} {kind}")
+
+        metric("handler_latency_seconds", "summary", "Command handler latency")
+        for name, stats in sorted(self.commands.items()):
+            for q, value in stats.quantiles().items():
+                if value is not None:
+                    lines.append(
+                        f'cybrox_handler_latency_seconds{{command="{name}",quantile="{q / 100}"}} {value:.6f}'
+                    )
+            lines.append(f'cybrox_handler_latency_seconds_sum{{command="{name}"}} {stats.total_time:.6f}')
+            lines.append(f'cybrox_handler_latency_seconds_count{{command="{name}"}} {stats.count}')
+
+        metric("handler_errors_total", "counter", "Command handlers that raised")
+        for name, stats in sorted(self.commands.items()):
+            lines.append(f'cybrox_handler_errors_total{{command="{name}"}} {stats.errors}')
+
+        metric("rpc_calls_total", "counter", "Outbound Telegram API calls by method")
+        for method, count in sorted(self.rpc_counts.items()):
+            lines.append(f'cybrox_rpc_calls_total{{method="{method}"}} {count}')
+
+        metric("rpc_errors_total", "counter", "Failed outbound Telegram API calls by method")
+        for method, count in sorted(self.rpc_errors.items()):
+            lines.append(f'cybrox_rpc_errors_total{{method="{method}"}} {count}')
+
+        metric("flood_waits_total", "counter", "FloodWait errors received, including ones waited out")
+        lines.append(f"cybrox_flood_waits_total {self.flood_waits}")
+        metric("flood_wait_seconds_total", "counter", "Seconds requested by FloodWait errors")
+        lines.append(f"cybrox_flood_wait_seconds_total {self.flood_wait_seconds}")
+
+        metric("event_loop_lag_seconds", "gauge", "Latest event loop scheduling lag")
+        lines.append(f"cybrox_event_loop_lag_seconds {self.loop_lag.latest() or 0.0:.6f}")
+        metric("event_loop_lag_max_seconds", "gauge", "Highest event loop lag observed")
+        lines.append(f"cybrox_event_loop_lag_max_seconds {self.loop_lag_max:.6f}")
+
+        metric("process_resident_memory_bytes", "gauge", "Resident memory size")
+        lines.append(f"cybrox_process_resident_memory_bytes {process['rss']}")
+        metric("process_cpu_percent", "gauge", "Process CPU usage")
+        lines.append(f"cybrox_process_cpu_percent {process['cpu']}")
+        metric("uptime_seconds", "gauge", "Seconds since metrics started")
+        lines.append(f"cybrox_uptime_seconds {time.time() - self.started:.0f}")
+
+        return "\n".join(lines) + "\n"
+
+    async def _handle_scrape(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            # psutil reads /proc, keep it off the event loop
+            process = await asyncio.to_thread(self.process_stats)
+            body = self.render_prometheus(process).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port: int):
+        """Export metrics in Prometheus text format on localhost"""
+        try:
+            self._server = await asyncio.start_server(self._handle_scrape, "127.0.0.1", port)
+        except OSError:
+            self._server = None
+
+    @property
+    def exporter_port(self) -> Optional[int]:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+
+metrics = Metrics()
+
+instrument.add_handler_middleware(metrics.handler_middleware)
+instrument.add_invoke_middleware(metrics.invoke_middleware)
+instrument.on_client(metrics.on_client)
+instrument.install()
@@ -1,11 +1,156 @@
 # Custom module for CybroX-UserBot
 import asyncio
+import bisect
+import html
+import itertools
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
+from utils import instrument
 from utils.misc import modules_help, prefix
 from utils.scripts import edit_or_reply, with_reply
-from utils.db import db
+from utils.storage import storage
+
+# Names per .notes page
+PAGE_SIZE = 100
+# Room left for the header and footer of a .notes page
+PAGE_CHARS = 3800
+# Lines parsed per batch during .notes import
+IMPORT_BATCH = 1000
+IMPORT_POLICIES = ("skip", "overwrite", "rename")
+PROGRESS_INTERVAL = 2.0
+
+
+class NotesStore:
+    """In-memory notes with a sorted name index, persisted through utils.storage.
+
+    Media notes only keep a file_unique_id; the Telegram file_id it maps to is
+    shared between notes and reference counted so deleting a note frees it.
+    """
+
+    collection = "core.notes"
+    media_collection = "core.notes.media"
+
+    def __init__(self):
+        self.notes: Dict[str, dict] = storage.load_collection(self.collection)
+        self.media: Dict[str, dict] = storage.load_collection(self.media_collection)
+        self.names: List[str] = sorted(self.notes)
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.notes.get(name)
+
+    def get_media(self, note: dict) -> Optional[dict]:
+        return self.media.get(note.get("media"))
+
+    def set(self, name: str, note: dict, media: Optional[dict] = None):
+        """Store a note; media is a {file_unique_id, file_id, type} reference"""
+        if media is not None:
+            self._ref_media(media)
+            note["media"] = media["file_unique_id"]
+
+        old = self.notes.get(name)
+        if old is None:
+            bisect.insort(self.names, name)
+        elif old.get("media"):
+            self._unref_media(old["media"])
+
+        self.notes[name] = note
+        self._mark_dirty(self.collection, name)
+
+    def delete(self, name: str) -> Optional[dict]:
+        note = self.notes.pop(name, None)
+        if note is not None:
+            del self.names[bisect.bisect_left(self.names, name)]
+            if note.get("media"):
+                self._unref_media(note["media"])
+            self._mark_dirty(self.collection, name)
+        return note
+
+    def _ref_media(self, media: dict):
+        unique_id = media["file_unique_id"]
+        entry = self.media.get(unique_id)
+        if entry is None:
+            entry = self.media[unique_id] = {"file_id": media["file_id"], "type": media["type"], "refs": 0}
+        entry["refs"] += 1
+        self._mark_dirty(self.media_collection, unique_id)
+
+    def _unref_media(self, unique_id: str):
+        entry = self.media.get(unique_id)
+        if entry is None:
+            return
+        entry["refs"] -= 1
+        if entry["refs"] <= 0:
+            del self.media[unique_id]
+        self._mark_dirty(self.media_collection, unique_id)
+
+    def with_prefix(self, name_prefix: str, limit: int = PAGE_SIZE, offset: int = 0) -> List[str]:
+        """Names starting with name_prefix in sorted order, O(log n + k)"""
+        start = bisect.bisect_left(self.names, name_prefix) + offset
+        result = []
+        for name in self.names[start:start + limit]:
+            if not name.startswith(name_prefix):
+                break
+            result.append(name)
+        return result
+
+    def count_prefix(self, name_prefix: str) -> int:
+        if not name_prefix:
+            return len(self.names)
+        # "\U0010ffff" sorts after every character a name can continue with
+        end = bisect.bisect_left(self.names, name_prefix + "\U0010ffff")
+        return end - bisect.bisect_left(self.names, name_prefix)
+
+    def _mark_dirty(self, collection: str, key: str):
+        # Storage coalesces the writes and flushes them from its own thread
+        value = (self.notes if collection == self.collection else self.media).get(key)
+        if value is None:
+            storage.delete_nowait(collection, key)
+        else:
+            # Copied because media reference counts keep changing on the loop
+            storage.set_nowait(collection, key, dict(value))
+
+
+store = NotesStore()
+
+
+def note_name(raw: str) -> str:
+    return raw.lower().lstrip("#")
+
+
+def media_reference(message: Message) -> Optional[dict]:
+    """Telegram file reference of a message's media, if it has a downloadable file"""
+    if not message.media:
+        return None
+    media = getattr(message, message.media.value, None)
+    if media is None or not hasattr(media, "file_id"):
+        return None
+    return {"file_unique_id": media.file_unique_id, "file_id": media.file_id, "type": message.media.value}
+
+
+async def send_note(client: Client, message: Message, name: str, note: dict):
+    media = store.get_media(note)
+    if media is None:
+        await edit_or_reply(message, note["text"])
+        return
+    
+    # Media is sent by file_id, so nothing is downloaded or uploaded again
+    replied = message.reply_to_message
+    await client.send_cached_media(
+        message.chat.id,
+        media["file_id"],
+        caption=note["text"] or None,
+        reply_to_message_id=replied.id if replied else None,
+    )
+    await message.delete()
 
 
 @Client.on_message(filters.command("save", prefix) & filters.me)
@@ -13,36 +158,257 @@ async def save_note(client: Client, message: Message):
     """Save a note"""
     if len(message.command) < 2:
         await edit_or_reply(message, "<b>Not enough arguments!</b>\nUsage: .save [name] [content or reply]")
-        await asyncio.sleep(3)
+        await instrument.sleep(3)
         await message.delete()
         return
     
-    # Rest of your existing save_note function...
+    name = note_name(message.command[1])
+    replied = message.reply_to_message
+    
+    media = media_reference(replied) if replied else None
+    
+    if len(message.command) > 2:
+        # Keep the original formatting of everything after the name
+        text = message.text.html.split(maxsplit=2)[2]
+    elif replied and (replied.text or replied.caption):
+        text = (replied.text or replied.caption).html
+    elif media:
+        text = ""
+    else:
+        await edit_or_reply(message, "<b>Nothing to save!</b> Add text or reply to a message.")
+        return
+    
+    existed = store.get(name) is not None
+    store.set(name, {"text": text, "created": time.time()}, media)
+    
+    await edit_or_reply(
+        message,
+        f"<b>✅ Note</b> <code>{name}</code> <b>{'updated' if existed else 'saved'}!</b>"
+    )
 
 
 @Client.on_message(filters.command("get", prefix) & filters.me)
 async def get_note(client: Client, message: Message):
     """Retrieve a saved note"""
-    # Your existing get_note function...
+    if len(message.command) < 2:
+        await edit_or_reply(message, "<b>Usage:</b> <code>.get [name]</code>")
+        return
+    
+    name = note_name(message.command[1])
+    note = store.get(name)
+    if note is None:
+        await edit_or_reply(message, f"<b>❌ Note</b> <code>{name}</code> <b>not found!</b>")
+        return
+    
+    await send_note(client, message, name, note)
+
+
+@Client.on_message(filters.me & filters.regex(r"^#[\w-]+$"))
+async def hashtag_note(client: Client, message: Message):
+    """Send a note with #name shorthand"""
+    name = note_name(message.text)
+    note = store.get(name)
+    if note is not None:
+        await send_note(client, message, name, note)
+
+
+def write_export(path: str, names: List[str]) -> int:
+    """Write notes as JSON lines, one note at a time"""
+    with open(path, "w", encoding="utf-8") as f:
+        for name in names:
+            note = store.get(name)
+            if note is None:
+                continue
+            record = {"name": name, "text": note["text"], "created": note.get("created")}
+            media = store.get_media(note)
+            if media:
+                record["media"] = {"file_unique_id": note["media"], "file_id": media["file_id"], "type": media["type"]}
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+    return len(names)
+
+
+def read_batch(f) -> List[dict]:
+    records = []
+    for line in itertools.islice(f, IMPORT_BATCH):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            records.append(None)
+    return records
+
+
+def free_name(name: str) -> str:
+    suffix = 2
+    while store.get(f"{name}_{suffix}") is not None:
+        suffix += 1
+    return f"{name}_{suffix}"
+
+
+async def export_notes(client: Client, message: Message):
+    if not len(store):
+        await edit_or_reply(message, "<b>No notes saved!</b>")
+        return
+    
+    msg = await edit_or_reply(message, "<b>⏳ Exporting notes...</b>")
+    fd, path = tempfile.mkstemp(prefix="notes_", suffix=".jsonl")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        count = await asyncio.to_thread(write_export, path, list(store.names))
+        await client.send_document(
+            message.chat.id,
+            path,
+            file_name="notes.jsonl",
+            caption=f"<b>📝 {count} notes exported in {time.perf_counter() - start:.1f}s</b>",
+        )
+        await msg.delete()
+    finally:
+        os.remove(path)
+
+
+async def import_notes(client: Client, message: Message):
+    replied = message.reply_to_message
+    policy = message.command[2].lower() if len(message.command) > 2 else "skip"
+    if not replied or not replied.document or policy not in IMPORT_POLICIES:
+        await edit_or_reply(
+            message,
+            f"<b>Usage:</b> reply to a .jsonl file with <code>.notes import [{'|'.join(IMPORT_POLICIES)}]</code>"
+        )
+        return
+    
+    msg = await edit_or_reply(message, "<b>⏳ Downloading notes...</b>")
+    path = await client.download_media(replied, file_name=os.path.join(tempfile.gettempdir(), ""))
+    
+    stats = dict.fromkeys(("imported", "overwritten", "renamed", "skipped", "invalid", "media"), 0)
+    start = last_progress = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8") as f:
+            while True:
+                records = await asyncio.to_thread(read_batch, f)
+                if not records:
+                    break
+                for record in records:
+                    # Other userbots use different field names for the body
+                    text = None
+                    if isinstance(record, dict):
+                        text = record.get("text", record.get("content", record.get("value")))
+                    if not isinstance(text, str) or not record.get("name"):
+                        stats["invalid"] += 1
+                        continue
+                    
+                    name = note_name(str(record["name"]))
+                    if store.get(name) is not None:
+                        if policy == "skip":
+                            stats["skipped"] += 1
+                            continue
+                        if policy == "rename":
+                            name = free_name(name)
+                            stats["renamed"] += 1
+                        else:
+                            stats["overwritten"] += 1
+                    
+                    media = record.get("media")
+                    if not (isinstance(media, dict) and {"file_unique_id", "file_id", "type"} <= media.keys()):
+                        media = None
+                    else:
+                        stats["media"] += 1
+                    store.set(name, {"text": text, "created": record.get("created") or time.time()}, media)
+                    stats["imported"] += 1
+                
+                now = time.perf_counter()
+                if now - last_progress > PROGRESS_INTERVAL:
+                    last_progress = now
+                    await msg.edit(f"<b>⏳ Imported {stats['imported']} notes...</b>")
+    finally:
+        os.remove(path)
+    
+    # Write everything now instead of waiting for the next write-behind flush
+    await storage.flush()
+    
+    text = f"<b>✅ Imported {stats['imported']} notes in {time.perf_counter() - start:.1f}s</b>\n"
+    for key in ("overwritten", "renamed", "skipped", "invalid"):
+        if stats[key]:
+            text += f"<b>{key.title()}:</b> {stats[key]}\n"
+    if stats["media"]:
+        text += f"<i>{stats['media']} media notes were imported by file_id and may not open on a different account.</i>"
+    await msg.edit(text)
 
 
 @Client.on_message(filters.command("notes", prefix) & filters.me)
 async def list_notes(client: Client, message: Message):
     """List all saved notes"""
-    # Your existing list_notes function...
+    if len(message.command) > 1 and message.command[1].lower() == "export":
+        await export_notes(client, message)
+        return
+    if len(message.command) > 1 and message.command[1].lower() == "import":
+        await import_notes(client, message)
+        return
+    
+    args = message.command[1:]
+    # A trailing -N selects the page
+    page = 1
+    if args and args[-1][:1] == "-" and args[-1][1:].isdigit():
+        page = max(int(args.pop()[1:]), 1)
+    name_prefix = note_name(args[0]) if args else ""
+    
+    total = store.count_prefix(name_prefix)
+    pages = max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+    page = min(page, pages)
+    names = store.with_prefix(name_prefix, offset=(page - 1) * PAGE_SIZE)
+    
+    if not names:
+        await edit_or_reply(message, "<b>No notes saved!</b>" if not name_prefix
+                            else f"<b>No notes starting with</b> <code>{html.escape(name_prefix)}</code>")
+        return
+    
+    lines = []
+    length = 0
+    for name in names:
+        line = f"• <code>{html.escape(name)}</code>"
+        # Very long names can overflow a page, stop at a whole line
+        if length + len(line) > PAGE_CHARS:
+            break
+        lines.append(line)
+        length += len(line) + 1
+    
+    text = f"<b>📝 Notes ({total}):</b>\n\n" + "\n".join(lines)
+    if len(lines) < len(names):
+        text += f"\n<i>...{len(names) - len(lines)} more on this page, add a prefix to narrow down.</i>"
+    if pages > 1:
+        command = " ".join(filter(None, (f"{prefix}notes", html.escape(name_prefix), f"-{page + 1}")))
+        more = f"<code>{command}</code> for more" if page < pages else "last page"
+        text += f"\n\n<i>Page {page}/{pages}, {more}.</i>"
+    
+    await edit_or_reply(message, text)
 
 
 @Client.on_message(filters.command("clear", prefix) & filters.me)
 async def clear_note(client: Client, message: Message):
     """Delete a saved note"""
-    # Your existing clear_note function...
+    if len(message.command) < 2:
+        await edit_or_reply(message, "<b>Usage:</b> <code>.clear [name]</code>")
+        return
+    
+    name = note_name(message.command[1])
+    if store.delete(name) is None:
+        await edit_or_reply(message, f"<b>❌ Note</b> <code>{name}</code> <b>not found!</b>")
+        return
+    
+    await edit_or_reply(message, f"<b>✅ Note</b> <code>{name}</code> <b>deleted!</b>")
 
 
 # Register module in help system
 modules_help["notes"] = {
-    "save [name] [text]": "Save a note with the given name and content (or reply to a message)",
+    "save [name] [text]": "Save a note with the given name and content (or reply to a message, media is kept by reference)",
     "get [name]": "Retrieve a saved note",
-    "notes": "List all saved notes",
+    "#name": "Shorthand for get",
+    "notes [prefix] [-page]": "List saved notes, optionally only those starting with prefix",
+    "notes export": "Export all notes as a JSONL document",
+    "notes import [skip|overwrite|rename]": "Import notes from a replied JSONL document, handling name conflicts with the given policy",
     "clear [name]": "Delete a saved note",
     "__category__": "utils"
-}
\ No newline at end of file
+}
@@ -0,0 +1,162 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Managed process pool for CPU-heavy work.
+
+Functions must be pure, defined at module top level and take picklable
+arguments. Either call ``await pool.run(func, *args)`` directly or mark the
+function with ``@offloadable()`` and call ``await func.offload(*args)``; the
+decorator leaves the function itself untouched so it stays picklable.
+Background threads use the blocking ``pool.call(func, *args)`` instead.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from utils.startup import register_shutdown_job
+from utils.storage import storage
+
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+DEFAULT_QUEUE_DEPTH = 32
+DEFAULT_TIMEOUT = 30.0
+
+
+class OffloadQueueFull(Exception):
+    pass
+
+
+class OffloadPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # call() may start or recycle the executor from a background thread
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # forkserver avoids forking a process that already runs threads
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                )
+            return self._executor
+
+    def _recycle(self):
+        """Replace the pool; the only way to stop a job that is already running"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # ProcessPoolExecutor has no public API to kill busy workers
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.recycled += 1
+
+    async def run(self, func: Callable, *args, timeout: float = DEFAULT_TIMEOUT):
+        """Run func(*args) in a worker process, raising TimeoutError after timeout seconds"""
+        if self.pending >= self.max_queue:
+            raise OffloadQueueFull(f"{self.pending} jobs already queued")
+
+        self.pending += 1
+        future = self._get_executor().submit(func, *args)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+            if not future.cancel():
+                self._recycle()
+            raise
+        except BrokenProcessPool:
+            self.failed += 1
+            self._recycle()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def call(self, func: Callable, *args, timeout: float = DEFAULT_TIMEOUT):
+        """Blocking run() for threads outside the event loop; not counted in stats()"""
+        future = self._get_executor().submit(func, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                self._recycle()
+            raise
+        except BrokenProcessPool:
+            self._recycle()
+            raise
+
+    def shutdown(self):
+        """Stop the workers; the next run() starts a fresh pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _forget(self):
+        # A forked child doesn't own the parent's workers or management thread
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "recycled": self.recycled,
+        }
+
+
+pool = OffloadPool(
+    storage.get_now("core.offload", "workers", DEFAULT_WORKERS),
+    storage.get_now("core.offload", "max_queue", DEFAULT_QUEUE_DEPTH),
+)
+os.register_at_fork(after_in_child=pool._forget)
+
+
+@register_shutdown_job
+async def stop_pool():
+    """Stop the workers before the process restarts or exits"""
+    # multiprocessing joins live workers at exit, before the executor would stop them
+    await asyncio.to_thread(pool.shutdown)
+
+
+def offloadable(timeout: float = DEFAULT_TIMEOUT):
+    """Give a top-level pure function an async .offload() that runs it in the pool"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def offload(*args):
+            return await pool.run(func, *args, timeout=timeout)
+
+        func.offload = offload
+        return func
+
+    return decorator
@@ -0,0 +1,158 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import argparse
+import builtins
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from utils.loader import ROOT_PATH, import_path, module_handlers, read_entries
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPORT_PATH = os.path.join(ROOT_PATH, "import_profile.json")
+
+# Report of the last profiled startup in this process, if any
+last_report: Optional[dict] = None
+
+
+@dataclass
+class ModuleTiming:
+    name: str
+    path: str
+    total_ms: float = 0.0
+    deps_ms: float = 0.0
+    self_ms: float = 0.0
+    new_modules: int = 0
+    handlers: int = 0
+    rss_delta: int = 0
+    error: Optional[str] = None
+
+
+class _ImportTimer:
+    """Wraps builtins.__import__ to time imports made directly by a module body"""
+
+    def __init__(self):
+        self.depth = 0
+        self.deps_time = 0.0
+        self.original = None
+
+    def __enter__(self):
+        self.original = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self.original
+
+    def _import(self, *args, **kwargs):
+        loaded = len(sys.modules)
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            return self.original(*args, **kwargs)
+        finally:
+            self.depth -= 1
+            # Only top-level imports that actually loaded something count as
+            # dependency time; nested ones are already included in them
+            if self.depth == 0 and len(sys.modules) > loaded:
+                self.deps_time += time.perf_counter() - start
+
+
+def _rss() -> int:
+    if psutil is None:
+        return 0
+    return psutil.Process().memory_info().rss
+
+
+def profile_module(name: str, path: str) -> ModuleTiming:
+    """Import a single module and record its cost"""
+    timing = ModuleTiming(name=name, path=path)
+    modules_before = len(sys.modules)
+    rss_before = _rss()
+
+    start = time.perf_counter()
+    with _ImportTimer() as timer:
+        try:
+            module = importlib.import_module(import_path(path))
+        except Exception as e:
+            module = None
+            timing.error = f"{type(e).__name__}: {e}"
+    total = time.perf_counter() - start
+
+    timing.total_ms = round(total * 1000, 3)
+    timing.deps_ms = round(timer.deps_time * 1000, 3)
+    timing.self_ms = round(max(total - timer.deps_time, 0.0) * 1000, 3)
+    timing.new_modules = len(sys.modules) - modules_before
+    timing.rss_delta = _rss() - rss_before
+    if module is not None:
+        timing.handlers = len(module_handlers(module))
+    return timing
+
+
+def profile_modules(entries: Optional[list] = None) -> dict:
+    """Import every module from full.txt in order and build a report"""
+    global last_report
+
+    if entries is None:
+        entries = read_entries()
+
+    start = time.perf_counter()
+    timings: List[ModuleTiming] = [profile_module(name, path) for name, path in entries]
+
+    last_report = {
+        "generated": time.time(),
+        "python": platform.python_version(),
+        "total_ms": round((time.perf_counter() - start) * 1000, 3),
+        "modules": [asdict(timing) for timing in timings],
+    }
+    return last_report
+
+
+def save_report(report: dict, path: str = REPORT_PATH) -> str:
+    """Write the report as JSON for regression tracking"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_report(path: str = REPORT_PATH) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile module import cost")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    if ROOT_PATH not in sys.path:
+        sys.path.insert(0, ROOT_PATH)
+
+    report = profile_modules()
+    if args.output:
+        save_report(report, args.output)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
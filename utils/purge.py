@@ -6,14 +6,33 @@
 #  the Free Software Foundation, either version 3 of the License, or
 #  (at your option) any later version.
 
-import asyncio
 import time
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from pyrogram.errors import MessageDeleteForbidden, FloodWait
 
+from utils import instrument
 from utils.misc import modules_help, prefix
 from utils.scripts import edit_or_reply, with_reply
+from utils.history_index import history_index
+
+# Maximum number of indexed matches deleted by one .purgematch
+PURGEMATCH_LIMIT = 1000
+
+
+async def delete_in_chunks(client: Client, chat_id: int, message_ids: list) -> bool:
+    """Delete messages 100 at a time, returns False if deleting is forbidden"""
+    for i in range(0, len(message_ids), 100):
+        chunk = message_ids[i:i + 100]
+        try:
+            await client.delete_messages(chat_id, chunk)
+        except FloodWait as e:
+            await instrument.sleep(e.value, "floodwait")
+            await client.delete_messages(chat_id, chunk)
+        except MessageDeleteForbidden:
+            return False
+        await instrument.sleep(0.5)  # Prevent flood
+    return True
 
 
 @Client.on_message(filters.command("purge", prefix) & filters.me)
@@ -34,20 +53,20 @@ async def purge_cmd(client: Client, message: Message, replied: Message):
             try:
                 await client.delete_messages(chat_id, message_ids)
             except FloodWait as e:
-                await asyncio.sleep(e.value)
+                await instrument.sleep(e.value, "floodwait")
                 await client.delete_messages(chat_id, message_ids)
             except MessageDeleteForbidden:
                 await msg.edit("<b>❌ Cannot delete all messages. Try as admin.</b>")
                 return
             message_ids = []
-            await asyncio.sleep(0.5)  # Prevent flood
+            await instrument.sleep(0.5)  # Prevent flood
     
     # Delete any remaining messages
     if message_ids:
         try:
             await client.delete_messages(chat_id, message_ids)
         except FloodWait as e:
-            await asyncio.sleep(e.value)
+            await instrument.sleep(e.value, "floodwait")
             await client.delete_messages(chat_id, message_ids)
         except MessageDeleteForbidden:
             pass
@@ -66,7 +85,7 @@ async def purge_cmd(client: Client, message: Message, replied: Message):
         f"<b>✅ Success message will be deleted in 5 seconds.</b>",
         disable_notification=True
     )
-    await asyncio.sleep(5)
+    await instrument.sleep(5)
     await client.delete_messages(chat_id, msg_info.id)
 
 
@@ -84,7 +103,7 @@ async def del_cmd(client: Client, message: Message):
         await message.delete()
     except MessageDeleteForbidden:
         await edit_or_reply(message, "<b>❌ I don't have permission to delete this message.</b>")
-        await asyncio.sleep(2)
+        await instrument.sleep(2)
         await message.delete()
 
 
@@ -93,7 +112,7 @@ async def selfdestruct_cmd(client: Client, message: Message):
     """Send self-destructing message"""
     if len(message.command) < 3:
         await edit_or_reply(message, "<b>❌ Usage:</b> <code>.sd [seconds] [text]</code>")
-        await asyncio.sleep(3)
+        await instrument.sleep(3)
         await message.delete()
         return
         
@@ -103,7 +122,7 @@ async def selfdestruct_cmd(client: Client, message: Message):
             raise ValueError("Invalid time")
     except ValueError:
         await edit_or_reply(message, "<b>❌ Time must be between 1 and 3600 seconds.</b>")
-        await asyncio.sleep(3)
+        await instrument.sleep(3)
         await message.delete()
         return
         
@@ -117,7 +136,7 @@ async def selfdestruct_cmd(client: Client, message: Message):
     )
     
     # Sleep and delete
-    await asyncio.sleep(seconds)
+    await instrument.sleep(seconds)
     try:
         await msg.delete()
     except:
@@ -143,7 +162,7 @@ async def purgeme_cmd(client: Client, message: Message):
     """Delete X messages from yourself"""
     if len(message.command) <= 1:
         await edit_or_reply(message, "<b>❌ Usage: </b><code>.purgeme [count]</code>")
-        await asyncio.sleep(3)
+        await instrument.sleep(3)
         await message.delete()
         return
     
@@ -153,7 +172,7 @@ async def purgeme_cmd(client: Client, message: Message):
             raise ValueError("Invalid count")
     except ValueError:
         await edit_or_reply(message, "<b>❌ Count must be between 1 and 1000.</b>")
-        await asyncio.sleep(3)
+        await instrument.sleep(3)
         await message.delete()
         return
     
@@ -176,19 +195,19 @@ async def purgeme_cmd(client: Client, message: Message):
                 try:
                     await client.delete_messages(message.chat.id, message_ids)
                 except FloodWait as e:
-                    await asyncio.sleep(e.value)
+                    await instrument.sleep(e.value, "floodwait")
                     await client.delete_messages(message.chat.id, message_ids)
                 except MessageDeleteForbidden:
                     pass
                 message_ids = []
-                await asyncio.sleep(0.5)  # Prevent flood
+                await instrument.sleep(0.5)  # Prevent flood
     
     # Delete any remaining messages
     if message_ids:
         try:
             await client.delete_messages(message.chat.id, message_ids)
         except FloodWait as e:
-            await asyncio.sleep(e.value)
+            await instrument.sleep(e.value, "floodwait")
             await client.delete_messages(message.chat.id, message_ids)
         except MessageDeleteForbidden:
             pass
@@ -199,7 +218,43 @@ async def purgeme_cmd(client: Client, message: Message):
         f"<b>🧹 Purged {total_count} of your messages!</b>",
         disable_notification=True
     )
-    await asyncio.sleep(3)
+    await instrument.sleep(3)
+    await msg.delete()
+
+
+@Client.on_message(filters.command("purgematch", prefix) & filters.me)
+async def purgematch_cmd(client: Client, message: Message):
+    """Delete messages matching a query in the local history index"""
+    args = message.command[1:]
+    only_mine = bool(args) and args[0].lower() == "-me"
+    if only_mine:
+        args = args[1:]
+    
+    if not args:
+        await edit_or_reply(message, "<b>❌ Usage: </b><code>.purgematch [-me] [query]</code>")
+        await instrument.sleep(3)
+        await message.delete()
+        return
+    
+    results = await history_index.search(message.chat.id, " ".join(args), limit=PURGEMATCH_LIMIT)
+    # The command itself is indexed and matches its own query
+    matched = [
+        result.message_id for result in results
+        if result.message_id != message.id and (not only_mine or result.sender_id == client.me.id)
+    ]
+    message_ids = matched + [message.id]
+    
+    if not await delete_in_chunks(client, message.chat.id, message_ids):
+        await edit_or_reply(message, "<b>❌ Cannot delete all messages. Try as admin.</b>")
+        return
+    history_index.remove(message.chat.id, message_ids)
+    
+    msg = await client.send_message(
+        message.chat.id,
+        f"<b>🧹 Purged {len(matched)} matching messages!</b>",
+        disable_notification=True
+    )
+    await instrument.sleep(3)
     await msg.delete()
 
 
@@ -210,5 +265,6 @@ modules_help["purge"] = {
     "clear": "Clear the chat with blank lines",
     "purgeme [count]": "Delete your last X messages",
     "pm [count]": "Alias for purgeme command",
+    "purgematch [-me] [query]": "Delete messages matching a query in the local search index (-me: only yours)",
     "__category__": "utils"
 }
@@ -0,0 +1,226 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Local ledger of bans and mutes applied by this account.
+
+Telegram treats an until_date less than 30 seconds or more than 366 days
+away as permanent. Restrictions inside that range are handed to Telegram
+with their expiry and only dropped from the ledger when they run out;
+restrictions outside it are applied permanently and lifted by a single
+scheduler task per account, which sleeps until the earliest expiry. A
+managed restriction stays in the ledger until it is lifted; a failed lift
+is retried with backoff.
+
+The scheduler starts with the resume jobs, and also from the first handler
+an account runs, so expired restrictions are lifted even on startups that
+skip the resume stage.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pyrogram.errors import FloodWait
+
+from utils import instrument
+from utils.storage import storage
+from utils.startup import register_resume_job
+
+log = logging.getLogger(__name__)
+
+# Range of durations Telegram expires by itself
+MIN_TELEGRAM_DURATION = 30
+MAX_TELEGRAM_DURATION = 366 * 86400
+
+KINDS = ("ban", "mute")
+# Backoff between attempts to lift a restriction, doubling up to the maximum
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 3600
+
+
+def telegram_expires(seconds: int) -> bool:
+    """Whether Telegram honours an until_date this far away"""
+    return MIN_TELEGRAM_DURATION <= seconds <= MAX_TELEGRAM_DURATION
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """Parse 45s, 10m, 2h, 7d or plain seconds; None if it isn't a duration"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = text.lower()
+    multiplier = units.get(text[-1:], None)
+    number = text[:-1] if multiplier else text
+    if not number.isdigit():
+        return None
+    return int(number) * (multiplier or 1)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    for unit, size in (("days", 86400), ("hours", 3600), ("minutes", 60)):
+        if seconds >= size:
+            return f"{seconds // size} {unit}"
+    return f"{seconds} seconds"
+
+
+class RestrictionLedger:
+    collection = "core.restrictions"
+
+    def __init__(self):
+        self.entries: Dict[str, dict] = storage.load_collection(self.collection)
+        # Per-account heaps of (due, key); stale items are skipped when popped
+        self._heaps: Dict[int, List[Tuple[float, str]]] = {}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        for key, entry in self.entries.items():
+            if entry["until"] is not None:
+                self._push(entry["owner"], self.due(entry), key)
+
+    @staticmethod
+    def make_key(owner: int, chat_id: int, user_id: int, kind: str) -> str:
+        return f"{owner}:{chat_id}:{user_id}:{kind}"
+
+    @staticmethod
+    def due(entry: dict) -> float:
+        """When the scheduler next handles an entry: its expiry, or the retry of a failed lift"""
+        return entry.get("retry_at") or entry["until"]
+
+    def _push(self, owner: int, until: float, key: str):
+        heapq.heappush(self._heaps.setdefault(owner, []), (until, key))
+        wakeup = self._wakeups.get(owner)
+        if wakeup is not None:
+            wakeup.set()
+
+    def add(self, owner: int, chat_id: int, user_id: int, kind: str, duration: int = 0, **info) -> dict:
+        """Record a restriction; duration 0 means permanent"""
+        key = self.make_key(owner, chat_id, user_id, kind)
+        until = time.time() + duration if duration > 0 else None
+        entry = {
+            "owner": owner,
+            "chat_id": chat_id,
+            "user_id": user_id,
+            "kind": kind,
+            "until": until,
+            # Lifted by the scheduler rather than by Telegram
+            "managed": until is not None and not telegram_expires(duration),
+            "created": time.time(),
+            **info,
+        }
+        self.entries[key] = entry
+        storage.set_nowait(self.collection, key, entry)
+        if until is not None:
+            self._push(owner, until, key)
+        return entry
+
+    def remove(self, owner: int, chat_id: int, user_id: int, kind: str) -> Optional[dict]:
+        key = self.make_key(owner, chat_id, user_id, kind)
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            storage.delete_nowait(self.collection, key)
+        return entry
+
+    def active(self, owner: int, chat_id: Optional[int] = None) -> List[dict]:
+        """Current restrictions, soonest expiry first and permanent ones last"""
+        now = time.time()
+        entries = [
+            entry for entry in self.entries.values()
+            if entry["owner"] == owner
+            and (chat_id is None or entry["chat_id"] == chat_id)
+            and (entry["until"] is None or entry["until"] > now)
+        ]
+        return sorted(entries, key=lambda entry: (entry["until"] is None, entry["until"] or 0))
+
+    def pop_expired(self, owner: int, now: float) -> List[Tuple[str, dict]]:
+        """Due managed entries; they stay in the ledger until finish() or retry()"""
+        heap = self._heaps.get(owner, [])
+        expired = []
+        while heap and heap[0][0] <= now:
+            due, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            if entry is None or self.due(entry) != due:
+                continue
+            if entry["managed"]:
+                expired.append((key, entry))
+            else:
+                # Telegram lifted it already
+                self.finish(key, entry)
+        return expired
+
+    def finish(self, key: str, entry: dict):
+        # Skip entries replaced by a new restriction while the lift ran
+        if self.entries.get(key) is entry:
+            del self.entries[key]
+            storage.delete_nowait(self.collection, key)
+
+    def retry(self, key: str, entry: dict, error: Exception):
+        if self.entries.get(key) is not entry:
+            return
+        attempts = entry.get("attempts", 0) + 1
+        delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        if isinstance(error, FloodWait):
+            delay = max(delay, error.value)
+        entry = self.entries[key] = dict(entry, attempts=attempts, retry_at=time.time() + delay)
+        storage.set_nowait(self.collection, key, entry)
+        self._push(entry["owner"], entry["retry_at"], key)
+        log.warning("Failed to lift %s of %s in %s (%s: %s), retrying in %ds",
+                    entry["kind"], entry["user_id"], entry["chat_id"], type(error).__name__, error, delay)
+
+    def next_delay(self, owner: int) -> Optional[float]:
+        heap = self._heaps.get(owner)
+        if not heap:
+            return None
+        return max(0.0, heap[0][0] - time.time())
+
+    async def lift(self, client, entry: dict):
+        if entry["kind"] == "ban":
+            await client.unban_chat_member(entry["chat_id"], entry["user_id"])
+        else:
+            chat = await client.get_chat(entry["chat_id"])
+            await client.restrict_chat_member(entry["chat_id"], entry["user_id"], chat.permissions)
+
+    async def run(self, client):
+        owner = client.me.id
+        wakeup = self._wakeups[owner] = asyncio.Event()
+        while True:
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), self.next_delay(owner))
+            except asyncio.TimeoutError:
+                pass
+            for key, entry in self.pop_expired(owner, time.time()):
+                try:
+                    await self.lift(client, entry)
+                except Exception as e:
+                    self.retry(key, entry, e)
+                else:
+                    self.finish(key, entry)
+
+    def ensure_running(self, client):
+        task = self._tasks.get(client.me.id)
+        if task is None or task.done():
+            self._tasks[client.me.id] = asyncio.get_running_loop().create_task(self.run(client))
+
+
+ledger = RestrictionLedger()
+
+
+@register_resume_job
+async def start_restriction_scheduler(client):
+    ledger.ensure_running(client)
+
+
+async def scheduler_middleware(call_next, client, update, name, is_command):
+    # A dict lookup once the account's scheduler task exists
+    if getattr(client, "me", None) is not None:
+        ledger.ensure_running(client)
+    return await call_next()
+
+
+instrument.add_handler_middleware(scheduler_middleware)
+instrument.install()
@@ -0,0 +1,231 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Run custom modules in a separate worker process.
+
+The worker (utils.sandbox_worker) imports the module, reports the commands
+its handlers listen to and gets those commands dispatched over a Unix socket
+pair. Frames are a 4-byte length followed by msgpack (json if msgpack isn't
+installed). Inside the worker handlers receive a proxy client whose methods
+are forwarded to the real client, so Telegram calls still go through this
+process; only the methods in PROXY_METHODS are served, and the pyrogram
+objects they return are rebuilt in the worker.
+
+Every module gets a memory rlimit and a per-command timeout, configurable
+in db core.sandbox/<module>. A worker that runs out of memory or whose
+command times out is killed and restarted on the next command. CPU is
+bounded by the timeout rather than RLIMIT_CPU, which counts the worker's
+whole lifetime and would eventually kill a long-lived worker under normal
+use.
+
+Sandboxed module files live in sandboxed_modules/, outside the modules/
+path the host imports custom modules from, and are listed in
+custom.modules/sandboxed rather than allModules.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sys
+from typing import Dict, Optional, Set
+
+from utils.loader import ROOT_PATH
+from utils.sandbox_worker import PROXY_METHODS, encode, from_plain, read_frame, to_plain
+from utils.startup import register_resume_job
+from utils.storage import storage
+
+log = logging.getLogger(__name__)
+
+CUSTOM_MODULES_PATH = os.path.join(ROOT_PATH, "modules", "custom_modules")
+SANDBOXED_MODULES_PATH = os.path.join(ROOT_PATH, "sandboxed_modules")
+DEFAULT_LIMITS = {"memory_mb": 512, "timeout": 30}
+
+
+def module_file(name: str) -> str:
+    return os.path.join(SANDBOXED_MODULES_PATH, f"{name}.py")
+
+
+class SandboxedModule:
+    """Host side of one worker process"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.limits = {**DEFAULT_LIMITS, **(storage.get_now("core.sandbox", name) or {})}
+        self.commands: Set[str] = set()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.client = None
+        self.handler = None
+        self.restarts = 0
+        self.dispatched = 0
+        self.timeouts = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._reader_task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, client):
+        self.client = client
+        parent, child = socket.socketpair()
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "utils.sandbox_worker", self.path, str(child.fileno()),
+                str(self.limits["memory_mb"]),
+                cwd=ROOT_PATH, pass_fds=(child.fileno(),),
+            )
+        finally:
+            child.close()
+        reader, self.writer = await asyncio.open_unix_connection(sock=parent)
+        hello = await asyncio.wait_for(read_frame(reader), self.limits["timeout"])
+        if hello["type"] == "error":
+            await self.stop()
+            raise RuntimeError(hello["error"])
+        self.commands = set(hello["commands"])
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_loop(reader))
+
+    async def stop(self):
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError(f"Sandbox for {self.name} stopped"))
+        self._pending.clear()
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame["type"] == "call":
+                    asyncio.get_running_loop().create_task(self._proxy_call(frame))
+                elif frame["type"] == "done":
+                    future = self._pending.pop(frame["id"], None)
+                    if future is not None and not future.done():
+                        future.set_result(frame.get("error"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            log.warning("Sandbox for %s exited with code %s", self.name, self.process.returncode)
+            await self.stop()
+
+    async def _proxy_call(self, frame: dict):
+        try:
+            if frame["method"] not in PROXY_METHODS:
+                raise PermissionError(f"{frame['method']} is not available to sandboxed modules")
+            method = getattr(self.client, frame["method"])
+            value = to_plain(await method(*from_plain(frame["args"]), **from_plain(frame["kwargs"])))
+            reply = {"type": "result", "id": frame["id"], "value": value}
+        except Exception as e:
+            reply = {"type": "result", "id": frame["id"], "error": f"{type(e).__name__}: {e}"}
+        self.writer.write(encode(reply))
+        await self.writer.drain()
+
+    async def dispatch(self, message) -> Optional[str]:
+        """Run a command in the worker; returns its error text, if any"""
+        if not self.alive:
+            self.restarts += 1
+            await self.start(self.client)
+
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self.writer.write(encode({
+            "type": "update", "id": self._next_id, "message": to_plain(message), "me": to_plain(self.client.me),
+        }))
+        await self.writer.drain()
+        self.dispatched += 1
+        try:
+            return await asyncio.wait_for(future, self.limits["timeout"])
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            await self.stop()
+            return f"timed out after {self.limits['timeout']}s, worker restarted"
+        except RuntimeError as e:
+            # The worker died mid-command, e.g. on its memory limit
+            return str(e)
+
+    def stats(self) -> dict:
+        return {
+            "pid": self.process.pid if self.alive else None,
+            "commands": sorted(self.commands),
+            "dispatched": self.dispatched,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+
+sandboxes: Dict[str, SandboxedModule] = {}
+
+
+async def load(client, name: str, path: str) -> SandboxedModule:
+    """Start a worker for a module file and route its commands to it"""
+    from pyrogram import filters
+    from pyrogram.handlers import MessageHandler
+
+    from utils.misc import prefix
+
+    if name in sandboxes:
+        await unload(client, name)
+
+    sandbox = SandboxedModule(name, path)
+    await sandbox.start(client)
+
+    async def on_command(_, message):
+        error = await sandbox.dispatch(message)
+        if error:
+            await message.edit(f"<b>❌ {name}:</b> <code>{error}</code>")
+
+    on_command.__name__ = f"sandbox_{name}"
+    sandbox.handler = MessageHandler(on_command, filters.command(sorted(sandbox.commands), prefix) & filters.me)
+    client.add_handler(sandbox.handler)
+    sandboxes[name] = sandbox
+    return sandbox
+
+
+async def unload(client, name: str) -> bool:
+    """Stop routing a module's commands and kill its worker"""
+    sandbox = sandboxes.pop(name, None)
+    if sandbox is None:
+        return False
+    client.remove_handler(sandbox.handler)
+    await sandbox.stop()
+    return True
+
+
+async def uninstall(client, name: str) -> bool:
+    """Unload a module and delete it, so it isn't restored on the next start"""
+    unloaded = await unload(client, name)
+    listed = await storage.remove("custom.modules", "sandboxed", name)
+    try:
+        os.remove(module_file(name))
+    except FileNotFoundError:
+        pass
+    return unloaded or listed
+
+
+@register_resume_job
+async def restore_sandboxes(client):
+    """Restart workers for modules installed with .loadmodule --sandbox"""
+    for name in await storage.get("custom.modules", "sandboxed", []):
+        # Older installs also listed the module in allModules and kept it in
+        # custom_modules, so the host imported it in-process after a restart
+        legacy_path = os.path.join(CUSTOM_MODULES_PATH, f"{name}.py")
+        if os.path.exists(legacy_path):
+            os.makedirs(SANDBOXED_MODULES_PATH, exist_ok=True)
+            os.replace(legacy_path, module_file(name))
+        await storage.remove("custom.modules", "allModules", name)
+        try:
+            await load(client, name, module_file(name))
+        except Exception:
+            log.exception("Failed to start sandbox for %s", name)
+
@@ -0,0 +1,252 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Worker side of utils.sandbox, plus the wire format both sides share.
+
+This module must not import the userbot's own state (utils.db, storage,
+startup, instrument): it runs inside every sandbox worker, which would
+otherwise open the host database and patch Client.
+
+Handlers in the worker get a ProxyClient. Only the methods in PROXY_METHODS
+are forwarded; the host refuses anything else. Pyrogram objects cross the
+socket field by field and are rebuilt on the other side, bound to the
+proxy, so results such as the Message from send_message or edit_message_text
+keep their bound methods (msg.edit, msg.reply, msg.delete). Not supported:
+methods that return async generators (get_chat_history, get_chat_members),
+raw API calls, and files passed as in-memory objects instead of a path,
+URL or file_id.
+
+    python -m utils.sandbox_worker MODULE_PATH FD MEMORY_MB
+"""
+
+import asyncio
+import enum
+import importlib.util
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Dict, Set
+
+from pyrogram import enums, types
+from pyrogram.types.messages_and_media.message import Str
+
+from utils.loader import module_handlers
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+log = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024
+
+# Client methods a sandboxed module may call
+PROXY_METHODS = frozenset({
+    "send_message", "edit_message_text", "edit_message_caption", "edit_message_media",
+    "edit_message_reply_markup", "delete_messages", "get_messages", "forward_messages", "copy_message",
+    "send_photo", "send_document", "send_video", "send_audio", "send_animation", "send_voice",
+    "send_video_note", "send_sticker", "send_media_group", "send_location", "send_venue",
+    "send_contact", "send_dice", "send_poll", "send_reaction", "send_chat_action",
+    "read_chat_history", "pin_chat_message", "unpin_chat_message", "get_discussion_message",
+    "get_chat", "get_users", "get_me", "get_chat_member", "get_chat_members_count",
+    "restrict_chat_member", "ban_chat_member", "unban_chat_member",
+})
+
+
+def encode(payload: dict) -> bytes:
+    if msgpack is not None:
+        data = msgpack.packb(payload, use_bin_type=True, default=str)
+    else:
+        data = json.dumps(payload, default=str).encode()
+    return HEADER.pack(len(data)) + data
+
+
+def decode(data: bytes) -> dict:
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > MAX_FRAME:
+        raise ValueError(f"Frame of {size} bytes is too large")
+    return decode(await reader.readexactly(size))
+
+
+def to_plain(value: Any) -> Any:
+    """Turn RPC arguments and results into something the codec can carry"""
+    if value is None or isinstance(value, (bool, int, float, bytes)):
+        return value
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        # By name: some pyrogram enums have raw API classes as their values
+        return {"__enum__": type(value).__name__, "name": value.name}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.timestamp()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): to_plain(item) for key, item in value.items()}
+    if isinstance(value, types.Object):
+        return {
+            "__type__": type(value).__name__,
+            **{key: to_plain(item) for key, item in vars(value).items() if not key.startswith("_") and item is not None},
+        }
+    return str(value)
+
+
+def from_plain(value: Any, client=None) -> Any:
+    """Restore what to_plain encoded; pyrogram objects are bound to client"""
+    if isinstance(value, list):
+        return [from_plain(item, client) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__enum__" in value:
+        cls = getattr(enums, value["__enum__"], None)
+        if not (isinstance(cls, type) and issubclass(cls, enum.Enum)):
+            raise ValueError(f"Unknown enum {value['__enum__']}")
+        return cls[value["name"]]
+    if "__datetime__" in value:
+        return datetime.fromtimestamp(value["__datetime__"])
+
+    fields = {key: from_plain(item, client) for key, item in value.items() if not key.startswith("_")}
+    cls = getattr(types, value.get("__type__", ""), None)
+    if not (isinstance(cls, type) and issubclass(cls, types.Object)):
+        return fields
+    # Built without __init__, whose signature doesn't match the stored fields
+    obj = cls.__new__(cls)
+    obj.__dict__.update(fields)
+    obj._client = client
+    if isinstance(obj, types.Message):
+        if obj.__dict__.get("text") is not None:
+            obj.text = Str(obj.text).init(obj.__dict__.get("entities"))
+        if obj.__dict__.get("caption") is not None:
+            obj.caption = Str(obj.caption).init(obj.__dict__.get("caption_entities"))
+    return obj
+
+
+def filter_commands(flt) -> Set[str]:
+    """Collect command names from a filters.command(...) inside a combined filter"""
+    if flt is None:
+        return set()
+    commands = set(getattr(flt, "commands", None) or ())
+    for attr in ("base", "other"):
+        commands |= filter_commands(getattr(flt, attr, None))
+    return commands
+
+
+class ProxyClient:
+    """Forwards method calls to the real client in the host process"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self._writer = writer
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self.me = None
+
+    def __getattr__(self, method: str):
+        if method not in PROXY_METHODS:
+            raise AttributeError(f"{method} is not available to sandboxed modules")
+
+        async def call(*args, **kwargs):
+            self._next_id += 1
+            future = asyncio.get_running_loop().create_future()
+            self._pending[self._next_id] = future
+            self._writer.write(encode({
+                "type": "call", "id": self._next_id, "method": method,
+                "args": to_plain(list(args)), "kwargs": to_plain(kwargs),
+            }))
+            await self._writer.drain()
+            return await future
+
+        return call
+
+    def resolve(self, frame: dict):
+        future = self._pending.pop(frame["id"], None)
+        if future is None or future.done():
+            return
+        if "error" in frame:
+            future.set_exception(RuntimeError(frame["error"]))
+        else:
+            future.set_result(from_plain(frame["value"], self))
+
+
+def set_limits(memory_mb: int):
+    import resource
+
+    memory = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+
+async def worker_main(path: str, fd: int):
+    reader, writer = await asyncio.open_unix_connection(sock=socket.socket(fileno=fd))
+    client = ProxyClient(writer)
+
+    try:
+        spec = importlib.util.spec_from_file_location(f"sandboxed_{os.path.basename(path)[:-3]}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        handlers = [handler for handler, _ in module_handlers(module) if hasattr(handler, "filters")]
+        routes = [(filter_commands(handler.filters), handler) for handler in handlers]
+    except Exception:
+        writer.write(encode({"type": "error", "error": traceback.format_exc(limit=3)}))
+        await writer.drain()
+        return
+
+    writer.write(encode({"type": "hello", "commands": sorted(set().union(*(names for names, _ in routes)))}))
+    await writer.drain()
+
+    async def run(frame: dict):
+        error = None
+        command = None
+        started = time.monotonic()
+        try:
+            message = from_plain(frame["message"], client)
+            client.me = from_plain(frame["me"], client)
+            command = (message.command or [""])[0].lower()
+            for names, handler in routes:
+                if command in names:
+                    await handler.callback(client, message)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        log.debug("%s took %.3fs", command, time.monotonic() - started)
+        writer.write(encode({"type": "done", "id": frame["id"], "error": error}))
+        await writer.drain()
+
+    tasks = set()
+    while True:
+        try:
+            frame = await read_frame(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        if frame["type"] == "result":
+            client.resolve(frame)
+        elif frame["type"] == "update":
+            task = asyncio.get_running_loop().create_task(run(frame))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+
+def main():
+    path, fd, memory_mb = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    set_limits(memory_mb)
+    asyncio.run(worker_main(path, fd))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Per-chat command queues with priority lanes.
+
+Every command runs in a lane with its own concurrency budget. Interactive
+commands run inline, while bulk commands are moved to background tasks so
+they never hold one of pyrogram's update workers. Commands marked as
+serialized wait for each other per chat. Overrides can be stored in
+``core.scheduler/commands`` as ``{"command": ["lane", serialized]}``.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from utils import instrument
+from utils.storage import storage
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Lane:
+    name: str
+    workers: int
+    background: bool
+    running: int = 0
+    queued: int = 0
+    completed: int = 0
+    semaphore: asyncio.Semaphore = None
+
+    def __post_init__(self):
+        self.semaphore = asyncio.Semaphore(self.workers)
+
+
+LANES = {
+    "interactive": Lane("interactive", workers=16, background=False),
+    "bulk": Lane("bulk", workers=2, background=True),
+}
+
+# command -> (lane, serialized per chat)
+DEFAULT_COMMANDS: Dict[str, Tuple[str, bool]] = {
+    "purge": ("bulk", True),
+    "purgeme": ("bulk", True),
+    "pm": ("bulk", True),
+    "purgematch": ("bulk", True),
+    "update": ("bulk", True),
+    "chatstats": ("bulk", True),
+    "index": ("bulk", True),
+}
+
+
+class CommandScheduler:
+    def __init__(self):
+        self.commands = dict(DEFAULT_COMMANDS)
+        self.commands.update({
+            name: tuple(value) for name, value in storage.get_now("core.scheduler", "commands", {}).items()
+        })
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._chat_waiters: Dict[int, int] = {}
+        self._tasks = set()
+
+    def resolve(self, command: str) -> Tuple[Lane, bool]:
+        lane, serialized = self.commands.get(command, ("interactive", False))
+        return LANES.get(lane, LANES["interactive"]), serialized
+
+    async def _run(self, lane: Lane, chat_id, serialized: bool, call_next):
+        lane.queued += 1
+        queued = True
+        lock = None
+        if serialized and chat_id is not None:
+            lock = self._chat_locks.setdefault(chat_id, asyncio.Lock())
+            self._chat_waiters[chat_id] = self._chat_waiters.get(chat_id, 0) + 1
+        try:
+            if lock is not None:
+                await lock.acquire()
+            try:
+                async with lane.semaphore:
+                    lane.queued -= 1
+                    queued = False
+                    lane.running += 1
+                    try:
+                        return await call_next()
+                    finally:
+                        lane.running -= 1
+                        lane.completed += 1
+            finally:
+                if lock is not None:
+                    lock.release()
+        finally:
+            # Cancelled or failed while still waiting for the lock or a worker
+            if queued:
+                lane.queued -= 1
+            if lock is not None:
+                # Drop the lock once nobody in this chat is waiting for it
+                self._chat_waiters[chat_id] -= 1
+                if not self._chat_waiters[chat_id]:
+                    del self._chat_waiters[chat_id]
+                    del self._chat_locks[chat_id]
+
+    async def _run_background(self, lane: Lane, chat_id, serialized: bool, call_next, name: str):
+        try:
+            await self._run(lane, chat_id, serialized, call_next)
+        except Exception:
+            log.exception("Background command %s failed", name)
+
+    async def handler_middleware(self, call_next, client, update, name, is_command):
+        # Only commands are scheduled; passive handlers run as usual
+        if not is_command:
+            return await call_next()
+
+        lane, serialized = self.resolve(name)
+        chat = getattr(update, "chat", None)
+        chat_id = chat.id if chat else None
+
+        if not lane.background:
+            return await self._run(lane, chat_id, serialized, call_next)
+
+        task = asyncio.get_running_loop().create_task(
+            self._run_background(lane, chat_id, serialized, call_next, name)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {"workers": lane.workers, "running": lane.running,
+                   "queued": lane.queued, "completed": lane.completed}
+            for name, lane in LANES.items()
+        }
+
+
+scheduler = CommandScheduler()
+
+# Outermost, so everything else (metrics, tracing) runs inside the lane
+instrument.add_handler_middleware(scheduler.handler_middleware, outermost=True)
+instrument.install()
@@ -0,0 +1,161 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import time
+from datetime import datetime
+from typing import List
+
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from utils.misc import modules_help, prefix
+from utils.scripts import edit_or_reply
+from utils.history_index import history_index
+from utils.storage import storage
+
+# Chats opted into indexing, cached so the message path never reads the db
+indexed_chats = set(storage.get_now("core.search", "chats", []))
+
+
+def index_message(message: Message):
+    text = message.text or message.caption
+    if not text:
+        return
+    sender = message.from_user or message.sender_chat
+    history_index.add(
+        message.chat.id,
+        message.id,
+        text,
+        sender.id if sender else 0,
+        int(message.date.timestamp()),
+    )
+
+
+def is_indexed(_, __, message: Message) -> bool:
+    return message.chat is not None and message.chat.id in indexed_chats
+
+
+indexed = filters.create(is_indexed)
+
+
+@Client.on_message(indexed & (filters.text | filters.caption), group=10)
+async def index_new_message(client: Client, message: Message):
+    index_message(message)
+
+
+@Client.on_edited_message(indexed & (filters.text | filters.caption), group=10)
+async def index_edited_message(client: Client, message: Message):
+    index_message(message)
+
+
+@Client.on_deleted_messages(group=10)
+async def unindex_deleted_messages(client: Client, messages: List[Message]):
+    by_chat = {}
+    for message in messages:
+        # Deletions in private chats and basic groups come without a chat
+        chat_id = message.chat.id if message.chat else None
+        if chat_id is None or chat_id in indexed_chats:
+            by_chat.setdefault(chat_id, []).append(message.id)
+    for chat_id, message_ids in by_chat.items():
+        history_index.remove(chat_id, message_ids)
+
+
+@Client.on_message(filters.command("index", prefix) & filters.me)
+async def index_cmd(client: Client, message: Message):
+    """Manage local history indexing for the current chat"""
+    chat_id = message.chat.id
+    action = message.command[1].lower() if len(message.command) > 1 else "status"
+
+    if action == "on":
+        indexed_chats.add(chat_id)
+        await storage.set("core.search", "chats", sorted(indexed_chats))
+        await edit_or_reply(message, "<b>✅ Indexing enabled for this chat.</b>")
+
+    elif action == "off":
+        indexed_chats.discard(chat_id)
+        await storage.set("core.search", "chats", sorted(indexed_chats))
+        if len(message.command) > 2 and message.command[2].lower() == "drop":
+            await history_index.drop(chat_id)
+        await edit_or_reply(message, "<b>✅ Indexing disabled for this chat.</b>")
+
+    elif action == "backfill":
+        try:
+            limit = int(message.command[2]) if len(message.command) > 2 else 0
+        except ValueError:
+            await edit_or_reply(message, f"<b>❌ Usage:</b> <code>{prefix}index backfill [limit]</code>")
+            return
+
+        msg = await edit_or_reply(message, "<b>⏳ Backfilling chat history...</b>")
+        start = time.perf_counter()
+        count = 0
+        async for history_message in client.get_chat_history(chat_id, limit=limit):
+            if history_message.text or history_message.caption:
+                index_message(history_message)
+                count += 1
+                if count % 10000 == 0:
+                    await msg.edit(f"<b>⏳ Indexed {count} messages...</b>")
+        await history_index.flush()
+        await msg.edit(
+            f"<b>✅ Indexed {count} messages in {time.perf_counter() - start:.1f}s.</b>"
+            + ("" if chat_id in indexed_chats else f"\nUse <code>{prefix}index on</code> to keep indexing new messages.")
+        )
+
+    else:
+        count = await history_index.count(chat_id)
+        state = "enabled" if chat_id in indexed_chats else "disabled"
+        await edit_or_reply(
+            message,
+            f"<b>🗂 Indexing:</b> <code>{state}</code>\n<b>Indexed messages:</b> <code>{count}</code>",
+        )
+
+
+@Client.on_message(filters.command("search", prefix) & filters.me)
+async def search_cmd(client: Client, message: Message):
+    """Search the local index of this chat"""
+    if len(message.command) < 2:
+        await edit_or_reply(message, f"<b>❌ Usage:</b> <code>{prefix}search [query]</code>")
+        return
+
+    query = " ".join(message.command[1:])
+    start = time.perf_counter()
+    results = await history_index.search(message.chat.id, query)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if not results:
+        await edit_or_reply(message, f"<b>🔍 No results for</b> <code>{query}</code> ({elapsed:.1f} ms)")
+        return
+
+    text = f"<b>🔍 {len(results)} results for</b> <code>{query}</code> ({elapsed:.1f} ms)\n\n"
+    for shown, result in enumerate(results):
+        date = datetime.fromtimestamp(result.date).strftime("%Y-%m-%d %H:%M")
+        if message.chat.username:
+            link = f"https://t.me/{message.chat.username}/{result.message_id}"
+        elif str(message.chat.id).startswith("-100"):
+            link = f"https://t.me/c/{str(message.chat.id)[4:]}/{result.message_id}"
+        else:
+            link = None
+
+        header = f"<a href='{link}'>#{result.message_id}</a>" if link else f"#{result.message_id}"
+        entry = f"{header} <code>{date}</code>\n{result.snippet}\n\n"
+        # Stop at whole entries so the message never ends inside a tag
+        if len(text) + len(entry) > 4000:
+            text += f"<i>…and {len(results) - shown} more</i>"
+            break
+        text += entry
+
+    await edit_or_reply(message, text)
+
+
+modules_help["search"] = {
+    "index on": "Start indexing messages of this chat locally",
+    "index off [drop]": "Stop indexing this chat (drop also deletes its index)",
+    "index backfill [limit]": "Index existing chat history",
+    "index": "Show indexing status of this chat",
+    "search [query]": "Search the local index of this chat (word* for prefix match)",
+    "__category__": "utils"
+}
@@ -0,0 +1,179 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Hashed n-gram logistic regression for spam scoring.
+
+A message becomes a bag of bucket indices (word unigrams and bigrams plus
+character trigrams, hashed with crc32 so weights survive restarts) and a
+few dense features. A batch is a flat index array with per-message offsets,
+so scoring is one gather and one np.add.reduceat instead of a Python loop
+over messages. Every message also contains the bias bucket, which keeps
+reduceat segments non-empty.
+
+Featurizing is a Python loop over every character trigram, about 0.25 ms
+for a 600-character message, so live scoring runs in the offload pool
+through score_saved(), which keeps the saved model loaded in each worker.
+
+Requires numpy; utils.antispam stays disabled without it.
+"""
+
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils.loader import ROOT_PATH
+
+MODEL_PATH = os.path.join(ROOT_PATH, "antispam_model.npz")
+HASH_BITS = 18
+BUCKETS = 1 << HASH_BITS
+BIAS_BUCKET = 0
+MAX_TEXT = 1000
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+LINK_RE = re.compile(r"https?://|t\.me/|www\.", re.IGNORECASE)
+MENTION_RE = re.compile(r"@\w{4,}")
+# Telegram user ids grow over time, so a high id means a young account
+NEWEST_USER_ID = 8_000_000_000
+
+DENSE_FEATURES = ("links", "mentions", "newness", "length", "caps")
+
+
+class Sample(NamedTuple):
+    text: str
+    user_id: int
+
+
+def buckets(text: str) -> List[int]:
+    text = text[:MAX_TEXT].lower()
+    words = WORD_RE.findall(text)
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    grams += [text[i:i + 3] for i in range(len(text) - 2)]
+    mask = BUCKETS - 1
+    # Bucket 0 is reserved for the bias
+    return [BIAS_BUCKET] + [(zlib.crc32(gram.encode()) & mask) or 1 for gram in grams]
+
+
+def dense(sample: Sample) -> Tuple[float, ...]:
+    text = sample.text[:MAX_TEXT]
+    letters = sum(1 for char in text if char.isalpha())
+    return (
+        min(len(LINK_RE.findall(text)), 5) / 5,
+        min(len(MENTION_RE.findall(text)), 5) / 5,
+        min(sample.user_id / NEWEST_USER_ID, 1.0),
+        min(len(text), MAX_TEXT) / MAX_TEXT,
+        sum(1 for char in text if char.isupper()) / letters if letters else 0.0,
+    )
+
+
+class Batch(NamedTuple):
+    indices: np.ndarray
+    offsets: np.ndarray
+    counts: np.ndarray
+    dense: np.ndarray
+
+
+def featurize(samples: Iterable[Sample]) -> Batch:
+    indices: List[int] = []
+    offsets: List[int] = []
+    rows = []
+    for sample in samples:
+        offsets.append(len(indices))
+        indices.extend(buckets(sample.text))
+        rows.append(dense(sample))
+    offsets_array = np.asarray(offsets, dtype=np.int64)
+    return Batch(
+        np.asarray(indices, dtype=np.int64),
+        offsets_array,
+        np.diff(np.append(offsets_array, len(indices))),
+        np.asarray(rows, dtype=np.float32).reshape(len(rows), len(DENSE_FEATURES)),
+    )
+
+
+class SpamModel:
+    def __init__(self, weights: Optional[np.ndarray] = None, dense_weights: Optional[np.ndarray] = None):
+        self.weights = weights if weights is not None else np.zeros(BUCKETS, dtype=np.float32)
+        self.dense_weights = (
+            dense_weights if dense_weights is not None else np.zeros(len(DENSE_FEATURES), dtype=np.float32)
+        )
+
+    def logits(self, batch: Batch) -> np.ndarray:
+        sparse = np.add.reduceat(self.weights[batch.indices], batch.offsets)
+        return sparse + batch.dense @ self.dense_weights
+
+    def score(self, batch: Batch) -> np.ndarray:
+        """Spam probability of every message in the batch"""
+        if not len(batch.offsets):
+            return np.zeros(0, dtype=np.float32)
+        return 1 / (1 + np.exp(-np.clip(self.logits(batch), -30, 30)))
+
+    def train(self, batch: Batch, labels: np.ndarray, epochs: int = 10, batch_size: int = 64,
+              learning_rate: float = 0.5, l2: float = 1e-5, seed: int = 0):
+        """Mini-batch SGD on log loss"""
+        rng = np.random.default_rng(seed)
+        starts = batch.offsets
+        for _ in range(epochs):
+            order = rng.permutation(len(labels))
+            for first in range(0, len(order), batch_size):
+                rows = order[first:first + batch_size]
+                counts = batch.counts[rows]
+                offsets = np.cumsum(counts) - counts
+                # Gather the selected messages' buckets into one flat array
+                positions = np.repeat(starts[rows] - offsets, counts) + np.arange(counts.sum())
+                sub = Batch(batch.indices[positions], offsets, counts, batch.dense[rows])
+
+                error = (self.score(sub) - labels[rows]).astype(np.float32)
+                step = learning_rate / len(rows)
+                np.add.at(self.weights, sub.indices, -step * np.repeat(error, counts))
+                self.dense_weights -= step * (error @ sub.dense)
+                self.weights *= 1 - learning_rate * l2
+
+    def save(self, path: str = MODEL_PATH):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, weights=self.weights, dense_weights=self.dense_weights)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> Optional["SpamModel"]:
+        try:
+            with np.load(path) as data:
+                return cls(data["weights"], data["dense_weights"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+# Models loaded by score_saved in this process, with the file's mtime
+_loaded: Dict[str, Tuple[float, Optional[SpamModel]]] = {}
+
+
+def score_saved(samples: List[Sample], path: str = MODEL_PATH) -> List[float]:
+    """Featurize and score with the model saved at path; reloads it when the file changes"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return [0.0] * len(samples)
+    cached = _loaded.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = _loaded[path] = (mtime, SpamModel.load(path))
+    model = cached[1]
+    if model is None:
+        return [0.0] * len(samples)
+    return model.score(featurize(samples)).tolist()
+
+
+def train_model(spam: List[Sample], ham: List[Sample], epochs: int = 10) -> Tuple[SpamModel, float]:
+    """Train on labelled samples, returning the model and its training accuracy"""
+    samples = spam + ham
+    labels = np.concatenate([np.ones(len(spam)), np.zeros(len(ham))]).astype(np.float32)
+    batch = featurize(samples)
+    model = SpamModel()
+    model.train(batch, labels, epochs=epochs)
+    accuracy = float(((model.score(batch) >= 0.5) == labels).mean()) if len(labels) else 0.0
+    return model, accuracy
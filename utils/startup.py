@@ -0,0 +1,215 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Startup stages, resume jobs and shutdown jobs.
+
+The userbot's own main starts its clients, so the stages are observed
+rather than driven: an instrument client hook sees a client's first call,
+which happens inside client.start(), and schedules the resume jobs (see
+register_resume_job) once start() has finished. The first client in a
+process records three stages in db core.startup: boot, from process start
+to the first call, covering interpreter start, imports and connecting;
+initialize, until start() returns, which loads plugins and starts the
+dispatcher; and resume, the resume jobs themselves.
+Resume jobs run concurrently and once per client, so the supervisor can
+also call run_resume_jobs directly; it imports modules with
+import_modules, which loads them in worker threads.
+
+Restarts replace the process with execv, which skips atexit handlers, so
+state buffered in memory is saved by shutdown jobs (see
+register_shutdown_job) that must be awaited before every restart.
+"""
+
+import asyncio
+import compileall
+import importlib
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from utils import instrument
+from utils.loader import ROOT_PATH, import_path, module_handlers, read_entries
+from utils.storage import storage
+
+log = logging.getLogger(__name__)
+
+_imported_at = time.time()
+
+IMPORT_WORKERS = 8
+HISTORY_SIZE = 20
+# How long the resume hook waits for a client to finish client.start(), and how often it checks
+RESUME_WAIT = 120.0
+RESUME_POLL = 0.05
+# Hidden directories (.git, virtualenvs) are not precompiled
+SKIP_DIRS = re.compile(r"[/\\]\.")
+
+_resume_jobs: List[Callable[..., Awaitable]] = []
+_shutdown_jobs: List[Callable[[], Awaitable]] = []
+_resumed = set()
+# When each client made its first call, the start of its initialize stage
+_first_call: Dict[int, float] = {}
+_timings_saved = False
+
+
+def register_resume_job(func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Run `await func(client)` in the resume stage of every startup"""
+    instrument.register(_resume_jobs, func)
+    return func
+
+
+def register_shutdown_job(func: Callable[[], Awaitable]) -> Callable[[], Awaitable]:
+    """Run `await func()` in run_shutdown_jobs, before the process restarts or exits"""
+    instrument.register(_shutdown_jobs, func)
+    return func
+
+
+def precompile() -> bool:
+    """Write bytecode for the whole tree so the next start skips compilation"""
+    return compileall.compile_dir(ROOT_PATH, quiet=1, rx=SKIP_DIRS, workers=0)
+
+
+def import_modules(entries: List[Tuple[str, str]] = None) -> Tuple[list, Dict[str, str]]:
+    """Import full.txt modules concurrently, returning modules in list order and failures"""
+    if entries is None:
+        entries = read_entries()
+
+    def load(entry):
+        name, path = entry
+        try:
+            return importlib.import_module(import_path(path)), None
+        except Exception as e:
+            log.exception("Failed to import module %s", name)
+            return None, f"{type(e).__name__}: {e}"
+
+    # The import system locks per module, so independent modules load in parallel
+    with ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import") as pool:
+        results = list(pool.map(load, entries))
+
+    modules = [module for module, _ in results if module is not None]
+    failed = {name: error for (name, _), (_, error) in zip(entries, results) if error}
+    return modules, failed
+
+
+def register_modules(client, modules: list) -> int:
+    count = 0
+    for module in modules:
+        for handler, group in module_handlers(module):
+            client.add_handler(handler, group)
+            count += 1
+    return count
+
+
+def process_started() -> float:
+    """Wall time this process started; forked shards count from the fork"""
+    try:
+        import psutil
+        return psutil.Process().create_time()
+    except Exception:
+        return _imported_at
+
+
+async def run_resume_jobs(client):
+    """Run the resume jobs for a started client; later calls for the same client do nothing"""
+    global _timings_saved
+    if id(client) in _resumed:
+        return
+    _resumed.add(id(client))
+
+    # Only the first client's startup is the process's startup
+    stages = None
+    if not _timings_saved:
+        _timings_saved = True
+        now = time.time()
+        first_call = _first_call.get(id(client), now)
+        stages = {"boot": first_call - process_started(), "initialize": now - first_call}
+        # Saved before resuming too, so finish_restart can report this startup
+        await save_timings(stages)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(job(client) for job in _resume_jobs), return_exceptions=True)
+    for job, result in zip(_resume_jobs, results):
+        if isinstance(result, Exception):
+            log.error("Resume job %s failed", job.__name__, exc_info=result)
+
+    if stages is not None:
+        stages["resume"] = time.monotonic() - started
+        await save_timings(stages)
+        log.info("Started in %.2fs (%s)", sum(stages.values()), format_stages(stages))
+
+
+async def run_shutdown_jobs():
+    """Save buffered state; await this before restart()"""
+    for job in _shutdown_jobs:
+        try:
+            await job()
+        except Exception:
+            log.exception("Shutdown job %s failed", job.__name__)
+    # Last, since jobs may hand their state to storage
+    await storage.flush()
+
+
+async def _resume_when_started(client):
+    deadline = time.monotonic() + RESUME_WAIT
+    while not client.is_initialized:
+        if time.monotonic() > deadline:
+            log.warning("Client did not finish starting in %.0fs, resume jobs skipped", RESUME_WAIT)
+            return
+        await asyncio.sleep(RESUME_POLL)
+    await run_resume_jobs(client)
+
+
+def _schedule_resume(client):
+    # instrument sees a client on its first call, which is still inside client.start()
+    if id(client) in _resumed:
+        return
+    _first_call.setdefault(id(client), time.time())
+    try:
+        asyncio.get_running_loop().create_task(_resume_when_started(client))
+    except RuntimeError:
+        # Hooked from an import thread after the client was already seen
+        asyncio.run_coroutine_threadsafe(_resume_when_started(client), client.loop)
+
+
+def format_stages(stages: Dict[str, float]) -> str:
+    return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.items())
+
+
+async def save_timings(stages: Dict[str, float]):
+    await storage.set("core.startup", "last", {
+        "time": time.time(),
+        "total": sum(stages.values()),
+        "stages": dict(stages),
+    })
+
+
+@register_resume_job
+async def finish_restart(client):
+    """Report downtime on the message that asked for the restart"""
+    info = await storage.get("core.updater", "restart_info")
+    if not info:
+        return
+    await storage.delete("core.updater", "restart_info")
+
+    downtime = time.time() - info["time"]
+    history = await storage.get("core.startup", "downtime", [])
+    history = history + [{"time": time.time(), "type": info["type"], "downtime": downtime}]
+    await storage.set("core.startup", "downtime", history[-HISTORY_SIZE:])
+
+    last = await storage.get("core.startup", "last") or {}
+    stages = format_stages(last.get("stages", {}))
+    action = "Updated and restarted" if info["type"] == "update" else "Restarted"
+    text = f"<b>{action} in {downtime:.2f}s</b>"
+    if stages:
+        text += f"\n<b>Startup:</b> <code>{stages}</code>"
+    await client.edit_message_text(info["chat_id"], info["message_id"], text)
+
+
+instrument.on_client(_schedule_resume)
+instrument.install()
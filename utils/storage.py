@@ -0,0 +1,206 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Async facade over utils.db.
+
+Reads go through an in-memory cache, writes are coalesced and flushed in the
+background, and list/counter updates happen on the cached value without an
+await between read and write, so concurrent handlers can't lose updates.
+
+The cache is never invalidated, so every writer of a namespace must go
+through this module; a direct db.set would be overwritten or shadowed.
+get_now and load_collection are blocking reads for import time, when no
+event loop is available to await get. Modules are imported from several
+threads at startup, so these reads also run on the storage thread and wait.
+"""
+
+import asyncio
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from utils import instrument
+from utils.db import db
+
+FLUSH_DELAY = 2.0
+
+_MISSING = object()
+_DELETED = object()
+
+Key = Tuple[str, str]
+
+
+class Storage:
+    def __init__(self, flush_delay: float = FLUSH_DELAY):
+        self.flush_delay = flush_delay
+        self._cache: Dict[Key, Any] = {}
+        self._dirty = set()
+        # All database access happens on one thread, off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        atexit.register(self.flush_sync)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The storage thread doesn't survive fork(); shard workers need their own
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self._flush_handle = None
+
+    async def _load(self, key: Key) -> Any:
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            with instrument.span(f"db.get {key[0]}/{key[1]}"):
+                loaded = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, db.get, key[0], key[1], _MISSING
+                )
+            # Another handler may have loaded or written the key while we waited
+            value = self._cache.setdefault(key, loaded)
+        return value
+
+    def _write(self, key: Key, value: Any):
+        self._cache[key] = value
+        self._dirty.add(key)
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_delay, lambda: loop.create_task(self.flush()))
+
+    def namespace(self, name: str) -> "Namespace":
+        return Namespace(self, name)
+
+    def _read_now(self, func, *args):
+        return self._executor.submit(func, *args).result()
+
+    def get_now(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Blocking get for import time; sees writes that aren't flushed yet"""
+        key = (namespace, key)
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._cache.setdefault(key, self._read_now(db.get, key[0], key[1], _MISSING))
+        return default if value is _MISSING or value is _DELETED else value
+
+    def load_collection(self, namespace: str) -> Dict[str, Any]:
+        """Blocking read of a whole namespace for import time, with unflushed writes applied"""
+        values = dict(self._read_now(db.get_collection, namespace) or {})
+        for (name, key), value in list(self._cache.items()):
+            if name != namespace or value is _MISSING:
+                continue
+            if value is _DELETED:
+                values.pop(key, None)
+            else:
+                values[key] = value
+        return values
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Cached value; mutable values are shared, use the atomic helpers to change them"""
+        with instrument.span(f"storage.get {namespace}/{key}"):
+            value = await self._load((namespace, key))
+        return default if value is _MISSING or value is _DELETED else value
+
+    async def set(self, namespace: str, key: str, value: Any):
+        with instrument.span(f"storage.set {namespace}/{key}"):
+            self._write((namespace, key), value)
+
+    async def delete(self, namespace: str, key: str):
+        with instrument.span(f"storage.delete {namespace}/{key}"):
+            self._write((namespace, key), _DELETED)
+
+    def set_nowait(self, namespace: str, key: str, value: Any):
+        """set for synchronous callers running on the event loop"""
+        self._write((namespace, key), value)
+
+    def delete_nowait(self, namespace: str, key: str):
+        self._write((namespace, key), _DELETED)
+
+    async def append(self, namespace: str, key: str, item: Any, unique: bool = False) -> bool:
+        """Append item to a stored list; with unique, returns False if it was already there"""
+        with instrument.span(f"storage.append {namespace}/{key}"):
+            current = await self._load((namespace, key))
+            items = [] if current is _MISSING or current is _DELETED else list(current)
+            if unique and item in items:
+                return False
+            items.append(item)
+            self._write((namespace, key), items)
+            return True
+
+    async def remove(self, namespace: str, key: str, item: Any) -> bool:
+        """Remove item from a stored list, returns False if it wasn't there"""
+        with instrument.span(f"storage.remove {namespace}/{key}"):
+            current = await self._load((namespace, key))
+            if current is _MISSING or current is _DELETED or item not in current:
+                return False
+            items = list(current)
+            items.remove(item)
+            self._write((namespace, key), items)
+            return True
+
+    async def increment(self, namespace: str, key: str, amount: float = 1) -> float:
+        with instrument.span(f"storage.increment {namespace}/{key}"):
+            current = await self._load((namespace, key))
+            value = (0 if current is _MISSING or current is _DELETED else current) + amount
+            self._write((namespace, key), value)
+            return value
+
+    def _take_dirty(self) -> Dict[Key, Any]:
+        self._flush_handle = None
+        dirty, self._dirty = self._dirty, set()
+        return {key: self._cache[key] for key in dirty}
+
+    @staticmethod
+    def _persist(batch: Dict[Key, Any]):
+        for (namespace, key), value in batch.items():
+            if value is _DELETED:
+                db.remove(namespace, key)
+            else:
+                db.set(namespace, key, value)
+
+    async def flush(self):
+        """Write all pending changes to the database"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        batch = self._take_dirty()
+        if batch:
+            with instrument.span(f"db.flush {len(batch)} keys"):
+                await asyncio.get_running_loop().run_in_executor(self._executor, self._persist, batch)
+
+    def flush_sync(self):
+        batch = self._take_dirty()
+        if batch:
+            self._persist(batch)
+
+
+class Namespace:
+    """Storage bound to a single db module name"""
+
+    def __init__(self, storage: Storage, name: str):
+        self.storage = storage
+        self.name = name
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        return await self.storage.get(self.name, key, default)
+
+    def get_now(self, key: str, default: Any = None) -> Any:
+        return self.storage.get_now(self.name, key, default)
+
+    async def set(self, key: str, value: Any):
+        await self.storage.set(self.name, key, value)
+
+    async def delete(self, key: str):
+        await self.storage.delete(self.name, key)
+
+    async def append(self, key: str, item: Any, unique: bool = False) -> bool:
+        return await self.storage.append(self.name, key, item, unique)
+
+    async def remove(self, key: str, item: Any) -> bool:
+        return await self.storage.remove(self.name, key, item)
+
+    async def increment(self, key: str, amount: float = 1) -> float:
+        return await self.storage.increment(self.name, key, amount)
+
+
+storage = Storage()
@@ -0,0 +1,250 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Run several accounts across a pool of forked worker processes.
+
+    python -m utils.supervisor [--workers N] [--accounts accounts.json]
+
+accounts.json is a list of {"name", "api_id", "api_hash"} objects, plus any
+extra pyrogram Client arguments such as "session_string". The supervisor imports every module
+from full.txt once and then forks the workers, so module code and data are
+shared copy-on-write. Workers that die are restarted with backoff, and their
+heartbeats are aggregated into shards.json for .sysinfo and .botinfo.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional
+
+from utils.loader import ROOT_PATH
+from utils.startup import import_modules, register_modules, run_resume_jobs, run_shutdown_jobs
+
+log = logging.getLogger(__name__)
+
+ACCOUNTS_PATH = os.path.join(ROOT_PATH, "accounts.json")
+STATUS_PATH = os.path.join(ROOT_PATH, "shards.json")
+HEARTBEAT_INTERVAL = 5.0
+# A shard without a heartbeat for this long is reported as stalled
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL
+MAX_BACKOFF = 60.0
+# A shard that stays up this long is healthy again and restarts without backoff
+HEALTHY_AFTER = 300.0
+# How long a terminated shard gets to exit before it is killed
+SHUTDOWN_WAIT = 10.0
+
+# Connection state inherited from the supervisor, see reopen_db
+_inherited_db_state: List[dict] = []
+
+
+def preload_modules() -> list:
+    """Import all modules before forking so workers share them"""
+    modules, _ = import_modules()
+    return modules
+
+
+async def run_shard(index: int, accounts: List[dict], modules: list, status_queue):
+    from pyrogram import Client
+
+    import psutil
+
+    # The supervisor stops shards with SIGTERM; unwind so clients stop and state is saved
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    process = psutil.Process()
+    started = time.time()
+    clients = []
+    try:
+        for account in accounts:
+            options = {key: value for key, value in account.items() if key != "name"}
+            client = Client(account["name"], workdir=ROOT_PATH, **options)
+            register_modules(client, modules)
+            await client.start()
+            await run_resume_jobs(client)
+            clients.append(client)
+
+        while True:
+            status_queue.put({
+                "shard": index,
+                "pid": os.getpid(),
+                "accounts": [account["name"] for account in accounts],
+                "connected": sum(1 for client in clients if client.is_connected),
+                "rss": process.memory_info().rss,
+                "cpu": process.cpu_percent(interval=None),
+                "started": started,
+                "heartbeat": time.time(),
+            })
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+    finally:
+        await run_shutdown_jobs()
+        for client in clients:
+            await client.stop()
+
+
+def reopen_db():
+    """Give a forked worker its own database connection.
+
+    Modules hold utils.db.db by reference, so a fresh instance is built by
+    reloading the module and its state moved into the existing object. The
+    inherited state is kept alive rather than closed, since closing it in
+    the child could tear down the supervisor's connection.
+    """
+    import utils.db
+    db = utils.db.db
+    _inherited_db_state.append(dict(db.__dict__))
+    fresh = importlib.reload(utils.db).db
+    db.__dict__.update(fresh.__dict__)
+    utils.db.db = db
+
+
+def shard_main(index: int, accounts: List[dict], modules: list, status_queue):
+    os.environ["CYBROX_SHARD"] = str(index)
+    reopen_db()
+    try:
+        asyncio.run(run_shard(index, accounts, modules, status_queue))
+    except asyncio.CancelledError:
+        # Stopped by the supervisor
+        pass
+
+
+class Supervisor:
+    def __init__(self, accounts: List[dict], workers: int):
+        self.context = multiprocessing.get_context("fork")
+        self.status_queue = self.context.Queue()
+        workers = max(1, min(workers, len(accounts)))
+        self.shards: List[List[dict]] = [accounts[i::workers] for i in range(workers)]
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.restarts: Dict[int, int] = {i: 0 for i in range(workers)}
+        self.next_start: Dict[int, float] = {}
+        self.started_at: Dict[int, float] = {}
+        self.status: Dict[int, dict] = {}
+        self.modules: list = []
+
+    def start_shard(self, index: int):
+        process = self.context.Process(
+            target=shard_main,
+            args=(index, self.shards[index], self.modules, self.status_queue),
+            name=f"cybrox-shard-{index}",
+            # Not daemonic: shards start their own offload pool processes
+            daemon=False,
+        )
+        process.start()
+        self.processes[index] = process
+        self.started_at[index] = time.monotonic()
+        log.info("Started shard %d (pid %d) for %s", index, process.pid,
+                 ", ".join(account["name"] for account in self.shards[index]))
+
+    def check_shards(self):
+        now = time.monotonic()
+        for index, process in list(self.processes.items()):
+            if process.is_alive():
+                if self.restarts[index] and now - self.started_at[index] >= HEALTHY_AFTER:
+                    self.restarts[index] = 0
+                continue
+            if index not in self.next_start:
+                self.restarts[index] += 1
+                backoff = min(2 ** self.restarts[index], MAX_BACKOFF)
+                self.next_start[index] = now + backoff
+                log.warning("Shard %d exited with code %s, restarting in %.0fs", index, process.exitcode, backoff)
+            elif now >= self.next_start[index]:
+                del self.next_start[index]
+                self.start_shard(index)
+
+    def drain_status(self):
+        while not self.status_queue.empty():
+            heartbeat = self.status_queue.get_nowait()
+            self.status[heartbeat["shard"]] = heartbeat
+
+    def write_status(self):
+        shards = []
+        for index in range(len(self.shards)):
+            process = self.processes.get(index)
+            shard = dict(self.status.get(index, {"shard": index}))
+            shard["alive"] = bool(process and process.is_alive())
+            shard["restarts"] = self.restarts[index]
+            shards.append(shard)
+        tmp_path = f"{STATUS_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"supervisor": os.getpid(), "updated": time.time(), "shards": shards}, f)
+        os.replace(tmp_path, STATUS_PATH)
+
+    def run(self):
+        self.modules = preload_modules()
+        for index in range(len(self.shards)):
+            self.start_shard(index)
+        try:
+            while True:
+                time.sleep(1)
+                self.drain_status()
+                self.check_shards()
+                self.write_status()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_shards()
+
+    def stop_shards(self):
+        """Terminate every shard and wait for it, killing any that linger"""
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(SHUTDOWN_WAIT)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def read_shard_status() -> Optional[dict]:
+    """Aggregated shard health written by the supervisor, if it is running"""
+    try:
+        with open(STATUS_PATH, encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+    now = time.time()
+    for shard in status["shards"]:
+        heartbeat = shard.get("heartbeat")
+        if not shard["alive"]:
+            shard["health"] = "down"
+        elif heartbeat is None or now - heartbeat > STALE_AFTER:
+            shard["health"] = "stalled"
+        else:
+            shard["health"] = "ok"
+    return status
+
+
+def current_shard() -> Optional[int]:
+    shard = os.environ.get("CYBROX_SHARD")
+    return int(shard) if shard is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several accounts across worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--accounts", default=ACCOUNTS_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if ROOT_PATH not in sys.path:
+        sys.path.insert(0, ROOT_PATH)
+
+    with open(args.accounts, encoding="utf-8") as f:
+        accounts = json.load(f)
+    Supervisor(accounts, args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
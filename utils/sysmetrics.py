@@ -0,0 +1,218 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import logging
+import os
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+log = logging.getLogger(__name__)
+
+# Averaging windows reported by .sysinfo, in seconds
+WINDOWS = (60, 300, 900)
+
+
+class RingBuffer:
+    """Fixed-size float history backed by an array, constant memory"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = array("d", [0.0]) * capacity
+        self._index = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float):
+        with self._lock:
+            self._data[self._index] = value
+            self._index = (self._index + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def latest(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._data[self._index - 1]
+
+    def last(self, n: Optional[int] = None) -> List[float]:
+        """Return up to n most recent values, oldest first"""
+        with self._lock:
+            n = self._count if n is None else min(n, self._count)
+            start = self._index - n
+            if start >= 0:
+                return self._data[start:self._index].tolist()
+            return self._data[start:].tolist() + self._data[:self._index].tolist()
+
+    def mean(self, n: Optional[int] = None) -> Optional[float]:
+        values = self.last(n)
+        return sum(values) / len(values) if values else None
+
+    def percentile(self, q: float, n: Optional[int] = None) -> Optional[float]:
+        values = sorted(self.last(n))
+        if not values:
+            return None
+        return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+
+def collect(disk_path: str) -> dict:
+    """Raw psutil readings, about a millisecond of /proc parsing"""
+    return {
+        "cpu_times": psutil.cpu_times(),
+        "cpu_freq": psutil.cpu_freq(),
+        "memory": psutil.virtual_memory(),
+        "disk": psutil.disk_usage(disk_path),
+        "net": psutil.net_io_counters(),
+    }
+
+
+def cpu_percent(before, after) -> float:
+    """System-wide CPU usage between two cpu_times() readings, like psutil.cpu_percent()"""
+    def busy(times) -> Tuple[float, float]:
+        # Guest time is already included in user and nice on Linux
+        total = sum(times) - getattr(times, "guest", 0) - getattr(times, "guest_nice", 0)
+        return total, total - times.idle - getattr(times, "iowait", 0)
+
+    total_before, busy_before = busy(before)
+    total_after, busy_after = busy(after)
+    if total_after <= total_before:
+        return 0.0
+    return round(min(max((busy_after - busy_before) / (total_after - total_before) * 100, 0.0), 100.0), 1)
+
+
+class SystemSampler:
+    """Collects system stats at a fixed interval off the event loop"""
+
+    METRICS = ("cpu", "memory", "disk", "net_sent", "net_recv")
+
+    def __init__(self, interval: float = 5.0, disk_path: str = "/"):
+        self._thread: Optional[threading.Thread] = None
+        self.interval = interval
+        self.disk_path = disk_path
+        capacity = int(max(WINDOWS) / interval)
+        self.history: Dict[str, RingBuffer] = {name: RingBuffer(capacity) for name in self.METRICS}
+        self.current: dict = {}
+        # Last sampling failure, shown by .sysinfo until a sample succeeds again
+        self.error: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._last: Optional[dict] = None
+
+        # Values that don't change while the process runs
+        self.static = {
+            "cpu_physical": psutil.cpu_count(logical=False),
+            "cpu_logical": psutil.cpu_count(),
+            "boot_time": psutil.boot_time(),
+        }
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="sysmetrics-sampler", daemon=True)
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while True:
+            try:
+                if self._last is None:
+                    # The first reading only sets the baseline for CPU and network rates
+                    self._last = self._collect()
+                else:
+                    self.sample()
+            except Exception as e:
+                self._failed(e)
+            else:
+                self.error = None
+            if self._stop_event.wait(self.interval):
+                return
+
+    def _failed(self, error: Exception):
+        message = f"{type(error).__name__}: {error}"
+        # Log each distinct failure once rather than every interval
+        if message != self.error:
+            log.exception("System sampling failed")
+        self.error = message
+
+    def _collect(self) -> dict:
+        reading = collect(self.disk_path)
+        reading["time"] = time.monotonic()
+        return reading
+
+    def sample(self):
+        reading = self._collect()
+        last, self._last = self._last or reading, reading
+        memory, disk, net = reading["memory"], reading["disk"], reading["net"]
+
+        cpu = cpu_percent(last["cpu_times"], reading["cpu_times"])
+        cpu_freq = reading["cpu_freq"]
+        elapsed = max(reading["time"] - last["time"], 1e-6)
+        sent_rate = (net.bytes_sent - last["net"].bytes_sent) / elapsed
+        recv_rate = (net.bytes_recv - last["net"].bytes_recv) / elapsed
+
+        self.history["cpu"].append(cpu)
+        self.history["memory"].append(memory.percent)
+        self.history["disk"].append(disk.percent)
+        self.history["net_sent"].append(sent_rate)
+        self.history["net_recv"].append(recv_rate)
+
+        self.current = {
+            "time": time.time(),
+            "cpu": cpu,
+            "cpu_freq": cpu_freq.current if cpu_freq else None,
+            "memory_total": memory.total,
+            "memory_used": memory.used,
+            "memory": memory.percent,
+            "disk_total": disk.total,
+            "disk_used": disk.used,
+            "disk": disk.percent,
+            "net_sent": sent_rate,
+            "net_recv": recv_rate,
+        }
+
+    def summary(self, metric: str) -> dict:
+        """Averages and p95 over the reporting windows for a metric"""
+        history = self.history[metric]
+        result = {}
+        for window in WINDOWS:
+            n = int(window / self.interval)
+            result[window] = (history.mean(n), history.percentile(95, n))
+        return result
+
+
+_sampler: Optional[SystemSampler] = None
+
+
+def get_sampler() -> SystemSampler:
+    """Return the process-wide sampler, starting it on first use"""
+    global _sampler
+    if _sampler is None:
+        _sampler = SystemSampler()
+        _sampler.start()
+    return _sampler
+
+
+def _restart_after_fork():
+    # Threads don't survive fork(); forked shard workers need their own sampler
+    if _sampler is not None and not _sampler.is_alive():
+        # A lock held by the parent's sampler thread at fork time would never be released
+        for history in _sampler.history.values():
+            history._lock = threading.Lock()
+        _sampler.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -1,35 +1,148 @@
 # Custom module for CybroX-UserBot
 import asyncio
 import random
+from typing import List, Tuple
+
 from pyrogram import Client, filters
+from pyrogram.enums import ParseMode
+from pyrogram.errors import FloodWait, MessageNotModified
 from pyrogram.types import Message
 
 from utils.misc import modules_help, prefix
 from utils.scripts import edit_or_reply
+from utils.transforms import TRANSFORMS, apply, compile_pipeline, run_pipeline, split_message
+from utils.offload import OffloadQueueFull, pool
+from utils.storage import storage
+
+# Edits per .type animation; each one counts against Telegram's edit rate limit
+DEFAULT_EDIT_BUDGET = 15
+# Total animation length in seconds, independent of the text length
+DEFAULT_DURATION = 6.0
+TYPING_CURSOR = "▒"
+# Longest transformed output sent back, in 4096-character messages
+MAX_MESSAGES = 10
+# Pipelines doing more work than this, in characters times steps, run in
+# the process pool. Steps cost 35-170ns per character, so this is 10-45ms
+# on the loop; below it, pickling and a possible pool start cost more
+OFFLOAD_THRESHOLD = 256 * 1024
+
+
+def frame_schedule(length: int, budget: int, duration: float) -> Tuple[List[int], float]:
+    """Split text into at most budget frames, returning frame end offsets and the delay between them"""
+    frames = max(1, min(budget, length))
+    step = length / frames
+    ends = [round(step * (i + 1)) for i in range(frames)]
+    return ends, duration / frames
+
+
+def command_text(message: Message) -> str:
+    """Text after the command, or the replied message's text"""
+    parts = (message.text or "").split(maxsplit=1)
+    if len(parts) > 1:
+        return parts[1]
+    replied = message.reply_to_message
+    if replied:
+        return replied.text or replied.caption or ""
+    return ""
 
 
 @Client.on_message(filters.command("type", prefix) & filters.me)
 async def type_cmd(client: Client, message: Message):
     """Type message with a typing animation effect"""
-    # Your existing type_cmd function...
+    text = command_text(message)
+    if not text:
+        await edit_or_reply(message, f"<b>Usage:</b> <code>{prefix}type [text]</code>")
+        return
+    
+    budget = await storage.get("core.text", "type_edit_budget", DEFAULT_EDIT_BUDGET)
+    duration = await storage.get("core.text", "type_duration", DEFAULT_DURATION)
+    ends, delay = frame_schedule(len(text), budget, duration)
+    
+    loop = asyncio.get_running_loop()
+    for end in ends:
+        started = loop.time()
+        frame = text[:end] if end == len(text) else text[:end] + TYPING_CURSOR
+        try:
+            await message.edit(frame, parse_mode=ParseMode.DISABLED)
+        except MessageNotModified:
+            pass
+        except FloodWait:
+            # Waiting out the flood would freeze the animation for its whole duration
+            return
+        if end != len(text):
+            # Subtract edit latency so the total duration stays constant
+            await asyncio.sleep(max(delay - (loop.time() - started), 0))
+
+
+async def send_transformed(client: Client, message: Message, spec: str, text: str):
+    """Run a transform pipeline and send the result, split into as many messages as needed"""
+    if not text:
+        await edit_or_reply(message, f"<b>Usage:</b> <code>{prefix}{message.command[0]} [text or reply]</code>")
+        return
+    
+    try:
+        steps = compile_pipeline(spec)
+    except KeyError as e:
+        await edit_or_reply(
+            message,
+            f"<b>❌ Unknown transform</b> <code>{e.args[0]}</code>, available: <code>{'|'.join(TRANSFORMS)}</code>"
+        )
+        return
+    
+    if len(text) * len(steps) > OFFLOAD_THRESHOLD:
+        try:
+            result = await pool.run(apply, spec, str(text), timeout=10)
+        except OffloadQueueFull:
+            await edit_or_reply(message, "<b>❌ Too many heavy jobs running, try again later.</b>")
+            return
+        except asyncio.TimeoutError:
+            await edit_or_reply(message, "<b>❌ Transform took too long.</b>")
+            return
+    else:
+        result = run_pipeline(steps, text)
+    
+    chunks = split_message(result)
+    if len(chunks) > MAX_MESSAGES:
+        await edit_or_reply(message, f"<b>❌ Result is too long ({len(chunks)} messages).</b>")
+        return
+    
+    await message.edit(chunks[0], parse_mode=ParseMode.DISABLED)
+    for chunk in chunks[1:]:
+        await client.send_message(message.chat.id, chunk, parse_mode=ParseMode.DISABLED)
+
+
+@Client.on_message(filters.command("t", prefix) & filters.me)
+async def transform_cmd(client: Client, message: Message):
+    """Apply a chain of transforms, e.g. .t mock|vapor|reverse text"""
+    parts = (message.text or "").split(maxsplit=2)
+    if len(parts) < 2:
+        await edit_or_reply(message, f"<b>Usage:</b> <code>{prefix}t mock|vapor|reverse [text or reply]</code>")
+        return
+    
+    if len(parts) > 2:
+        text = parts[2]
+    else:
+        replied = message.reply_to_message
+        text = (replied.text or replied.caption or "") if replied else ""
+    await send_transformed(client, message, parts[1], text)
 
 
 @Client.on_message(filters.command("mock", prefix) & filters.me)
 async def mock_cmd(client: Client, message: Message):
     """Convert text to mOcK tExT"""
-    # Your existing mock_cmd function...
+    await send_transformed(client, message, "mock", command_text(message))
 
 
 @Client.on_message(filters.command("vapor", prefix) & filters.me)
 async def vapor_cmd(client: Client, message: Message):
     """Convert text to vaporwave text"""
-    # Your existing vapor_cmd function...
+    await send_transformed(client, message, "vapor", command_text(message))
 
 
 @Client.on_message(filters.command("reverse", prefix) & filters.me)
 async def reverse_cmd(client: Client, message: Message):
     """Reverse the given text"""
-    # Your existing reverse_cmd function...
+    await send_transformed(client, message, "reverse", command_text(message))
 
 
 # Register module in help system
@@ -38,5 +151,6 @@ modules_help["text"] = {
     "mock [text]": "Convert text to mOcK tExT",
     "vapor [text]": "Convert text to vaporwave text",
     "reverse [text]": "Reverse the given text",
+    "t [a|b|c] [text]": "Chain transforms in one go, e.g. t mock|vapor|reverse (works on replies too)",
     "__category__": "fun"
-}
\ No newline at end of file
+}
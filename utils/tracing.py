@@ -0,0 +1,191 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Lightweight per-command tracing.
+
+A sampled handler invocation opens a root span. Telegram calls, storage
+access and instrument.sleep pauses inside it become child spans through
+instrument's middlewares and instrument.span; a plain asyncio.sleep is not
+patched and shows up as a gap. Finished traces are kept in memory for
+.trace and appended to a rotating JSONL file by a background thread.
+"""
+
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from collections import deque
+from typing import List, Optional
+
+from utils import instrument
+from utils.loader import ROOT_PATH
+from utils.storage import storage
+
+TRACE_PATH = os.path.join(ROOT_PATH, "traces.jsonl")
+DEFAULT_SAMPLE_RATE = 1.0
+# Hard cap on traces started per second, whatever the sample rate
+MAX_TRACES_PER_SECOND = 10
+# Spans kept per trace; a handler looping over RPCs would otherwise grow it without bound
+MAX_SPANS = 200
+
+_current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+_ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("id", "name", "start", "end", "depth", "error", "trace")
+
+    def __init__(self, name: str, trace: "Trace", depth: int):
+        self.id = next(_ids)
+        self.name = name
+        self.trace = trace
+        self.depth = depth
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.end = time.perf_counter()
+        if error is not None:
+            self.error = type(error).__name__
+
+
+class Trace:
+    def __init__(self, name: str, chat_id):
+        self.name = name
+        self.chat_id = chat_id
+        self.started = time.time()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.root = self.child(name, depth=0)
+
+    def child(self, name: str, depth: int) -> Span:
+        span = Span(name, self, depth)
+        # Spans past the cap are still timed for nesting but not kept
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    @property
+    def duration(self) -> float:
+        return (self.root.end or time.perf_counter()) - self.root.start
+
+    def to_dict(self) -> dict:
+        origin = self.root.start
+        return {
+            "trace_id": self.root.id,
+            "command": self.name,
+            "chat_id": self.chat_id,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 3),
+            "dropped_spans": self.dropped,
+            "spans": [
+                {
+                    "name": span.name,
+                    "depth": span.depth,
+                    "offset_ms": round((span.start - origin) * 1000, 3),
+                    "duration_ms": round(((span.end or span.start) - span.start) * 1000, 3),
+                    "error": span.error,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+class Tracer:
+    def __init__(self):
+        self.sample_rate = storage.get_now("core.tracing", "sample_rate", DEFAULT_SAMPLE_RATE)
+        self.recent = deque(maxlen=50)
+        self._window = 0
+        self._window_count = 0
+
+        # Disk writes happen on the listener thread, never on the event loop
+        self._queue = queue.SimpleQueue()
+        self._logger = logging.getLogger("cybrox.traces")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(logging.handlers.QueueHandler(self._queue))
+        file_handler = logging.handlers.RotatingFileHandler(
+            TRACE_PATH, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+        self._listener.start()
+
+    def _sampled(self) -> bool:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        second = int(time.monotonic())
+        if second != self._window:
+            self._window = second
+            self._window_count = 0
+        self._window_count += 1
+        return self._window_count <= MAX_TRACES_PER_SECOND
+
+    def _export(self, trace: Trace):
+        self.recent.append(trace)
+        self._logger.info(json.dumps(trace.to_dict()))
+
+    async def handler_middleware(self, call_next, client, update, name, is_command):
+        if not is_command or not self._sampled():
+            return await call_next()
+
+        chat = getattr(update, "chat", None)
+        trace = Trace(name, chat.id if chat else None)
+        token = _current.set(trace.root)
+        error = None
+        try:
+            return await call_next()
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            trace.root.finish(error)
+            self._export(trace)
+
+    async def invoke_middleware(self, call_next, client, query):
+        # Each FloodWait retry is its own span, the wait between them a "floodwait" span
+        with self.span(f"rpc {type(query).__name__}"):
+            return await call_next()
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        parent = _current.get()
+        if parent is None:
+            yield
+            return
+        span = parent.trace.child(name, parent.depth + 1)
+        token = _current.set(span)
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            span.finish(error)
+
+
+tracer = Tracer()
+# The listener thread doesn't survive fork() into shard workers
+os.register_at_fork(after_in_child=tracer._listener.start)
+
+instrument.set_span_factory(tracer.span)
+instrument.add_handler_middleware(tracer.handler_middleware)
+instrument.add_invoke_middleware(tracer.invoke_middleware)
+instrument.install()
@@ -0,0 +1,163 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Precompiled text transforms that can be chained into a pipeline.
+
+Per-character mappings are ``str.translate`` tables, and consecutive ones
+are merged into a single table so a chain like ``vapor|vapor`` still runs as
+one pass over the text. mock depends on position and reverse reorders
+clusters, so neither fits in a table and each adds its own pass.
+"""
+
+import itertools
+import re
+import unicodedata
+from typing import Callable, Dict, List, Union
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+# Telegram limits messages to 4096 UTF-16 code units
+MESSAGE_LIMIT = 4096
+
+Step = Union[Dict[int, str], Callable[[str], str]]
+
+# ASCII printable characters map to their full-width forms, space to an ideographic space
+VAPOR_TABLE: Dict[int, str] = {code: chr(code + 0xFEE0) for code in range(0x21, 0x7F)}
+VAPOR_TABLE[ord(" ")] = "　"
+
+
+def mock(text: str) -> str:
+    """aLtErNaTe the case of every other character"""
+    lower = text.lower()
+    upper = text.upper()
+    if len(lower) == len(upper) == len(text):
+        chars = list(lower)
+        chars[1::2] = upper[1::2]
+        return "".join(chars)
+    # Some characters change length when case mapped (e.g. ß -> SS)
+    return "".join(c.upper() if i % 2 else c.lower() for i, c in enumerate(text))
+
+
+# Unicode only assigns combining marks and emoji modifiers in planes 0-2 and
+# the tag/variation selector blocks of plane 14, so the rest is not scanned
+EXTENDER_SCAN = (range(0x30000), range(0xE0000, 0xE0200))
+
+
+def _cluster_pattern():
+    """Regex approximating extended grapheme clusters"""
+    ranges = []
+    start = None
+    for code in itertools.chain(*EXTENDER_SCAN):
+        extends = (
+            unicodedata.category(chr(code)) in ("Mn", "Me", "Mc")
+            or 0xFE00 <= code <= 0xFE0F          # variation selectors
+            or 0x1F3FB <= code <= 0x1F3FF        # skin tone modifiers
+            or 0xE0020 <= code <= 0xE007F        # emoji tag sequences
+        )
+        if extends and start is None:
+            start = code
+        elif not extends and start is not None:
+            ranges.append((start, code - 1))
+            start = None
+    if start is not None:
+        ranges.append((start, EXTENDER_SCAN[-1][-1]))
+
+    extender = "[" + "".join(f"\\U{a:08x}-\\U{b:08x}" for a, b in ranges) + "]"
+    # Only clusters longer than one code point need to be kept intact
+    return re.compile(
+        rf"[\U0001F1E6-\U0001F1FF]{{2}}|.(?:{extender}|\u200d.)+",
+        re.DOTALL,
+    )
+
+
+# Built at import, which happens in a loader thread, rather than inside the
+# first .reverse on the event loop (about 30 ms)
+CLUSTER_RE = _cluster_pattern() if regex is None else None
+
+
+def reverse(text: str) -> str:
+    """Reverse text without splitting emoji or combining characters"""
+    if text.isascii():
+        return text[::-1]
+    if regex is not None:
+        return "".join(reversed(regex.findall(r"\X", text)))
+    # Reverse runs of single code points by slicing and keep multi-code-point clusters as they are
+    pieces = []
+    position = 0
+    for match in CLUSTER_RE.finditer(text):
+        pieces.append(text[position:match.start()][::-1])
+        pieces.append(match.group())
+        position = match.end()
+    pieces.append(text[position:][::-1])
+    return "".join(reversed(pieces))
+
+
+TRANSFORMS: Dict[str, Step] = {
+    "mock": mock,
+    "vapor": VAPOR_TABLE,
+    "reverse": reverse,
+}
+
+
+def _merge_tables(first: Dict[int, str], second: Dict[int, str]) -> Dict[int, str]:
+    """Table equivalent to translating with first and then with second"""
+    merged = {code: "".join(second.get(ord(c), c) for c in value) for code, value in first.items()}
+    for code, value in second.items():
+        merged.setdefault(code, value)
+    return merged
+
+
+def compile_pipeline(spec: str) -> List[Step]:
+    """Compile "mock|vapor|reverse" into steps, merging adjacent translate tables"""
+    steps: List[Step] = []
+    for name in spec.lower().split("|"):
+        name = name.strip()
+        if name not in TRANSFORMS:
+            raise KeyError(name)
+        step = TRANSFORMS[name]
+        if isinstance(step, dict) and steps and isinstance(steps[-1], dict):
+            steps[-1] = _merge_tables(steps[-1], step)
+        else:
+            steps.append(step)
+    return steps
+
+
+def run_pipeline(steps: List[Step], text: str) -> str:
+    for step in steps:
+        text = text.translate(step) if isinstance(step, dict) else step(text)
+    return text
+
+
+def apply(spec: str, text: str) -> str:
+    """Compile and run a pipeline; picklable entry point for off-loop use"""
+    return run_pipeline(compile_pipeline(spec), text)
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Split text into chunks of at most limit UTF-16 code units, preferring line breaks"""
+    encoded = text.encode("utf-16-le")
+    if len(encoded) <= limit * 2:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(encoded):
+        end = min(start + limit * 2, len(encoded))
+        if end < len(encoded):
+            # Never cut a surrogate pair in half
+            if 0xD8 <= encoded[end - 1] <= 0xDB:
+                end -= 2
+            newline = encoded.rfind(b"\n\x00", start + limit, end)
+            if newline != -1 and newline % 2 == 0:
+                end = newline + 2
+        chunks.append(encoded[start:end].decode("utf-16-le"))
+        start = end
+    return chunks
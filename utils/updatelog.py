@@ -0,0 +1,196 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+"""Compact on-disk log of raw Telegram updates.
+
+Each frame is ``<offset seconds: f64><length: u32><TL bytes>`` inside a gzip
+stream, where the TL bytes are a raw ``Updates`` container with the update
+and the users/chats it references. Anonymized logs replace names, usernames,
+phone numbers and message text (except commands), and remap user/chat IDs
+with a keyed hash, so the log keeps its shape without its content.
+"""
+
+import functools
+import gzip
+import hashlib
+import hmac
+import inspect
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from io import BytesIO
+from typing import Iterator, List, Tuple
+
+from pyrogram import raw
+from pyrogram.raw.core import TLObject
+
+FRAME_HEADER = struct.Struct("<dI")
+
+# Objects whose "id" field is a user or chat ID rather than a message ID
+PEER_TYPES = {"User", "UserEmpty", "Chat", "ChatEmpty", "ChatForbidden", "Channel", "ChannelForbidden"}
+ID_FIELDS = {"user_id", "chat_id", "channel_id", "inviter_id", "actor_id", "via_bot_id"}
+NAME_FIELDS = {"first_name", "last_name", "username", "title"}
+TEXT_FIELDS = {"message"}
+DROPPED_FIELDS = {"phone", "access_hash", "photo", "usernames"}
+
+
+@functools.lru_cache(maxsize=None)
+def _optional_fields(cls) -> frozenset:
+    return frozenset(
+        name for name, parameter in inspect.signature(cls.__init__).parameters.items()
+        if parameter.default is None
+    )
+
+
+def clear_empty_vectors(obj, cleared: List[tuple]):
+    """Set empty optional vectors back to None, recording (object, field) in cleared.
+
+    pyrogram reads an absent flags vector as [] but writes every vector that
+    isn't None without setting its flag, so writing an object it has read
+    produces a frame that can't be read back.
+    """
+    if isinstance(obj, list):
+        for item in obj:
+            clear_empty_vectors(item, cleared)
+        return
+    if not isinstance(obj, TLObject):
+        return
+    optional = _optional_fields(type(obj))
+    for field in obj.__slots__:
+        value = getattr(obj, field, None)
+        if isinstance(value, list) and not value and field in optional:
+            setattr(obj, field, None)
+            cleared.append((obj, field))
+        elif isinstance(value, (list, TLObject)):
+            clear_empty_vectors(value, cleared)
+
+
+def write_tl(obj) -> bytes:
+    """Serialize an object pyrogram has read, leaving it unchanged"""
+    cleared = []
+    clear_empty_vectors(obj, cleared)
+    try:
+        return obj.write()
+    finally:
+        for cleared_obj, field in cleared:
+            setattr(cleared_obj, field, [])
+
+
+class Anonymizer:
+    def __init__(self, command_prefix: str, key: bytes = None):
+        self.prefix = command_prefix
+        self.key = key or os.urandom(16)
+
+    def map_id(self, value) -> int:
+        digest = hmac.new(self.key, str(value).encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:4], "little") & 0x7FFFFFFF or 1
+
+    def map_text(self, text: str) -> str:
+        # Keep length (and so entity offsets) and commands, drop the content
+        rng = random.Random(hmac.new(self.key, text.encode(), hashlib.sha256).digest())
+        words = []
+        for word in text.split(" "):
+            if word.startswith(self.prefix):
+                words.append(word)
+            else:
+                words.append("".join(
+                    rng.choice("abcdefghijklmnopqrstuvwxyz") if c.isalpha() and ord(c) < 0x10000
+                    else str(rng.randrange(10)) if c.isdigit() else c
+                    for c in word
+                ))
+        return " ".join(words)
+
+    def apply(self, obj):
+        """Anonymize a TL object graph in place"""
+        if isinstance(obj, list):
+            for item in obj:
+                self.apply(item)
+            return
+        if not isinstance(obj, TLObject):
+            return
+
+        is_peer = type(obj).__name__ in PEER_TYPES
+        for field in obj.__slots__:
+            value = getattr(obj, field, None)
+            if value is None:
+                continue
+            if field in ID_FIELDS or (field == "id" and is_peer):
+                if isinstance(value, int):
+                    setattr(obj, field, self.map_id(value))
+            elif field in NAME_FIELDS and isinstance(value, str):
+                setattr(obj, field, f"{field}_{self.map_id(value) % 100000}")
+            elif field in TEXT_FIELDS and isinstance(value, str):
+                setattr(obj, field, self.map_text(value))
+            elif field in DROPPED_FIELDS:
+                setattr(obj, field, 0 if isinstance(value, int) else None)
+            else:
+                self.apply(value)
+
+
+class UpdateRecorder:
+    """Serializes updates on the caller's thread; anonymizing, compressing and
+    writing happen on a writer thread so the event loop never waits on gzip"""
+
+    def __init__(self, path: str, anonymizer: Anonymizer = None):
+        self.path = path
+        self.anonymizer = anonymizer
+        self.count = 0
+        self.started = time.monotonic()
+        self._file = gzip.open(path, "wb", compresslevel=6)
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_frames, name="update-recorder", daemon=True)
+        self._writer.start()
+
+    def write(self, update, users: dict, chats: dict):
+        container = raw.types.Updates(
+            updates=[update],
+            users=list(users.values()),
+            chats=list(chats.values()),
+            date=int(time.time()),
+            seq=0,
+        )
+        # Serialized now, while the objects can't change under the writer thread
+        self._queue.put((time.monotonic() - self.started, write_tl(container)))
+        self.count += 1
+
+    def _write_frames(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            offset, data = frame
+            if self.anonymizer is not None:
+                # Work on a copy so handlers never see anonymized objects
+                container = TLObject.read(BytesIO(data))
+                self.anonymizer.apply(container)
+                data = write_tl(container)
+            self._file.write(FRAME_HEADER.pack(offset, len(data)))
+            self._file.write(data)
+        self._file.close()
+
+    def close(self):
+        """Write out queued frames and close the file; blocks until done"""
+        self._queue.put(None)
+        self._writer.join()
+
+
+def read_log(path: str) -> Iterator[Tuple[float, object, dict, dict]]:
+    """Yield (offset seconds, update, users, chats) frames from a log"""
+    with gzip.open(path, "rb") as f:
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            offset, length = FRAME_HEADER.unpack(header)
+            container = TLObject.read(BytesIO(f.read(length)))
+            users = {user.id: user for user in container.users}
+            chats = {chat.id: chat for chat in container.chats}
+            yield offset, container.updates[0], users, chats
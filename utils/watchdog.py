@@ -0,0 +1,115 @@
+#  CybroX-UserBot - telegram userbot
+#  Copyright (C) 2025 CybroX UserBot Organization
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from pyrogram import Client
+
+from utils import instrument
+from utils.storage import storage
+
+log = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 500
+
+
+@dataclass
+class Stall:
+    started: float
+    command: Optional[str]
+    stack: List[str]
+    duration: float = 0.0
+    running: List[str] = field(default_factory=list)
+
+
+class LoopWatchdog(threading.Thread):
+    """Detects event loop stalls from a separate thread and captures the blocking stack"""
+
+    def __init__(self, threshold: float, history: int = 20):
+        super().__init__(name="loop-watchdog", daemon=True)
+        self.threshold = threshold
+        self.stalls = deque(maxlen=history)
+        # Commands currently executing, keyed by their task
+        self.running: Dict[asyncio.Task, str] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._stop_event = threading.Event()
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        self._tick()
+        self.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _tick(self):
+        self._last_tick = time.monotonic()
+        self._loop.call_later(self.threshold / 4, self._tick)
+
+    def _capture(self, started: float) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame) if frame else []
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        running = list(self.running.values())
+        command = self.running.get(task)
+        if command is None and len(running) == 1:
+            command = running[0]
+        return Stall(started=started, command=command, stack=stack, running=running)
+
+    def run(self):
+        stall = None
+        while not self._stop_event.wait(self.threshold / 4):
+            blocked = time.monotonic() - self._last_tick
+            if blocked > self.threshold:
+                if stall is None:
+                    stall = self._capture(time.time() - blocked)
+                    self.stalls.append(stall)
+                    log.warning(
+                        "Event loop blocked for over %.0f ms in %s:\n%s",
+                        blocked * 1000, stall.command or "unknown handler", "".join(stall.stack[-8:]),
+                    )
+                stall.duration = blocked
+            elif stall is not None:
+                log.warning("Event loop stall in %s lasted %.0f ms", stall.command or "unknown handler",
+                            stall.duration * 1000)
+                stall = None
+
+    async def handler_middleware(self, call_next, client, update, name, is_command):
+        task = asyncio.current_task()
+        self.running[task] = name
+        try:
+            return await call_next()
+        finally:
+            self.running.pop(task, None)
+
+
+watchdog = LoopWatchdog(storage.get_now("core.watchdog", "threshold_ms", DEFAULT_THRESHOLD_MS) / 1000)
+
+
+def _start(client: Client):
+    if watchdog.threshold > 0 and not watchdog.is_alive():
+        watchdog.attach(asyncio.get_running_loop())
+
+
+instrument.add_handler_middleware(watchdog.handler_middleware)
+instrument.on_client(_start)
+instrument.install()